@@ -0,0 +1,57 @@
+"""invoice query indexes
+
+Revision ID: 3f9c2a7d81e4
+Revises: 
+Create Date: 2026-10-18 15:00:00.000000
+
+Indexes for the invoice list filter/sort matrix, tech and open-balance
+rollups, and the invoice_id foreign keys that relationship loads look up.
+Standalone and idempotent, so it can be applied next to a locally
+generated schema revision (alembic upgrade heads). Tables that don't exist
+yet are skipped; the schema revision that creates them adds the indexes too.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2a7d81e4'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = ('indexes',)
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'invoices' in tables:
+        op.create_index('ix_invoices_date_id', 'invoices', ['date', 'id'], if_not_exists=True)
+        op.create_index('ix_invoices_customer_id_date', 'invoices', ['customer_id', 'date'], if_not_exists=True)
+        op.create_index('ix_invoices_tech_id_date', 'invoices', ['tech_id', 'date'], if_not_exists=True)
+        op.create_index('ix_invoices_status_date', 'invoices', ['status', 'date'], if_not_exists=True)
+        op.create_index(
+            'ix_invoices_open_balance',
+            'invoices',
+            ['customer_id', 'final_total'],
+            if_not_exists=True,
+            postgresql_where=sa.text("status != 'paid' AND is_estimate = false AND is_active = true"),
+            sqlite_where=sa.text("status != 'paid' AND is_estimate = 0 AND is_active = 1"),
+        )
+    if 'line_items' in tables:
+        op.create_index('ix_line_items_invoice_id', 'line_items', ['invoice_id'], if_not_exists=True)
+    if 'public_tokens' in tables:
+        op.create_index('ix_public_tokens_invoice_id', 'public_tokens', ['invoice_id'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_public_tokens_invoice_id', table_name='public_tokens', if_exists=True)
+    op.drop_index('ix_line_items_invoice_id', table_name='line_items', if_exists=True)
+    op.drop_index('ix_invoices_open_balance', table_name='invoices', if_exists=True)
+    op.drop_index('ix_invoices_status_date', table_name='invoices', if_exists=True)
+    op.drop_index('ix_invoices_tech_id_date', table_name='invoices', if_exists=True)
+    op.drop_index('ix_invoices_customer_id_date', table_name='invoices', if_exists=True)
+    op.drop_index('ix_invoices_date_id', table_name='invoices', if_exists=True)
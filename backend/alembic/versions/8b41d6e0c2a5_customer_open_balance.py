@@ -0,0 +1,58 @@
+"""customer open balance counters
+
+Revision ID: 8b41d6e0c2a5
+Revises: 3f9c2a7d81e4
+Create Date: 2026-10-18 18:00:00.000000
+
+customers.open_balance / invoice_count, maintained by the app on every
+invoice write and backfilled here from the invoices table. Idempotent like
+the index revision before it: skipped if customers doesn't exist yet, and
+columns that are already there (from a generated schema) are left alone.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b41d6e0c2a5'
+down_revision: Union[str, None] = '3f9c2a7d81e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if 'customers' not in inspector.get_table_names():
+        return
+
+    columns = {column['name'] for column in inspector.get_columns('customers')}
+    with op.batch_alter_table('customers') as batch:
+        if 'open_balance' not in columns:
+            batch.add_column(sa.Column('open_balance', sa.Float(), server_default='0', nullable=False))
+        if 'invoice_count' not in columns:
+            batch.add_column(sa.Column('invoice_count', sa.Integer(), server_default='0', nullable=False))
+
+    if 'invoices' in inspector.get_table_names():
+        op.execute(sa.text("""
+            UPDATE customers SET
+                open_balance = COALESCE((
+                    SELECT SUM(final_total) FROM invoices
+                    WHERE invoices.customer_id = customers.id
+                      AND status != 'paid' AND is_estimate = false AND is_active = true
+                ), 0),
+                invoice_count = (
+                    SELECT COUNT(*) FROM invoices
+                    WHERE invoices.customer_id = customers.id
+                      AND is_estimate = false AND is_active = true
+                )
+        """))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('customers') as batch:
+        batch.drop_column('invoice_count')
+        batch.drop_column('open_balance')
@@ -0,0 +1,42 @@
+"""invoice updated_at
+
+Revision ID: a4d6f8b1c273
+Revises: f2b8d4a6c391
+Create Date: 2026-10-18 23:00:00.000000
+
+invoices.updated_at, stamped by the app on every insert and update and
+indexed, so the analytics snapshot can re-read only the invoices changed
+since its last refresh. Existing rows are stamped with the migration time.
+Skipped if invoices doesn't exist yet, like the revisions before it.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d6f8b1c273'
+down_revision: Union[str, None] = 'f2b8d4a6c391'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if 'invoices' not in inspector.get_table_names():
+        return
+
+    if 'updated_at' not in {column['name'] for column in inspector.get_columns('invoices')}:
+        with op.batch_alter_table('invoices') as batch:
+            batch.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute(sa.text('UPDATE invoices SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL'))
+    op.create_index('ix_invoices_updated_at', 'invoices', ['updated_at'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_invoices_updated_at', table_name='invoices', if_exists=True)
+    with op.batch_alter_table('invoices') as batch:
+        batch.drop_column('updated_at')
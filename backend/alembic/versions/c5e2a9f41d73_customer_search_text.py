@@ -0,0 +1,75 @@
+"""customer search text
+
+Revision ID: c5e2a9f41d73
+Revises: 8b41d6e0c2a5
+Create Date: 2026-10-18 19:00:00.000000
+
+customers.search_text (lowercased name + email, phone digits) for fuzzy
+customer search, backfilled here and kept current by the app. On Postgres
+it gets a pg_trgm GIN index; SQLite searches it through an in-process index.
+Skipped if customers doesn't exist yet, like the revisions before it.
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e2a9f41d73'
+down_revision: Union[str, None] = '8b41d6e0c2a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _search_text(first_name, last_name, email, phone) -> str:
+    # Same normalization as app.utils.customer_search.customer_search_text
+    words = " ".join(part.strip().lower() for part in (first_name, last_name, email) if part)
+    digits = re.sub(r"\D", "", phone or "")
+    return f"{words} {digits}".strip()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    inspector = sa.inspect(bind)
+    if 'customers' not in inspector.get_table_names():
+        return
+
+    if 'search_text' not in {column['name'] for column in inspector.get_columns('customers')}:
+        with op.batch_alter_table('customers') as batch:
+            batch.add_column(sa.Column('search_text', sa.Text(), nullable=True))
+
+    customers = sa.table(
+        'customers',
+        sa.column('id'), sa.column('first_name'), sa.column('last_name'),
+        sa.column('email'), sa.column('phone'), sa.column('search_text'),
+    )
+    rows = bind.execute(sa.select(customers.c.id, customers.c.first_name, customers.c.last_name, customers.c.email, customers.c.phone)).all()
+    if rows:
+        bind.execute(
+            customers.update().where(customers.c.id == sa.bindparam('row_id')).values(search_text=sa.bindparam('row_text')),
+            [{'row_id': row.id, 'row_text': _search_text(row.first_name, row.last_name, row.email, row.phone)} for row in rows],
+        )
+
+    if bind.dialect.name == 'postgresql':
+        op.create_index(
+            'ix_customers_search_text_trgm',
+            'customers',
+            ['search_text'],
+            if_not_exists=True,
+            postgresql_using='gin',
+            postgresql_ops={'search_text': 'gin_trgm_ops'},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_customers_search_text_trgm', table_name='customers', if_exists=True)
+    with op.batch_alter_table('customers') as batch:
+        batch.drop_column('search_text')
@@ -0,0 +1,39 @@
+"""job heartbeat
+
+Revision ID: d81c5b3e9f02
+Revises: a4d6f8b1c273
+Create Date: 2026-10-18 23:30:00.000000
+
+jobs.heartbeat_at, refreshed by the worker while a job runs, so the stale
+job sweep only takes over jobs whose worker is gone rather than every job
+running longer than the stale window. Rows already running fall back to
+started_at. Skipped if jobs doesn't exist yet, like the revisions before it.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81c5b3e9f02'
+down_revision: Union[str, None] = 'a4d6f8b1c273'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if 'jobs' not in inspector.get_table_names():
+        return
+
+    if 'heartbeat_at' not in {column['name'] for column in inspector.get_columns('jobs')}:
+        with op.batch_alter_table('jobs') as batch:
+            batch.add_column(sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('jobs') as batch:
+        batch.drop_column('heartbeat_at')
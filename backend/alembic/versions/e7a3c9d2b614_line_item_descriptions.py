@@ -0,0 +1,84 @@
+"""line item descriptions
+
+Revision ID: e7a3c9d2b614
+Revises: c5e2a9f41d73
+Create Date: 2026-10-18 21:00:00.000000
+
+line_item_descriptions: one row per distinct normalized line item
+description with its use count, last use and recent unit prices, backing
+the autocomplete endpoints. Backfilled here from line_items and kept
+current by the app. Skipped if line_items doesn't exist yet, like the
+revisions before it.
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3c9d2b614'
+down_revision: Union[str, None] = 'c5e2a9f41d73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same as app.utils.autocomplete.PRICE_SAMPLES
+PRICE_SAMPLES = 25
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    tables = sa.inspect(bind).get_table_names()
+    if 'line_items' not in tables or 'invoices' not in tables:
+        return
+
+    if 'line_item_descriptions' not in tables:
+        op.create_table(
+            'line_item_descriptions',
+            sa.Column('key', sa.String(), primary_key=True),
+            sa.Column('description', sa.String(), nullable=False),
+            sa.Column('use_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('last_used_at', sa.DateTime(), nullable=True),
+            sa.Column('last_unit_price', sa.Float(), nullable=True),
+            sa.Column('recent_prices', sa.JSON(), nullable=False),
+        )
+
+    line_items = sa.table('line_items', sa.column('id'), sa.column('invoice_id'), sa.column('description'), sa.column('unit_price'))
+    invoices = sa.table('invoices', sa.column('id'), sa.column('date', sa.Date()))
+    rows = bind.execute(
+        sa.select(line_items.c.description, line_items.c.unit_price, invoices.c.date)
+        .join(invoices, invoices.c.id == line_items.c.invoice_id)
+        .order_by(line_items.c.id)
+    )
+
+    # Same normalization and stats as app.utils.autocomplete.rebuild_description_stats
+    stats = {}
+    for description, unit_price, used_on in rows:
+        key = " ".join((description or "").lower().split())
+        if not key:
+            continue
+        entry = stats.setdefault(key, {'key': key, 'use_count': 0, 'last_used_at': None, 'last_unit_price': None, 'recent_prices': []})
+        entry['description'] = " ".join(description.split())
+        entry['use_count'] += 1
+        if used_on is not None:
+            used_at = datetime(used_on.year, used_on.month, used_on.day)
+            entry['last_used_at'] = max(entry['last_used_at'] or used_at, used_at)
+        if unit_price is not None:
+            entry['last_unit_price'] = unit_price
+            entry['recent_prices'] = (entry['recent_prices'] + [unit_price])[-PRICE_SAMPLES:]
+
+    descriptions = sa.table(
+        'line_item_descriptions',
+        sa.column('key'), sa.column('description'), sa.column('use_count'),
+        sa.column('last_used_at'), sa.column('last_unit_price'), sa.column('recent_prices', sa.JSON()),
+    )
+    bind.execute(descriptions.delete())
+    if stats:
+        bind.execute(descriptions.insert(), list(stats.values()))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('line_item_descriptions')
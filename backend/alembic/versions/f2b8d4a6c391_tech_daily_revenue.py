@@ -0,0 +1,72 @@
+"""tech daily revenue rollup
+
+Revision ID: f2b8d4a6c391
+Revises: e7a3c9d2b614
+Create Date: 2026-10-18 22:00:00.000000
+
+tech_daily_revenue: invoice count and final_total sum per (tech, day,
+status, is_estimate), backing the tech summary report. Backfilled here with
+one INSERT ... SELECT and kept current by the app. Skipped if invoices
+doesn't exist yet, like the revisions before it.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d4a6c391'
+down_revision: Union[str, None] = 'e7a3c9d2b614'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    tables = sa.inspect(bind).get_table_names()
+    if 'invoices' not in tables or 'users' not in tables:
+        return
+
+    if 'tech_daily_revenue' not in tables:
+        op.create_table(
+            'tech_daily_revenue',
+            sa.Column('tech_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('day', sa.Date(), primary_key=True),
+            sa.Column('status', sa.String(), primary_key=True),
+            sa.Column('is_estimate', sa.Boolean(), primary_key=True),
+            sa.Column('invoice_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('final_total', sa.Float(), nullable=False, server_default='0'),
+        )
+
+    invoices = sa.table(
+        'invoices',
+        sa.column('tech_id'), sa.column('date'), sa.column('status'),
+        sa.column('is_estimate', sa.Boolean()), sa.column('final_total'),
+    )
+    rollup = sa.table(
+        'tech_daily_revenue',
+        sa.column('tech_id'), sa.column('day'), sa.column('status'),
+        sa.column('is_estimate'), sa.column('invoice_count'), sa.column('final_total'),
+    )
+    # Same buckets as app.utils.rollups.rollup_key
+    status = sa.func.coalesce(invoices.c.status, '')
+    is_estimate = sa.func.coalesce(invoices.c.is_estimate, sa.false())
+    bind.execute(rollup.delete())
+    bind.execute(
+        rollup.insert().from_select(
+            ['tech_id', 'day', 'status', 'is_estimate', 'invoice_count', 'final_total'],
+            sa.select(
+                invoices.c.tech_id, invoices.c.date, status, is_estimate,
+                sa.func.count(), sa.func.coalesce(sa.func.sum(invoices.c.final_total), 0),
+            )
+            .where(invoices.c.tech_id.isnot(None), invoices.c.date.isnot(None))
+            .group_by(invoices.c.tech_id, invoices.c.date, status, is_estimate),
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('tech_daily_revenue')
@@ -0,0 +1,316 @@
+# backend/app/jobs.py
+import os
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+from app.pdf import generate_invoice_pdf_from_html
+from app.utils.email import send_public_invoice_email, send_resend_email, send_review_request_email
+from app.utils.invoice import invoice_pdf_args, invoice_read_query
+from app.utils.outbox import email_outbox_worker
+from app.utils.statements import run_statements
+from app.utils.tokens import get_or_create_public_token
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 1))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_BACKOFF_SECONDS = int(os.getenv("JOB_BACKOFF_SECONDS", 10))
+# Running jobs refresh heartbeat_at this often, however long the handler takes
+JOB_HEARTBEAT_SECONDS = int(os.getenv("JOB_HEARTBEAT_SECONDS", 30))
+# Running jobs with no heartbeat for this long lost their worker to a restart and run again
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", 300))
+# How often the workers look for such jobs, so ones orphaned shortly before a restart still get picked up
+JOB_SWEEP_SECONDS = int(os.getenv("JOB_SWEEP_SECONDS", 60))
+
+BASE_PUBLIC_URL = os.getenv("PUBLIC_FRONTEND_URL", "https://192.168.1.187:3000")
+
+JOB_HANDLERS = {}
+# Kinds that must not run twice, e.g. because they send mail as they go
+JOB_NO_RETRY = set()
+
+
+def job_handler(kind: str, retry: bool = True):
+    def register(fn):
+        JOB_HANDLERS[kind] = fn
+        if not retry:
+            JOB_NO_RETRY.add(kind)
+        return fn
+    return register
+
+
+def enqueue_job(db: Session, kind: str, payload: dict, run_after: datetime | None = None) -> models.Job:
+    """Add a job to the caller's transaction; it becomes visible to workers on commit."""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    job = models.Job(
+        id=str(uuid.uuid4()),
+        kind=kind,
+        payload=payload,
+        status="queued",
+        progress="queued",
+        run_after=run_after or datetime.utcnow(),
+    )
+    db.add(job)
+    job_worker.wake()
+    return job
+
+
+def job_accepted(job: models.Job) -> dict:
+    """Body for the 202 response of an endpoint that hands its work to a job."""
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
+
+
+class JobContext:
+    """Handed to handlers so they can report progress while they run."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+
+    def progress(self, message: str):
+        # Own session so progress is visible while the handler's work is uncommitted
+        db = SessionLocal()
+        try:
+            db.query(models.Job).filter(models.Job.id == self.job_id).update(
+                {"progress": message, "heartbeat_at": datetime.utcnow()}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+
+class JobWorker:
+    """Background threads that run queued jobs from the jobs table."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._threads = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        # SKIP LOCKED keeps processes apart on Postgres; this covers threads on SQLite
+        self._claim_lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def start(self):
+        if self._threads or self.workers <= 0:
+            return
+        self._stop.clear()
+        self._next_sweep = 0.0
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"🧵 Job worker started with {self.workers} thread(s)")
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout=10)
+        self._threads = []
+
+    def wake(self):
+        self._wake.set()
+
+    def _sweep_if_due(self):
+        # One thread sweeps per interval; the first loop of the first thread sweeps at startup
+        with self._sweep_lock:
+            if time.monotonic() < self._next_sweep:
+                return
+            self._next_sweep = time.monotonic() + JOB_SWEEP_SECONDS
+        self._requeue_stale()
+
+    def _requeue_stale(self):
+        db = SessionLocal()
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+            # Rows claimed before heartbeat_at existed fall back to started_at
+            stale = db.query(models.Job).filter(
+                models.Job.status == "running",
+                func.coalesce(models.Job.heartbeat_at, models.Job.started_at) < cutoff,
+            )
+            stale.filter(models.Job.kind.notin_(JOB_NO_RETRY)).update(
+                {"status": "queued", "progress": "requeued after stalling"}, synchronize_session=False
+            )
+            stale.filter(models.Job.kind.in_(JOB_NO_RETRY)).update(
+                {"status": "failed", "progress": "failed", "error": "Interrupted by a restart", "finished_at": datetime.utcnow()},
+                synchronize_session=False,
+            )
+            db.commit()
+        except Exception as e:
+            print(f"❌ Job requeue failed: {e}")
+        finally:
+            db.close()
+
+    def _claim(self) -> tuple[str, str, dict] | None:
+        with self._claim_lock:
+            db = SessionLocal()
+            try:
+                job = (
+                    db.query(models.Job)
+                    .filter(models.Job.status == "queued", models.Job.run_after <= datetime.utcnow())
+                    .order_by(models.Job.run_after, models.Job.created_at)
+                    .with_for_update(skip_locked=True)
+                    .first()
+                )
+                if not job:
+                    return None
+                job.status = "running"
+                job.progress = "started"
+                job.attempts += 1
+                job.started_at = job.heartbeat_at = datetime.utcnow()
+                claimed = (job.id, job.kind, dict(job.payload or {}))
+                db.commit()
+                return claimed
+            finally:
+                db.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sweep_if_due()
+            try:
+                claimed = self._claim()
+            except Exception as e:
+                print(f"❌ Job claim failed: {e}")
+                claimed = None
+
+            if claimed is None:
+                self._wake.wait(JOB_POLL_SECONDS)
+                self._wake.clear()
+                continue
+
+            self._execute(*claimed)
+
+    def _heartbeat(self, job_id: str, done: threading.Event):
+        while not done.wait(JOB_HEARTBEAT_SECONDS):
+            db = SessionLocal()
+            try:
+                db.query(models.Job).filter(models.Job.id == job_id, models.Job.status == "running").update(
+                    {"heartbeat_at": datetime.utcnow()}, synchronize_session=False
+                )
+                db.commit()
+            except Exception as e:
+                print(f"❌ Job {job_id} heartbeat failed: {e}")
+            finally:
+                db.close()
+
+    def _execute(self, job_id: str, kind: str, payload: dict):
+        done = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(job_id, done), name=f"job-heartbeat-{job_id[:8]}", daemon=True).start()
+        db = SessionLocal()
+        try:
+            result = JOB_HANDLERS[kind](JobContext(job_id), db, payload)
+            # Emails the handler queued commit with its work, so a failed or retried job never sends twice
+            db.commit()
+            email_outbox_worker.wake()
+            self._finish(job_id, status="succeeded", progress="done", result=result, error=None)
+        except Exception as e:
+            db.rollback()
+            print(f"❌ Job {job_id} ({kind}) failed: {e}")
+            self._fail(job_id, e)
+        finally:
+            done.set()
+            db.close()
+
+    def _finish(self, job_id: str, **fields):
+        # Only while still running: a job the sweep already requeued or failed keeps that outcome
+        db = SessionLocal()
+        try:
+            finished = db.query(models.Job).filter(models.Job.id == job_id, models.Job.status == "running").update(
+                {**fields, "finished_at": datetime.utcnow()}, synchronize_session=False
+            )
+            db.commit()
+            if not finished:
+                print(f"⚠️ Job {job_id} finished after the sweep took it over; its status was left alone")
+        finally:
+            db.close()
+
+    def _fail(self, job_id: str, error: Exception):
+        db = SessionLocal()
+        try:
+            job = db.get(models.Job, job_id)
+            if job.status != "running":
+                print(f"⚠️ Job {job_id} failed after the sweep took it over; its status was left alone")
+                return
+            job.error = "".join(traceback.format_exception_only(type(error), error)).strip()
+            if job.attempts >= JOB_MAX_ATTEMPTS or job.kind in JOB_NO_RETRY:
+                job.status = "failed"
+                job.progress = "failed"
+                job.finished_at = datetime.utcnow()
+            else:
+                delay = JOB_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+                job.status = "queued"
+                job.progress = f"retrying in {delay}s"
+                job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+            db.commit()
+        finally:
+            db.close()
+
+
+job_worker = JobWorker(JOB_WORKERS)
+
+
+# --- Handlers ---
+
+def _load_invoice(db: Session, invoice_id: int) -> models.Invoice:
+    invoice = invoice_read_query(db).filter(models.Invoice.id == invoice_id).first()
+    if not invoice:
+        raise LookupError(f"Invoice {invoice_id} not found")
+    return invoice
+
+
+@job_handler("invoice_resend")
+def run_invoice_resend(job: JobContext, db: Session, payload: dict):
+    invoice = _load_invoice(db, payload["invoice_id"])
+    job.progress("rendering PDF")
+    pdf_bytes = generate_invoice_pdf_from_html(**invoice_pdf_args(invoice))
+    job.progress("queueing email")
+    send_resend_email(invoice, pdf_bytes, db=db)
+    return {"invoice_id": invoice.id, "to": invoice.customer.email}
+
+
+@job_handler("invoice_review_request")
+def run_invoice_review_request(job: JobContext, db: Session, payload: dict):
+    invoice = _load_invoice(db, payload["invoice_id"])
+    public_token = get_or_create_public_token(invoice.id, db, expires_in_hours=None)
+    public_url = f"{BASE_PUBLIC_URL}/public/invoice/{public_token}"
+    job.progress("rendering PDF")
+    pdf_bytes = generate_invoice_pdf_from_html(**invoice_pdf_args(invoice))
+    job.progress("queueing email")
+    send_review_request_email(invoice, public_url, pdf_bytes, db=db)
+    return {"invoice_id": invoice.id, "to": invoice.customer.email, "public_url": public_url}
+
+
+@job_handler("invoice_signed_copy")
+def run_invoice_signed_copy(job: JobContext, db: Session, payload: dict):
+    invoice = _load_invoice(db, payload["invoice_id"])
+    job.progress("rendering PDF")
+    pdf_bytes = generate_invoice_pdf_from_html(**invoice_pdf_args(invoice))
+    job.progress("queueing email")
+    send_public_invoice_email(invoice, db, pdf_bytes)
+    return {"invoice_id": invoice.id, "to": invoice.customer.email}
+
+
+@job_handler("statement_run", retry=False)
+def run_statement_run(job: JobContext, db: Session, payload: dict):
+    summary = run_statements(
+        db,
+        dry_run=payload.get("dry_run", False),
+        messages_per_second=payload.get("messages_per_second", 1.0),
+        customer_ids=payload.get("customer_ids"),
+        progress=job.progress,
+    )
+    print(
+        f"📄 Statement run{' (dry run)' if summary['dry_run'] else ''}: {summary['customers']} customers, "
+        f"{summary['rendered']} rendered, {summary['queued']} queued, {len(summary['failed'])} failed "
+        f"in {summary['timings_ms']['total']}ms"
+    )
+    return summary
@@ -19,10 +19,16 @@ from app.routes import (
     public,
     auth,
     reports,
+    jobs,
 )
 from app.routes import backup
-from app.utils.auth import verify_token
+from app.middleware.auth import AuthMiddleware
+from app.utils.pagination import NEXT_CURSOR_HEADER
 from app.db_init import create_db, seed_admin
+from app.utils.render_pool import pdf_render_pool
+from app.utils.outbox import email_outbox_worker
+from app.jobs import job_worker
+from app.utils.analytics import invoice_facts
 
 load_dotenv()
 
@@ -43,27 +49,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Secure all non-public routes
-@app.middleware("http")
-async def secure_routes(request: Request, call_next):
-    if request.method == "OPTIONS":
-        return await call_next(request)  # allow preflight
-
-    if request.url.path.startswith("/public/") or request.url.path.startswith("/auth"):
-        return await call_next(request)
-
-    auth_header = request.headers.get("authorization")  # lowercase-safe access
-
-    if not auth_header or not auth_header.startswith("Bearer "):
-        return JSONResponse(status_code=401, content={"detail": "Not authenticated"})
-
-    token = auth_header.split("Bearer ")[1]
-    if not verify_token(token):
-        return JSONResponse(status_code=403, content={"detail": "Invalid token"})
-
-    return await call_next(request)
+app.add_middleware(AuthMiddleware)
 
 # Routes
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
@@ -77,6 +67,7 @@ app.include_router(line_items.router)
 app.include_router(public.router)
 app.include_router(reports.router, prefix="/reports", tags=["Reports"])
 app.include_router(backup.router, prefix="/admin", tags=["Backup"]) 
+app.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
 
 # Error handling
 @app.exception_handler(RequestValidationError)
@@ -104,3 +95,13 @@ def startup():
         print("⏭️ Skipping create_db() in reload supervisor process")
     # Schedule background task AFTER app starts up
     threading.Thread(target=post_startup_seed, daemon=True).start()
+    pdf_render_pool.warm_up()
+    email_outbox_worker.start()
+    job_worker.start()
+    invoice_facts.warm_up()
+
+@app.on_event("shutdown")
+def shutdown():
+    job_worker.stop()
+    email_outbox_worker.stop()
+    pdf_render_pool.shutdown()
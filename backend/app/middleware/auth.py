@@ -0,0 +1,45 @@
+# backend/app/middleware/auth.py
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils.auth import resolve_principal_async
+
+PUBLIC_PATH_PREFIXES = ("/public/", "/auth")
+
+
+class AuthMiddleware:
+    """Reject non-public requests without a valid Bearer token.
+
+    A plain ASGI middleware: allowed requests are passed through untouched, so
+    streaming and file responses are never buffered or wrapped. The resolved
+    Principal goes into the request state for the verify_token dependency.
+    """
+
+    def __init__(self, app: ASGIApp, public_prefixes: tuple[str, ...] = PUBLIC_PATH_PREFIXES):
+        self.app = app
+        self.public_prefixes = public_prefixes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"].startswith(self.public_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        auth_header = ""
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                auth_header = value.decode("latin-1")
+                break
+
+        if not auth_header.startswith("Bearer "):
+            await JSONResponse(status_code=401, content={"detail": "Not authenticated"})(scope, receive, send)
+            return
+
+        try:
+            principal = await resolve_principal_async(auth_header[len("Bearer "):])
+        except HTTPException as e:
+            await JSONResponse(status_code=e.status_code, content={"detail": e.detail})(scope, receive, send)
+            return
+
+        scope.setdefault("state", {})["principal"] = principal
+        await self.app(scope, receive, send)
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text, Date, Boolean
-from sqlalchemy.orm import relationship
-from datetime import  date
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text, Date, Boolean, LargeBinary, JSON, Index, text, event, DDL
+from sqlalchemy.orm import relationship, deferred
+from datetime import  date, datetime
 from app.database import Base
 
 class Customer(Base):
@@ -17,7 +17,30 @@ class Customer(Base):
     zipcode = Column(String, nullable=True)
     referral_source = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
-    invoices = relationship("Invoice", back_populates="customer", passive_deletes=True)
+    # Maintained on every invoice write (app/utils/balances.py); rebuild with python -m app.utils.balances
+    open_balance = Column(Float, default=0.0, server_default="0", nullable=False)
+    invoice_count = Column(Integer, default=0, server_default="0", nullable=False)
+    # Lowercased name + email and phone digits for search (app/utils/customer_search.py)
+    search_text = Column(Text, nullable=True)
+    # Deleted through the ORM, not left to ON DELETE CASCADE, so the invoice write hooks
+    # (balances, tech rollup, autocomplete counts, report caches) see them go
+    invoices = relationship("Invoice", back_populates="customer", cascade="save-update, merge, delete")
+
+    __table_args__ = (
+        Index(
+            "ix_customers_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+# The trigram index above needs the extension before the table is created
+event.listen(
+    Customer.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
 class Invoice(Base):
     __tablename__ = "invoices"
 
@@ -37,11 +60,12 @@ class Invoice(Base):
 
     signed_at = Column(DateTime, nullable=True)
     accepted = Column(Boolean, default=False)
-    signature_base64 = Column(Text, nullable=True)
+    # Signatures are PNG data URIs (20-200 KB); only load them when asked for
+    signature_base64 = deferred(Column(Text, nullable=True), group="signatures")
 
     estimate_signed_at = Column(DateTime, nullable=True)
     estimate_accepted = Column(String, nullable=True)
-    estimate_signature_base64 = Column(Text, nullable=True)
+    estimate_signature_base64 = deferred(Column(Text, nullable=True), group="signatures")
 
     testimonial = Column(Text, nullable=True)
 
@@ -53,14 +77,33 @@ class Invoice(Base):
     tech_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     media_folder_url = Column(String, nullable=True)
 
-    otp_code = Column(String, nullable=True)
-    otp_expiry = Column(DateTime, nullable=True)
+    # High-water mark for incremental readers such as the analytics snapshot
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True, index=True)
+
+    otp_code = deferred(Column(String, nullable=True), group="otp")
+    otp_expiry = deferred(Column(DateTime, nullable=True), group="otp")
 
     customer = relationship("Customer", back_populates="invoices", passive_deletes=True)
     items = relationship("LineItem", back_populates="invoice", cascade="all, delete-orphan")
     public_tokens = relationship("PublicToken", back_populates="invoice", cascade="all, delete-orphan")
     tech = relationship("User", back_populates="invoices")
 
+    __table_args__ = (
+        # Invoice list filters + date sort, and the (date, id) keyset for the default order
+        Index("ix_invoices_date_id", "date", "id"),
+        Index("ix_invoices_customer_id_date", "customer_id", "date"),
+        Index("ix_invoices_tech_id_date", "tech_id", "date"),
+        Index("ix_invoices_status_date", "status", "date"),
+        # Open balances (customer list totals, statements) read only this slice
+        Index(
+            "ix_invoices_open_balance",
+            "customer_id",
+            "final_total",
+            postgresql_where=text("status != 'paid' AND is_estimate = false AND is_active = true"),
+            sqlite_where=text("status != 'paid' AND is_estimate = 0 AND is_active = 1"),
+        ),
+    )
+
 class InvoiceAccessToken(Base):
     __tablename__ = "invoice_access_tokens"
     id = Column(Integer, primary_key=True)
@@ -72,12 +115,23 @@ class LineItem(Base):
     __tablename__ = "line_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    invoice_id = Column(Integer, ForeignKey("invoices.id", ondelete="CASCADE"))
+    invoice_id = Column(Integer, ForeignKey("invoices.id", ondelete="CASCADE"), index=True)
     description = Column(String)
     quantity = Column(Integer)
     unit_price = Column(Float)
 
     invoice = relationship("Invoice", back_populates="items", passive_deletes=True)
+
+class LineItemDescription(Base):
+    # One row per distinct description, kept current by app.utils.autocomplete
+    __tablename__ = "line_item_descriptions"
+    key = Column(String, primary_key=True)  # lowercased, whitespace-collapsed description
+    description = Column(String, nullable=False)  # most recently used spelling
+    use_count = Column(Integer, default=0, nullable=False)  # line items currently using it
+    last_used_at = Column(DateTime, nullable=True)
+    last_unit_price = Column(Float, nullable=True)
+    recent_prices = Column(JSON, nullable=False, default=list)  # newest last, capped
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True)
@@ -88,11 +142,59 @@ class User(Base):
     is_admin = Column(Boolean, default=True)
 
     invoices = relationship("Invoice", back_populates="tech")
+
+class TechDailyRevenue(Base):
+    # Invoice counts/sums per tech per day, kept current by app.utils.rollups
+    __tablename__ = "tech_daily_revenue"
+    tech_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    status = Column(String, primary_key=True)  # "" for invoices without a status
+    is_estimate = Column(Boolean, primary_key=True)
+    invoice_count = Column(Integer, default=0, nullable=False)
+    final_total = Column(Float, default=0.0, nullable=False)
+
+class DocumentCounter(Base):
+    __tablename__ = "document_counters"
+    prefix = Column(String, primary_key=True)  # e.g. INV-20250501-
+    last_value = Column(Integer, default=0, nullable=False)
+
 class PublicToken(Base):
     __tablename__ = "public_tokens"
     id = Column(Integer, primary_key=True)
     token = Column(String, unique=True, nullable=False)
-    invoice_id = Column(Integer, ForeignKey("invoices.id", ondelete="CASCADE"), nullable=False)
+    invoice_id = Column(Integer, ForeignKey("invoices.id", ondelete="CASCADE"), nullable=False, index=True)
     expires_at = Column(DateTime)
 
-    invoice = relationship("Invoice", back_populates="public_tokens")
\ No newline at end of file
+    invoice = relationship("Invoice", back_populates="public_tokens")
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    id = Column(Integer, primary_key=True, index=True)
+    mail_from = Column(String, nullable=False)
+    recipients = Column(Text, nullable=False)  # comma-separated, Bcc included
+    subject = Column(String, nullable=True)
+    message = Column(LargeBinary, nullable=False)  # fully rendered MIME message
+
+    status = Column(String, default="queued", nullable=False, index=True)  # queued, sending, sent, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+
+class Job(Base):
+    __tablename__ = "jobs"
+    id = Column(String, primary_key=True)  # uuid4, safe to hand to clients
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+
+    status = Column(String, default="queued", nullable=False, index=True)  # queued, running, succeeded, failed
+    progress = Column(String, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)  # refreshed while running; stale ones are swept
+    finished_at = Column(DateTime, nullable=True)
@@ -1,183 +1,133 @@
 # backend/app/pdf.py
-from weasyprint import HTML
+from concurrent.futures import Future
+from hashlib import md5
 from pathlib import Path
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from weasyprint import CSS, HTML, default_url_fetcher
+from weasyprint.text.fonts import FontConfiguration
+from app.utils import pdf_cache
+from app.utils.render_pool import pdf_render_pool
+
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+BASE_URL = str(TEMPLATE_DIR) + "/"
+
+# Compiled once at import; autoescape covers every customer-supplied field
+_jinja_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(["html"]),
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
+_invoice_template = _jinja_env.get_template("invoice.html")
+_statement_template = _jinja_env.get_template("statement.html")
+
+# Per-process render state, built lazily so only render workers pay for it
+_font_config = None
+_stylesheet = None
+_asset_bytes = {}
+
+
+# Decoded logo / stamp images shared by every render in this process
+_ASSET_URLS = {(TEMPLATE_DIR / name).as_uri() for name in ("zuper_blue.png", "paid-stamp.png")}
+_ASSET_IMAGE_IDS = {md5(url.encode(), usedforsecurity=False).hexdigest() for url in _ASSET_URLS}
+_shared_images = {}
+
+
+class _RenderImageCache(dict):
+    """Per-render WeasyPrint image cache seeded with the shared asset images.
+
+    Signatures are data: URIs unique to each invoice, so they stay in this
+    render's cache and are freed with it instead of growing the shared one.
+    """
+
+    def __init__(self):
+        super().__init__(_shared_images)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        if key in _ASSET_URLS or key.split("-", 1)[0] in _ASSET_IMAGE_IDS:
+            _shared_images[key] = value
+
+
+def _cached_url_fetcher(url, *args, **kwargs):
+    # Logo and paid stamp are read from disk once per worker, then served from memory
+    if not url.startswith("file://"):
+        return default_url_fetcher(url, *args, **kwargs)
+
+    cached = _asset_bytes.get(url)
+    if cached is None:
+        result = default_url_fetcher(url, *args, **kwargs)
+        if "file_obj" in result:
+            with result.pop("file_obj") as f:
+                result["string"] = f.read()
+        cached = _asset_bytes[url] = result
+    return dict(cached)
+
+
+def _get_render_state():
+    global _font_config, _stylesheet
+    if _stylesheet is None:
+        _font_config = FontConfiguration()
+        _stylesheet = CSS(
+            filename=str(TEMPLATE_DIR / "invoice.css"),
+            base_url=BASE_URL,
+            url_fetcher=_cached_url_fetcher,
+            font_config=_font_config,
+        )
+    return _font_config, _stylesheet
+
+def warm_up_renderer():
+    """Load fonts, the stylesheet and the asset images before the first real render."""
+    layout_invoice_html('<img src="zuper_blue.png" /><div class="paid-stamp"></div>').write_pdf()
 
 def generate_invoice_pdf_from_html(invoice_data: dict, signature_base64: str = "", signed_at: str = "", accepted: bool = False, doc_type: str = "Invoice"):
-    template_path = Path(__file__).parent / "templates"
-    logo_path = str(template_path / "zuper_blue.png")
-    paid_stamp_path = str(template_path / "paid-stamp.png")
-
-    html = f"""
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <style>
-            @page {{
-                margin: 1in;
-                @bottom-center {{
-                    content: "Page " counter(page) " of " counter(pages);
-                    font-size: 0.8em;
-                    color: #999;
-                }}
-            }}
-            body {{
-                font-family: sans-serif;
-                font-size: 13px;
-                max-width: 800px;
-                margin: auto;
-                position: relative;
-            }}
-            .header {{
-                display: flex;
-                justify-content: space-between;
-                align-items: flex-start;
-                margin-bottom: 15px;
-            }}
-            .logo {{
-                height: 60px;
-            }}
-            .company-details {{
-                text-align: right;
-                font-size: 0.85em;
-            }}
-            .invoice-meta {{
-                display: flex;
-                justify-content: space-between;
-                margin-top: 10px;
-                gap: 20px;
-            }}
-            .meta-left, .meta-right {{
-                width: 50%;
-                font-size: 0.95em;
-            }}
-            .meta-right {{
-                text-align: right;
-            }}
-            .section {{
-                margin-top: 1.2em;
-            }}
-            table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin-top: 1em;
-                font-size: 0.9em;
-            }}
-            th, td {{
-                border: 1px solid #ccc;
-                padding: 6px;
-                text-align: left;
-            }}
-
-            .paid-stamp {{
-                position: fixed;
-                top: 30%;
-                left: 20%;
-                width: 60%;
-                height: 40%;
-                text-align: center;
-                background-image: url("file://{paid_stamp_path}");
-                background-size: contain;
-                background-repeat: no-repeat;
-                background-position: center;
-                opacity: 0.25;
-                transform: rotate(-20deg);
-                z-index: 1;
-            }}
-            .paid-date {{
-                position: fixed;
-                top: 56%;
-                left: 56%;
-                transform: translateX(-50%) rotate(-40deg);
-                font-size: 22px;
-                font-weight: bold;
-                color: red;
-                opacity: 0.35;
-                z-index: 2;
-            }}
-        </style>
-    </head>
-    <body>
-        {f'<div class="paid-stamp"></div><div class="paid-date">{invoice_data["paid_at"].strftime("%m-%d-%Y")}</div>' if invoice_data.get("paid_at") else ''}
-
-        <div class="header">
-            <img src="file://{logo_path}" class="logo" />
-            <div class="company-details">
-                <strong>Zuper Handy Services</strong><br />
-                3907 Cleveland St.<br />
-                Skokie IL. 60076<br />
-                (847) 271-1468<br />
-                billing@zuperhandy.com
-            </div>
-        </div>
-
-        <div class="invoice-meta">
-            <div class="meta-left">
-                <strong>{doc_type} #:</strong> {invoice_data["number"]}<br />
-                <strong>Date:</strong> {invoice_data["date"].strftime("%-m/%-d/%Y")}<br />
-                <strong>Status:</strong> {invoice_data["status"]}<br />
-                <strong>Payment Type:</strong> {invoice_data.get("payment_type", "N/A")}
-            </div>
-            <div class="meta-right">
-                <strong>Customer:</strong><br />
-                {invoice_data["customer"]["first_name"]} {invoice_data["customer"]["last_name"]}<br />
-                {invoice_data["customer"]["street"]}<br />
-                {invoice_data["customer"]["city"]}, {invoice_data["customer"]["state"]} {invoice_data["customer"].get("zipcode", "")}<br />
-                {invoice_data["customer"].get("phone", "")}<br />
-                {invoice_data["customer"].get("email", "")}
-            </div>
-        </div>
-
-        <div class="section">
-            <strong>Items:</strong>
-            <table>
-                <tr><th>Description</th><th>Qty</th><th>Unit Price</th><th>Total</th></tr>
-                {''.join(f"<tr><td>{item['description']}</td><td>{item['quantity']}</td><td>${item['unit_price']:.2f}</td><td>${item['quantity'] * item['unit_price']:.2f}</td></tr>" for item in invoice_data["items"])}
-            </table>
-        </div>
-
-        <div class="section" style="text-align: right;">
-            Subtotal: ${invoice_data["total"]:.2f}<br />
-            Discount: -${invoice_data.get("discount", 0):.2f}<br />
-            Tax: {invoice_data.get("tax", 0):.2f}%<br />
-            <strong>Total Due: ${invoice_data["final_total"]:.2f}</strong>
-        </div>
-        {f'''
-        <div class="section">
-            <strong>Notes:</strong><br />
-            <p>{invoice_data['notes']}</p>
-        </div>
-        ''' if invoice_data.get("notes") else ""}
-        <div class="section">
-            <strong>Customer Signature:</strong><br />
-            {f'''
-            <img src="{signature_base64}" style="height:80px;" /><br />
-            <em>Signed and accepted on {signed_at} UTC</em><br />
-            <span style="font-size: 11px; color: #555;">
-                {"By signing, you accept the proposed estimate and agree to our terms." if doc_type == "Estimate" else "By signing, you acknowledge work completion and accept our terms."}
-                <br />
-                View terms: <a href="https://zuperhandy.com/terms.html">zuperhandy.com/terms.html</a>
-            </span>
-            ''' if accepted and signature_base64 else '''
-            <div style="height: 80px; border-bottom: 1px solid #000; width: 300px;"></div>
-            <span style="font-size: 12px;">(Sign here)</span><br />
-            <span style="font-size: 11px; color: #555;">
-                By signing, you confirm the work was completed and accept our
-                <a href="https://zuperhandy.com/terms.html">Terms & Conditions</a>.
-            </span>
-        '''}
-        </div>
-
-""" + (
-        f'''
-        <blockquote style="margin-top: 2em; font-style: italic; border-left: 4px solid #ccc; padding-left: 1em;">
-            {invoice_data['testimonial']}
-            <br />
-            &mdash; {invoice_data['customer']['first_name']}
-        </blockquote>
-        ''' if accepted and invoice_data.get("testimonial") else ""
-    ) + """
-</body>
-</html>
-"""
-
-    return HTML(string=html, base_url=str(template_path)).write_pdf()
+    future = submit_invoice_pdf(invoice_data, signature_base64, signed_at, accepted, doc_type)
+    return pdf_render_pool.result(future)
+
+def submit_invoice_pdf(invoice_data: dict, signature_base64: str = "", signed_at: str = "", accepted: bool = False, doc_type: str = "Invoice", block: bool = False) -> Future:
+    # Unchanged invoices are served from the render cache instead of re-running WeasyPrint
+    invoice_id = invoice_data.get("id")
+    key = pdf_cache.cache_key(invoice_data, signature_base64, signed_at, accepted, doc_type)
+    cached = pdf_cache.get(invoice_id, key)
+    if cached is not None:
+        future = Future()
+        future.set_result(cached)
+        return future
+
+    # Layout runs in a warm worker process so it never holds the GIL of the API process
+    future = pdf_render_pool.submit(render_invoice_pdf, invoice_data, signature_base64, signed_at, accepted, doc_type, block=block)
+
+    def store(done: Future):
+        if not done.cancelled() and done.exception() is None:
+            pdf_cache.put(invoice_id, key, done.result())
+
+    future.add_done_callback(store)
+    return future
+
+def build_invoice_html(invoice_data: dict, signature_base64: str = "", signed_at: str = "", accepted: bool = False, doc_type: str = "Invoice") -> str:
+    return _invoice_template.render(
+        invoice=invoice_data,
+        signature_base64=signature_base64,
+        signed_at=signed_at,
+        accepted=accepted,
+        doc_type=doc_type,
+    )
+
+def layout_invoice_html(html: str):
+    font_config, stylesheet = _get_render_state()
+    return HTML(string=html, base_url=BASE_URL, url_fetcher=_cached_url_fetcher).render(
+        stylesheets=[stylesheet],
+        font_config=font_config,
+        cache=_RenderImageCache(),
+    )
+
+def render_invoice_pdf(invoice_data: dict, signature_base64: str = "", signed_at: str = "", accepted: bool = False, doc_type: str = "Invoice"):
+    html = build_invoice_html(invoice_data, signature_base64, signed_at, accepted, doc_type)
+    return layout_invoice_html(html).write_pdf()
+
+def submit_statement_pdf(statement: dict, block: bool = False) -> Future:
+    # Statements are one-off per run, so they skip the invoice render cache
+    return pdf_render_pool.submit(render_statement_pdf, statement, block=block)
+
+def render_statement_pdf(statement: dict):
+    return layout_invoice_html(_statement_template.render(statement=statement)).write_pdf()
@@ -2,7 +2,7 @@
 import datetime
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer_group
 from app.database import SessionLocal
 from app.models import Customer, Invoice, LineItem
 import json
@@ -25,7 +25,7 @@ def download_backup():
     print("Downloading backup...")
     db: Session = SessionLocal()
     customers = db.query(Customer).all()
-    invoices = db.query(Invoice).all()
+    invoices = db.query(Invoice).options(undefer_group("signatures"), undefer_group("otp")).all()
     # Only backup valid line items (attached to an invoice)
     line_items = db.query(LineItem).filter(LineItem.invoice_id.isnot(None)).all()
 
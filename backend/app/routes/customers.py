@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from app import models
 from schemas.customers import CustomerCreate, CustomerOut
 from app.database import get_db
 from app.utils.auth import verify_token
+from app.utils.pagination import NEXT_CURSOR_HEADER, paginate
+from app.utils.customer_search import search_customers
+from typing import Optional
+from app.jobs import enqueue_job, job_accepted
+from schemas.jobs import JobAccepted
 router = APIRouter()
 
 @router.post("/", response_model=CustomerOut)
@@ -22,43 +26,52 @@ def create_customer(customer: CustomerCreate, db: Session = Depends(get_db), _:
 
 @router.get("/", response_model=list[CustomerOut])
 def list_customers(
+    response: Response,
     search: str = Query("", alias="q"),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page; replaces offset (not used with q)"),
     db: Session = Depends(get_db),
     _: models.User = Depends(verify_token)
 
 ):
-    base_query = db.query(models.Customer)
-
     if search:
-        search_filter = f"%{search.lower()}%"
-        base_query = base_query.filter(
-            func.lower(models.Customer.first_name).like(search_filter) |
-            func.lower(models.Customer.last_name).like(search_filter) |
-            func.lower(models.Customer.email).like(search_filter) |
-            func.lower(models.Customer.phone).like(search_filter)
-        )
-
-    customers = base_query.offset(offset).limit(limit).all()
-
+        # Ranked by match quality, so search results page by offset only
+        customers = search_customers(db, search, limit, offset)
+    else:
+        customers, next_cursor = paginate(db.query(models.Customer), models.Customer.id, models.Customer.id, "id", "asc", limit, offset, cursor)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    # Balances are maintained on the customer row, so the page is the only query
     result = []
     for c in customers:
-        unpaid_total = db.query(func.coalesce(func.sum(models.Invoice.final_total), 0)).filter(
-            models.Invoice.customer_id == c.id,
-            models.Invoice.status != "paid",
-            models.Invoice.is_estimate == False,
-            models.Invoice.is_active == True
-        ).scalar()
-
         result.append({
             **CustomerOut.from_orm(c).dict(),
-            "total_unpaid": unpaid_total
+            "total_unpaid": c.open_balance,
         })
 
     return result
 
 
+@router.post("/statements/run", status_code=202, response_model=JobAccepted)
+def run_customer_statements(
+    dry_run: bool = Query(False, description="Render statements and report, but send nothing"),
+    messages_per_second: float = Query(1.0, gt=0, le=50),
+    customer_ids: list[int] | None = Query(None),
+    db: Session = Depends(get_db),
+    _: models.User = Depends(verify_token)
+):
+    # Month-end statements for every open balance; the summary report is the job result
+    job = enqueue_job(db, "statement_run", {
+        "dry_run": dry_run,
+        "messages_per_second": messages_per_second,
+        "customer_ids": customer_ids,
+    })
+    db.commit()
+    return job_accepted(job)
+
+
 @router.get("/{customer_id}", response_model=CustomerOut)
 def get_customer(customer_id: int, db: Session = Depends(get_db), _: models.User = Depends(verify_token) ):
     customer = db.query(models.Customer).filter(models.Customer.id == customer_id).first()
@@ -1,19 +1,25 @@
 # backend/app/routes/invoices.py
+from collections import defaultdict
 from datetime import datetime, date, timedelta
 import uuid
-from typing import Optional
+from typing import Literal, Optional
 from app.utils.auth import verify_token
-from app.utils.invoice import generate_invoice_number, generate_estimate_number
-from fastapi import APIRouter, Depends, HTTPException, Query, status, Body
+from app.utils.invoice import allocate_numbers, apply_line_items, generate_invoice_number, generate_estimate_number, invoice_read_query, invoice_summary_query, invoice_totals, link_invoice_refs, serialize_invoice
+from app.utils.pdf_export import stream_invoice_pdf_zip
+from app.utils.data_export import EXPORT_FORMATS, export_query, stream_export
+from app.utils.balances import apply_customer_deltas, invoice_balance
+from app.utils.autocomplete import record_description_usage
+from app.utils.rollups import apply_rollup_deltas, rollup_key
+from app.utils.pagination import NEXT_CURSOR_HEADER, paginate
+from app.jobs import enqueue_job, job_accepted
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status, Body
 from fastapi.responses import StreamingResponse
-from app.pdf import generate_invoice_pdf_from_html
-from app.utils.email import send_invoice_email
-from sqlalchemy import desc, asc
-from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, load_only, undefer, undefer_group
 from app import models
-from schemas.invoices import InvoiceCreate, InvoiceOut,  InvoiceUpdate
-from app.utils.email import send_email
-from app.utils.tokens import get_or_create_public_token
+from schemas.invoices import InvoiceCreate, InvoiceOut,  InvoiceUpdate, InvoiceSummary, InvoiceSignatureOut, BulkInvoiceResult, InvoiceReplaceOut, LineItemChanges
+from schemas.jobs import JobAccepted
 
 from app.database import get_db
 
@@ -22,68 +28,140 @@ router = APIRouter()
 
 @router.post("/", response_model=InvoiceOut)
 def create_invoice(invoice: InvoiceCreate, db: Session = Depends(get_db), token: dict = Depends(verify_token)):
-    customer = db.query(models.Customer).filter(models.Customer.id == invoice.customer_id).first()
-    if not customer:
-        raise HTTPException(status_code=404, detail="Customer not found")
-
     # Calculate subtotal
-    subtotal = sum(item.quantity * item.unit_price for item in invoice.items)
+    subtotal, final_total = invoice_totals(invoice.items, invoice.discount, invoice.tax)
     discount = invoice.discount or 0.0
     tax = invoice.tax or 0.0
-    final_total = (subtotal - discount) * (1 + tax / 100)
-
-    # Generate invoice number like {INV,EST}-YYYYMMDD-001
-    number = generate_invoice_number(db) if not invoice.is_estimate else generate_estimate_number(db)
-
 
     db_invoice = models.Invoice(
-        customer_id=invoice.customer_id,
         total=subtotal,
         discount=discount,
         tax=tax,
-        final_total=round(final_total, 2),
+        final_total=final_total,
         status=invoice.status,
         due_date=invoice.due_date,
         notes=invoice.notes,
         payment_type=invoice.payment_type,
         date=date.today(),
-        number=number,  # Make sure your model and schema support this field
         testimonial=invoice.testimonial,
-        tech_id=invoice.tech_id,
-        is_estimate=invoice.is_estimate
+        is_estimate=invoice.is_estimate,
+        items=[models.LineItem(**item.dict(exclude={"id"})) for item in invoice.items],
+        # Deferred columns left unset would be reloaded when the response reads them
+        signature_base64=None,
+        estimate_signature_base64=None,
     )
+    link_invoice_refs(db, db_invoice, invoice.customer_id, invoice.tech_id)
+
+    # Generate invoice number like {INV,EST}-YYYYMMDD-001
+    db_invoice.number = generate_invoice_number(db) if not invoice.is_estimate else generate_estimate_number(db)
     print(f"Invoice: {db_invoice}")
 
+    # One flush inserts the invoice and its items (ids via RETURNING); serialize before commit expires them
     db.add(db_invoice)
+    db.flush()
+    invoice_out = serialize_invoice(db_invoice)
     db.commit()
-    db.refresh(db_invoice)
+    return invoice_out
 
-    for item in invoice.items:
-        db_item = models.LineItem(invoice_id=db_invoice.id, **item.dict())
-        db.add(db_item)
 
-    db.commit()
-    db.refresh(db_invoice)
-    return db_invoice
+BULK_MAX_INVOICES = 200
+
+@router.post("/bulk", response_model=list[BulkInvoiceResult])
+def create_invoices_bulk(payloads: list[dict] = Body(..., max_length=BULK_MAX_INVOICES), db: Session = Depends(get_db), token: dict = Depends(verify_token)):
+    # Each payload is validated on its own so one bad invoice doesn't reject the whole sync
+    results = [None] * len(payloads)
+    valid = []
+    for index, payload in enumerate(payloads):
+        try:
+            valid.append((index, InvoiceCreate(**payload)))
+        except ValidationError as e:
+            results[index] = BulkInvoiceResult(index=index, ok=False, errors=e.errors(include_url=False, include_context=False))
+
+    customer_ids = {invoice.customer_id for _, invoice in valid}
+    known_customers = {
+        row.id for row in db.query(models.Customer.id).filter(models.Customer.id.in_(customer_ids))
+    } if customer_ids else set()
+    tech_ids = {invoice.tech_id for _, invoice in valid if invoice.tech_id is not None}
+    known_techs = {
+        row.id for row in db.query(models.User.id).filter(models.User.id.in_(tech_ids))
+    } if tech_ids else set()
+    for index, invoice in valid:
+        errors = []
+        if invoice.customer_id not in known_customers:
+            errors.append("Customer not found")
+        if invoice.tech_id is not None and invoice.tech_id not in known_techs:
+            errors.append("Tech not found")
+        if errors:
+            results[index] = BulkInvoiceResult(index=index, ok=False, errors=errors)
+    valid = [(index, invoice) for index, invoice in valid if results[index] is None]
+
+    if valid:
+        # One counter bump per kind for the whole batch
+        estimates = sum(bool(invoice.is_estimate) for _, invoice in valid)
+        invoices = len(valid) - estimates
+        numbers = {
+            False: iter(allocate_numbers(db, "INV", invoices) if invoices else []),
+            True: iter(allocate_numbers(db, "EST", estimates) if estimates else []),
+        }
+        today = date.today()
+        rows = []
+        for _, invoice in valid:
+            subtotal, final_total = invoice_totals(invoice.items, invoice.discount, invoice.tax)
+            rows.append({
+                "customer_id": invoice.customer_id,
+                "total": subtotal,
+                "discount": invoice.discount or 0.0,
+                "tax": invoice.tax or 0.0,
+                "final_total": final_total,
+                "status": invoice.status,
+                "due_date": invoice.due_date,
+                "notes": invoice.notes,
+                "payment_type": invoice.payment_type,
+                "date": today,
+                "number": next(numbers[bool(invoice.is_estimate)]),
+                "testimonial": invoice.testimonial,
+                "tech_id": invoice.tech_id,
+                "is_estimate": bool(invoice.is_estimate),
+                "is_active": True,
+            })
+
+        # Multi-row INSERT ... RETURNING, ids come back in payload order
+        created = db.execute(
+            insert(models.Invoice).returning(models.Invoice.id, models.Invoice.number, sort_by_parameter_order=True),
+            rows,
+        ).all()
+
+        items = [
+            {"invoice_id": row.id, **item.dict(exclude={"id"})}
+            for row, (_, invoice) in zip(created, valid)
+            for item in invoice.items
+        ]
+        if items:
+            db.execute(insert(models.LineItem), items)
+
+        # Core inserts skip the ORM flush hooks, so book the autocomplete stats, customer balances and tech rollup here
+        record_description_usage(db, [(item["description"], 1, item["unit_price"]) for item in items])
+        deltas = defaultdict(lambda: [0.0, 0])
+        rollup = defaultdict(lambda: [0.0, 0])
+        for row in rows:
+            balance, count = invoice_balance(row["customer_id"], row["status"], row["is_estimate"], row["is_active"], row["final_total"])
+            deltas[row["customer_id"]][0] += balance
+            deltas[row["customer_id"]][1] += count
+            key = rollup_key(row["tech_id"], row["date"], row["status"], row["is_estimate"])
+            if key is not None:
+                rollup[key][0] += row["final_total"]
+                rollup[key][1] += 1
+        apply_customer_deltas(db, deltas)
+        apply_rollup_deltas(db, rollup)
+        db.commit()
+
+        for row, (index, _) in zip(created, valid):
+            results[index] = BulkInvoiceResult(index=index, ok=True, id=row.id, number=row.number)
 
+    return results
 
-@router.get("/", response_model=list[InvoiceOut])
-def list_invoices(
-    status: Optional[str] = Query(None),
-    customer_id: Optional[int] = Query(None),
-    tech_id: Optional[int] = Query(None),
-    date_from: Optional[date] = Query(None),
-    date_to: Optional[date] = Query(None),
-    period: Optional[str] = Query(None),  # "ytd" or "all"
-    sort_by: str = Query("date"),
-    sort_dir: str = Query("desc"),
-    limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
-    token: dict = Depends(verify_token),
-):
-    query = db.query(models.Invoice)
 
+def filter_invoices(query, status=None, customer_id=None, tech_id=None, date_from=None, date_to=None, period=None):
     # Filter by status, customer, tech
     if status:
         query = query.filter(models.Invoice.status == status)
@@ -104,25 +182,105 @@ def list_invoices(
     if date_to:
         query = query.filter(models.Invoice.date <= date_to)
 
-    # Sorting logic
-    sort_column = getattr(models.Invoice, sort_by, models.Invoice.date)
-    if sort_dir == "asc":
-        query = query.order_by(asc(sort_column))
-    else:
-        query = query.order_by(desc(sort_column))
+    return query
+
+
+# Columns the invoice list can be sorted (and keyset-paginated) by
+SORTABLE_COLUMNS = ("id", "number", "date", "due_date", "status", "final_total", "paid_at")
+
+
+@router.get("/", response_model=list[InvoiceOut] | list[InvoiceSummary])
+def list_invoices(
+    response: Response,
+    status: Optional[str] = Query(None),
+    customer_id: Optional[int] = Query(None),
+    tech_id: Optional[int] = Query(None),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    period: Optional[str] = Query(None),  # "ytd" or "all"
+    sort_by: str = Query("date"),
+    sort_dir: str = Query("desc"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page; replaces offset"),
+    view: Literal["full", "summary"] = Query("full", description="summary: list columns only, no items, customer or signatures"),
+    db: Session = Depends(get_db),
+    token: dict = Depends(verify_token),
+):
+    base = invoice_summary_query(db) if view == "summary" else invoice_read_query(db)
+    query = filter_invoices(base, status, customer_id, tech_id, date_from, date_to, period)
+
+    # Sorting logic; the sort value goes into the cursor, so only plain list columns qualify
+    if sort_by not in SORTABLE_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of: {', '.join(SORTABLE_COLUMNS)}")
+    sort_column = getattr(models.Invoice, sort_by)
+    query = query.options(undefer(sort_column))
 
     # Load + map results
-    invoices = query.offset(offset).limit(limit).all()
+    invoices, next_cursor = paginate(query, sort_column, models.Invoice.id, sort_by, sort_dir, limit, offset, cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if view == "full":
+        return [serialize_invoice(inv) for inv in invoices]
     results = []
 
     for inv in invoices:
-        inv_out = InvoiceOut.from_orm(inv)
+        inv_out = InvoiceSummary.from_orm(inv)
+        if inv.customer:
+            inv_out.customer_name = f"{inv.customer.first_name} {inv.customer.last_name}"
         if inv.tech:
             inv_out.user_name = inv.tech.user_name or inv.tech.email
         results.append(inv_out)
 
     return results
 
+@router.get("/export/pdf")
+def export_invoice_pdfs(
+    status: Optional[str] = Query(None),
+    customer_id: Optional[int] = Query(None),
+    tech_id: Optional[int] = Query(None),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    period: Optional[str] = Query(None),  # "ytd" or "all"
+    db: Session = Depends(get_db),
+    token: dict = Depends(verify_token),
+):
+    query = filter_invoices(db.query(models.Invoice.id), status, customer_id, tech_id, date_from, date_to, period)
+    invoice_ids = [row.id for row in query.order_by(models.Invoice.date, models.Invoice.id)]
+    if not invoice_ids:
+        raise HTTPException(status_code=404, detail="No invoices match these filters")
+
+    filename = f"invoices_{date.today().strftime('%Y%m%d')}.zip"
+    return StreamingResponse(
+        stream_invoice_pdf_zip(invoice_ids),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/export/{export_format}")
+def export_invoice_rows(
+    export_format: Literal["csv", "ndjson"],
+    status: Optional[str] = Query(None),
+    customer_id: Optional[int] = Query(None),
+    tech_id: Optional[int] = Query(None),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    period: Optional[str] = Query(None),  # "ytd" or "all"
+    gzip: bool = Query(False),
+    token: dict = Depends(verify_token),
+):
+    # One row per line item, streamed from a server-side cursor (no page size limit)
+    statement = filter_invoices(export_query(), status, customer_id, tech_id, date_from, date_to, period)
+    media_type, extension = EXPORT_FORMATS[export_format]
+    filename = f"invoices_{date.today().strftime('%Y%m%d')}.{extension}"
+    if gzip:
+        media_type, filename = "application/gzip", f"{filename}.gz"
+    return StreamingResponse(
+        stream_export(statement, export_format, compress=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 # @router.get("/", response_model=list[InvoiceOut])
 # def list_invoices(
 #     status: Optional[str] = Query(None),
@@ -153,28 +311,47 @@ def list_invoices(
 
 @router.get("/{invoice_id}", response_model=InvoiceOut)
 def get_invoice(invoice_id: int, db: Session = Depends(get_db), token: dict = Depends(verify_token)):
-    invoice = db.query(models.Invoice).filter(models.Invoice.id == invoice_id).first()
+    invoice = invoice_read_query(db).filter(models.Invoice.id == invoice_id).first()
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
-    
-    invoice_out = InvoiceOut.from_orm(invoice)
-    
-    # Attach tech_name if available
-    if invoice.tech:
-        invoice_out.user_name = invoice.tech.user_name or invoice.tech.email
 
-    return invoice_out
+    # Attaches tech_name if available
+    return serialize_invoice(invoice)
+
+
+@router.get("/{invoice_id}/signature", response_model=InvoiceSignatureOut)
+def get_invoice_signature(invoice_id: int, db: Session = Depends(get_db), token: dict = Depends(verify_token)):
+    invoice = (
+        db.query(models.Invoice)
+        .options(
+            load_only(
+                models.Invoice.id,
+                models.Invoice.signed_at,
+                models.Invoice.accepted,
+                models.Invoice.estimate_accepted,
+                models.Invoice.estimate_signed_at,
+            ),
+            undefer_group("signatures"),
+        )
+        .filter(models.Invoice.id == invoice_id)
+        .first()
+    )
+    if not invoice:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    return invoice
 
 
 @router.patch("/{invoice_id}", response_model=InvoiceOut)
 def update_invoice(invoice_id: int, invoice_update: InvoiceUpdate, db: Session = Depends(get_db), token: dict = Depends(verify_token)):
-    invoice = db.query(models.Invoice).filter(models.Invoice.id == invoice_id).first()
+    invoice = invoice_read_query(db).filter(models.Invoice.id == invoice_id).first()
     print(f"invoice: {invoice}")
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice or Estimate not found")
 
     updates = invoice_update.dict(exclude_unset=True)
-    
+    items = updates.pop("items", None)
+    link_invoice_refs(db, invoice, updates.pop("customer_id", invoice.customer_id), updates.pop("tech_id", invoice.tech_id))
+
     # Auto-set paid_at if status changed to "paid"
     if "status" in updates and updates["status"] == "paid" and invoice.paid_at is None:
         invoice.paid_at = datetime.utcnow()
@@ -185,17 +362,25 @@ def update_invoice(invoice_id: int, invoice_update: InvoiceUpdate, db: Session =
     for field, value in updates.items():
         setattr(invoice, field, value)
 
+    if items is not None:
+        apply_line_items(invoice, invoice_update.items)
+    if items is not None or "discount" in updates or "tax" in updates:
+        invoice.total, invoice.final_total = invoice_totals(invoice.items, invoice.discount, invoice.tax)
+
+    # Serialize from the loaded graph before commit expires it
+    db.flush()
+    invoice_out = serialize_invoice(invoice)
     db.commit()
-    db.refresh(invoice)
-    return invoice
-@router.put("/{invoice_id}", response_model=InvoiceOut)
+    return invoice_out
+
+@router.put("/{invoice_id}", response_model=InvoiceReplaceOut)
 def replace_invoice(invoice_id: int, updated_invoice: InvoiceCreate, db: Session = Depends(get_db), token: dict = Depends(verify_token)):
-    invoice = db.query(models.Invoice).filter(models.Invoice.id == invoice_id).first()
+    invoice = invoice_read_query(db).filter(models.Invoice.id == invoice_id).first()
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice or Estimate not found")
 
     # Update basic fields
-    invoice.customer_id = updated_invoice.customer_id
+    link_invoice_refs(db, invoice, updated_invoice.customer_id, updated_invoice.tech_id)
     invoice.status = updated_invoice.status or "unpaid"
     invoice.due_date = updated_invoice.due_date
     invoice.notes = updated_invoice.notes
@@ -203,14 +388,12 @@ def replace_invoice(invoice_id: int, updated_invoice: InvoiceCreate, db: Session
     invoice.discount = updated_invoice.discount or 0.0
     invoice.tax = updated_invoice.tax or 0.0
     invoice.testimonial = updated_invoice.testimonial
-    invoice.tech_id = updated_invoice.tech_id
     invoice.media_folder_url = updated_invoice.media_folder_url
     invoice.is_active = updated_invoice.is_active
 
-    # Recalculate totals
-    subtotal = sum(item.quantity * item.unit_price for item in updated_invoice.items)
-    invoice.total = subtotal
-    invoice.final_total = round((subtotal - invoice.discount) * (1 + invoice.tax / 100), 2)
+    # Diff the line items against what's stored, then total the merged set
+    changes = apply_line_items(invoice, updated_invoice.items)
+    invoice.total, invoice.final_total = invoice_totals(invoice.items, invoice.discount, invoice.tax)
 
     # Handle paid_at logic
     if invoice.status == "paid" and not invoice.paid_at:
@@ -218,15 +401,11 @@ def replace_invoice(invoice_id: int, updated_invoice: InvoiceCreate, db: Session
     elif invoice.status != "paid":
         invoice.paid_at = None
 
-    # Replace all line items
-    db.query(models.LineItem).filter(models.LineItem.invoice_id == invoice_id).delete()
-    for item in updated_invoice.items:
-        db_item = models.LineItem(invoice_id=invoice_id, **item.dict())
-        db.add(db_item)
-
+    db.flush()
+    invoice_out = serialize_invoice(invoice, InvoiceReplaceOut)
+    invoice_out.item_changes = LineItemChanges(**changes)
     db.commit()
-    db.refresh(invoice)
-    return invoice
+    return invoice_out
 
 @router.post("/{invoice_id}/generate-token")
 def generate_invoice_token(invoice_id: int, db: Session = Depends(get_db), token: dict = Depends(verify_token)):
@@ -257,66 +436,47 @@ def delete_invoice(invoice_id: int, db: Session = Depends(get_db), token: dict =
     db.commit()
     db.expire_all()
     return None
-@router.post("/{invoice_id}/resend", status_code=200)
+@router.post("/{invoice_id}/resend", status_code=202, response_model=JobAccepted)
 def resend_invoice(invoice_id: int, db: Session = Depends(get_db), token: dict = Depends(verify_token)):
     invoice = db.query(models.Invoice).filter(models.Invoice.id == invoice_id).first()
 
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice or Estimate not found")
 
-    doc_type = "Invoice" if not invoice.is_estimate else "Estimate"
-
-    invoice_data = InvoiceOut.from_orm(invoice).dict()
-
-    if invoice.is_estimate:
-        signature_base64 = invoice.estimate_signature_base64 or ""
-        signed_at = invoice.estimate_signed_at.strftime("%m/%d/%Y %H:%M") if invoice.estimate_signed_at else ""
-        accepted = invoice.estimate_accepted
-    else:
-        signature_base64 = invoice.signature_base64 or ""
-        signed_at = invoice.signed_at.strftime("%m/%d/%Y %H:%M") if invoice.signed_at else ""
-        accepted = invoice.accepted
-
-    pdf_bytes = generate_invoice_pdf_from_html(
-        invoice_data,
-        signature_base64=signature_base64,
-        signed_at=signed_at,
-        accepted=accepted,
-        doc_type=doc_type,  # <-- make sure pdf.py supports doc_type (we fixed it above)
-    )
-
-    send_invoice_email(
-        to_email=invoice.customer.email,
-        subject=f"{doc_type} #{invoice.number}",
-        body=f"Here is your signed {doc_type.lower()} #{invoice.number} for your records.",
-        attachment=io.BytesIO(pdf_bytes),
-        filename=f"{doc_type}_{invoice.number}.pdf"
-    )
-
-    return {"message": f"{doc_type} resent successfully"}
+    # Render + send run in the job worker; poll /jobs/{job_id} for progress
+    job = enqueue_job(db, "invoice_resend", {"invoice_id": invoice.id})
+    db.commit()
+    return job_accepted(job)
 @router.post("/{invoice_id}/clone", response_model=InvoiceOut)
 def clone_invoice(invoice_id: int, is_estimate: Optional[bool] = None, db: Session = Depends(get_db), token: dict = Depends(verify_token)):
-    invoice = db.query(models.Invoice).filter(models.Invoice.id == invoice_id).first()
+    invoice = invoice_read_query(db).filter(models.Invoice.id == invoice_id).first()
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
 
     # Archive the original
     invoice.is_active = False
-    db.commit()
 
-    # Create new invoice (basic fields)
+    # Create new invoice (basic fields) with copies of the line items
     new_invoice = models.Invoice(
-        customer_id=invoice.customer_id,
+        customer=invoice.customer,
         due_date=invoice.due_date,
         notes=invoice.notes,
         discount=invoice.discount,
         tax=invoice.tax,
+        total=invoice.total,
+        final_total=invoice.final_total,
         status="unpaid",
         payment_type=None,
         testimonial=None,
         media_folder_url=invoice.media_folder_url,
-        tech_id=invoice.tech_id,
+        tech=invoice.tech,
         is_estimate=is_estimate if is_estimate is not None else invoice.is_estimate,
+        items=[
+            models.LineItem(description=item.description, quantity=item.quantity, unit_price=item.unit_price)
+            for item in invoice.items
+        ],
+        signature_base64=None,
+        estimate_signature_base64=None,
     )
 
     # Generate new number
@@ -325,29 +485,15 @@ def clone_invoice(invoice_id: int, is_estimate: Optional[bool] = None, db: Sessi
     else:
         new_invoice.number = generate_invoice_number(db)
 
-    # ✅ Add and commit now to get ID
-    db.add(new_invoice)
-    db.commit()
-    db.refresh(new_invoice)
-
-    # ✅ Get token string
-    token_str = get_or_create_public_token(new_invoice.id, db)
-
-    # ✅ Assign manually
-    new_invoice.uuid_token = token_str
+    # A brand-new invoice has no public token yet, so create it alongside
+    public_token = models.PublicToken(token=str(uuid.uuid4()), expires_at=datetime.utcnow() + timedelta(hours=72))
+    new_invoice.public_tokens = [public_token]
+    new_invoice.uuid_token = public_token.token
     new_invoice.token_expiry = datetime.utcnow() + timedelta(days=3)
 
-    # Copy line items
-    for item in invoice.items:
-        db_item = models.LineItem(
-            invoice_id=new_invoice.id,
-            description=item.description,
-            quantity=item.quantity,
-            unit_price=item.unit_price,
-        )
-        db.add(db_item)    
-    
+    # Archive UPDATE, invoice/items/token INSERTs: one flush, one commit
+    db.add(new_invoice)
+    db.flush()
+    invoice_out = serialize_invoice(new_invoice)
     db.commit()
-    db.refresh(new_invoice)
-
-    return new_invoice
+    return invoice_out
@@ -0,0 +1,16 @@
+# backend/app/routes/jobs.py
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app import models
+from app.database import get_db
+from app.utils.auth import verify_token
+from schemas.jobs import JobOut
+
+router = APIRouter()
+
+@router.get("/{job_id}", response_model=JobOut)
+def get_job(job_id: str, db: Session = Depends(get_db), token: dict = Depends(verify_token)):
+    job = db.get(models.Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
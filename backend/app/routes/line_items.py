@@ -4,17 +4,16 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
-from app.models import LineItem
+from app.utils.autocomplete import suggest_descriptions
+from schemas.line_items import LineItemSuggestion
 
 router = APIRouter()
 
 @router.get("/line-items/descriptions", response_model=List[str])
-def get_line_item_descriptions(q: str = Query("", min_length=1), db: Session = Depends(get_db), token: dict = Depends(verify_token)):
-    results = (
-        db.query(LineItem.description)
-        .filter(LineItem.description.ilike(f"%{q}%"))
-        .distinct()
-        .limit(10)
-        .all()
-    )
-    return [r.description for r in results]
+def get_line_item_descriptions(q: str = Query("", min_length=1), limit: int = Query(10, ge=1, le=50), db: Session = Depends(get_db), token: dict = Depends(verify_token)):
+    return [hint.description for hint in suggest_descriptions(db, q, limit)]
+
+@router.get("/line-items/suggestions", response_model=List[LineItemSuggestion])
+def get_line_item_suggestions(q: str = Query("", min_length=1), limit: int = Query(10, ge=1, le=50), db: Session = Depends(get_db), token: dict = Depends(verify_token)):
+    # Same matches as /descriptions, with usage and price hints for prefilling unit_price
+    return suggest_descriptions(db, q, limit)
@@ -1,14 +1,16 @@
 import random
 from fastapi import APIRouter, Depends, HTTPException, Body
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager
 from app.database import get_db
 from app import models
 from schemas.invoices import InvoiceOut, OtpVerifyRequest, InvoiceAcknowledgment
 from datetime import datetime
 from typing import List, Optional
 from datetime import datetime, date, timedelta
-from app.utils.email import send_email, send_public_invoice_email
+from app.utils.email import send_email
+from app.jobs import enqueue_job
+from app.utils.invoice import invoice_read_query
 router = APIRouter()
 
 
@@ -20,7 +22,7 @@ def verify_public_token(token: str, db: Session) -> Optional[int]:
         return None
     return record.invoice_id
 
-@router.post("/public/invoice/{token}/acknowledge")
+@router.post("/public/invoice/{token}/acknowledge", status_code=202)
 def public_acknowledge_invoice(token: str, ack: InvoiceAcknowledgment, db: Session = Depends(get_db)):
     invoice_id = verify_public_token(token, db)
     if not invoice_id:
@@ -47,13 +49,12 @@ def public_acknowledge_invoice(token: str, ack: InvoiceAcknowledgment, db: Sessi
     if ack.notes:
         invoice.notes = ack.notes
 
+    # ✉️ Signed copy is rendered and emailed by the job worker, committed with the signature.
+    # The job's status lives behind staff auth, so the customer only gets the acknowledgment.
+    enqueue_job(db, "invoice_signed_copy", {"invoice_id": invoice.id})
     db.commit()
-    db.refresh(invoice)
 
-    # ✉️ Send Email
-    send_public_invoice_email(invoice)
-
-    return {"message": "Acknowledged and emailed successfully"}
+    return {"message": "Acknowledged; signed copy will be emailed shortly"}
 
 @router.get("/public/invoice/{token}", response_model=InvoiceOut)
 def view_invoice_by_token(token: str, db: Session = Depends(get_db)):
@@ -62,7 +63,7 @@ def view_invoice_by_token(token: str, db: Session = Depends(get_db)):
     if not invoice_id:
         raise HTTPException(status_code=404, detail="Invalid or expired token")
 
-    invoice = db.query(models.Invoice).filter(models.Invoice.id == invoice_id).first()
+    invoice = invoice_read_query(db).filter(models.Invoice.id == invoice_id).first()
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
 
@@ -72,6 +73,7 @@ def get_testimonials(db: Session = Depends(get_db)):
     invoices = (
         db.query(models.Invoice)
         .join(models.Customer)
+        .options(contains_eager(models.Invoice.customer))
         .filter(models.Invoice.testimonial != None)
         .order_by(models.Invoice.signed_at.desc())
         .limit(50)
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case
+from sqlalchemy import and_, func, case
 from datetime import datetime, date
+from typing import Optional
 from app import models
 from app.database import get_db
+from app.utils import analytics
+from app.utils.report_cache import report_cache
 
 router = APIRouter()
 
@@ -11,8 +14,21 @@ router = APIRouter()
 def tech_summary(db: Session = Depends(get_db)):
     current_year = datetime.now().year
     ytd_start = date(current_year, 1, 1)
+    # Served from memory until the next invoice write
+    return report_cache.get_or_compute("tech-summary", {"ytd_start": ytd_start}, lambda: _tech_summary(db, ytd_start))
+
+@router.get("/cache-stats")
+def cache_stats():
+    return report_cache.stats()
+
+def _tech_summary(db: Session, ytd_start: date):
+    # Aggregate the per-tech daily rollup (app/utils/rollups.py), not the invoices
+    rollup = models.TechDailyRevenue
+    in_ytd = rollup.day >= ytd_start
+
+    def ytd_sum(*conditions):
+        return func.coalesce(func.sum(case((and_(in_ytd, *conditions), rollup.final_total))), 0)
 
-    # Build aggregation per tech
     q = (
         db.query(
             models.User.id.label("tech_id"),
@@ -20,43 +36,17 @@ def tech_summary(db: Session = Depends(get_db)):
             models.User.email,
 
             # YTD counts and totals
-            func.count(
-                case((models.Invoice.date >= ytd_start, 1))
-            ).label("ytd_count"),
-
-            func.coalesce(
-                func.sum(case((models.Invoice.date >= ytd_start, models.Invoice.final_total))), 0
-            ).label("ytd_total"),
-
-            func.coalesce(
-                func.sum(
-                    case(
-                        ((models.Invoice.date >= ytd_start) & (models.Invoice.status == "paid"), models.Invoice.final_total)
-                    )
-                ), 0
-            ).label("ytd_paid"),
-
-            func.coalesce(
-                func.sum(
-                    case(
-                        ((models.Invoice.date >= ytd_start) & (models.Invoice.status == "unpaid"), models.Invoice.final_total)
-                    )
-                ), 0
-            ).label("ytd_unpaid"),
-
-            func.coalesce(
-                func.sum(
-                    case(
-                        ((models.Invoice.date >= ytd_start) & (models.Invoice.status == "overdue"), models.Invoice.final_total)
-                    )
-                ), 0
-            ).label("ytd_overdue"),
+            func.coalesce(func.sum(case((in_ytd, rollup.invoice_count))), 0).label("ytd_count"),
+            ytd_sum().label("ytd_total"),
+            ytd_sum(rollup.status == "paid").label("ytd_paid"),
+            ytd_sum(rollup.status == "unpaid").label("ytd_unpaid"),
+            ytd_sum(rollup.status == "overdue").label("ytd_overdue"),
 
             # All-time
-            func.count(models.Invoice.id).label("all_count"),
-            func.coalesce(func.sum(models.Invoice.final_total), 0).label("all_total"),
+            func.coalesce(func.sum(rollup.invoice_count), 0).label("all_count"),
+            func.coalesce(func.sum(rollup.final_total), 0).label("all_total"),
         )
-        .outerjoin(models.Invoice, models.User.id == models.Invoice.tech_id)
+        .outerjoin(rollup, models.User.id == rollup.tech_id)
         .group_by(models.User.id)
         .order_by(models.User.user_name)
         .all()
@@ -70,15 +60,38 @@ def tech_summary(db: Session = Depends(get_db)):
             "user_name": row.user_name or row.email,
             "ytd": {
                 "invoice_count": row.ytd_count,
-                "total_amount": float(row.ytd_total),
-                "paid_amount": float(row.ytd_paid),
-                "unpaid_amount": float(row.ytd_unpaid),
-                "overdue_amount": float(row.ytd_overdue),
+                "total_amount": round(float(row.ytd_total), 2),
+                "paid_amount": round(float(row.ytd_paid), 2),
+                "unpaid_amount": round(float(row.ytd_unpaid), 2),
+                "overdue_amount": round(float(row.ytd_overdue), 2),
             },
             "all_time": {
                 "invoice_count": row.all_count,
-                "total_amount": float(row.all_total),
+                "total_amount": round(float(row.all_total), 2),
             }
         })
 
     return results
+
+
+# Ad-hoc reports over the in-memory invoice snapshot (app/utils/analytics.py)
+
+@router.get("/ar-aging")
+def ar_aging(as_of: Optional[date] = None, tech_id: Optional[int] = None, db: Session = Depends(get_db)):
+    return analytics.ar_aging(analytics.invoice_facts.snapshot(db), as_of or date.today(), tech_id)
+
+@router.get("/monthly-revenue")
+def monthly_revenue(year: Optional[int] = Query(None, ge=1970, le=9999), tech_id: Optional[int] = None, db: Session = Depends(get_db)):
+    return analytics.monthly_revenue(analytics.invoice_facts.snapshot(db), year or date.today().year, tech_id)
+
+@router.get("/average-ticket")
+def average_ticket(date_from: Optional[date] = None, date_to: Optional[date] = None, db: Session = Depends(get_db)):
+    return analytics.average_ticket(analytics.invoice_facts.snapshot(db), date_from, date_to)
+
+@router.get("/estimate-conversion")
+def estimate_conversion(date_from: Optional[date] = None, date_to: Optional[date] = None, db: Session = Depends(get_db)):
+    return analytics.estimate_conversion(analytics.invoice_facts.snapshot(db), date_from, date_to)
+
+@router.get("/referral-sources")
+def referral_sources(date_from: Optional[date] = None, date_to: Optional[date] = None, db: Session = Depends(get_db)):
+    return analytics.referral_sources(analytics.invoice_facts.snapshot(db), date_from, date_to)
@@ -0,0 +1,495 @@
+# backend/app/utils/analytics.py
+"""Columnar invoice snapshot for ad-hoc revenue reports.
+
+Each process keeps the facts reports need from every invoice (dates as days
+since 1970-01-01, tech, customer, status code, final_total, flags) in NumPy
+arrays, plus each customer's referral source. Reports are boolean masks and
+bincounts over those arrays, so they take milliseconds and send no
+aggregate queries to the database.
+
+The snapshot refreshes incrementally: it re-reads only invoices whose
+updated_at is past its high-water mark, at most every
+ANALYTICS_REFRESH_INTERVAL seconds, or on the next read after a local
+invoice write commits. Local deletes are applied on commit; everything is
+reloaded from scratch every ANALYTICS_FULL_RELOAD seconds, in a background
+thread, to pick up other processes' deletes. A refresh builds new arrays and
+swaps them in, so a report always reads one consistent Snapshot.
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+from app.utils.report_cache import report_cache
+
+ANALYTICS_REFRESH_INTERVAL = int(os.getenv("ANALYTICS_REFRESH_INTERVAL", 30))
+ANALYTICS_FULL_RELOAD = int(os.getenv("ANALYTICS_FULL_RELOAD", 3600))
+# Re-read rows stamped this long before the last refresh, for transactions that flushed before it and committed after
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+EPOCH = date(1970, 1, 1).toordinal()
+NO_DAY = -1
+NO_ID = -1
+
+_COLUMNS = {
+    "id": np.int64,
+    "day": np.int32,
+    "due_day": np.int32,
+    "paid_day": np.int32,
+    "tech_id": np.int32,
+    "customer_id": np.int32,
+    "status": np.int16,
+    "final_total": np.float64,
+    "is_estimate": np.bool_,
+    "is_active": np.bool_,
+    "accepted": np.bool_,
+}
+
+AGING_BUCKETS = ("current", "1-30", "31-60", "61-90", "90+")
+
+
+def to_day(value) -> int:
+    if value is None:
+        return NO_DAY
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.toordinal() - EPOCH
+
+
+def from_day(day: int) -> date:
+    return date.fromordinal(int(day) + EPOCH)
+
+
+def _accepted(value) -> bool:
+    # estimate_accepted is a String column written from a bool
+    return str(value).lower() in ("true", "t", "1", "yes")
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """One consistent view of the invoice facts; never mutated once built."""
+    columns: dict
+    statuses: tuple
+    referrals: tuple
+    referral_by_customer: np.ndarray  # referral code per customer id, -1 if unknown
+    tech_names: dict
+
+    def __getattr__(self, name):
+        try:
+            return self.columns[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __len__(self):
+        return len(self.columns["id"])
+
+    def status_code(self, status: str) -> int:
+        return self.statuses.index(status) if status in self.statuses else -2
+
+    def billed(self) -> np.ndarray:
+        """Mask of real revenue: active invoices, not estimates (archived originals are replaced by their clone)."""
+        return self.is_active & ~self.is_estimate
+
+    def between(self, date_from: Optional[date], date_to: Optional[date]) -> np.ndarray:
+        mask = self.day != NO_DAY
+        if date_from is not None:
+            mask &= self.day >= to_day(date_from)
+        if date_to is not None:
+            mask &= self.day <= to_day(date_to)
+        return mask
+
+
+def _empty_columns() -> dict:
+    return {name: np.empty(0, dtype=dtype) for name, dtype in _COLUMNS.items()}
+
+
+def _days(values) -> np.ndarray:
+    dates = np.array(values, dtype="datetime64[D]")  # dates, datetimes and None (NaT) alike
+    days = dates.astype(np.int64)
+    days[np.isnat(dates)] = NO_DAY
+    return days.astype(np.int32)
+
+
+def _ids(values) -> np.ndarray:
+    return np.array([NO_ID if value is None else value for value in values], dtype=np.int32)
+
+
+def _drop(columns: dict, invoice_ids, customer_ids) -> dict:
+    if not invoice_ids and not customer_ids:
+        return columns
+    keep = ~np.isin(columns["id"], list(invoice_ids)) & ~np.isin(columns["customer_id"], list(customer_ids))
+    return {name: values[keep] for name, values in columns.items()}
+
+
+class InvoiceFacts:
+    def __init__(self):
+        self._lock = threading.Lock()  # snapshot swaps and incremental refreshes
+        self._reload_lock = threading.Lock()  # one full reload at a time
+        self._codes_lock = threading.Lock()
+        self._snapshot = Snapshot(_empty_columns(), (), (), np.full(0, -1, dtype=np.int16), {})
+        self._status_codes: dict = {}
+        self._referral_codes: dict = {}
+        self._watermark: Optional[datetime] = None
+        self._version = None
+        self._loaded = threading.Event()
+        self._loaded_at = 0.0
+        self._refreshed_at = 0.0
+        self._reloading = False
+        # Local deletes/referral edits committed while a full reload reads, re-applied on top of it
+        self._during_reload: Optional[tuple] = None
+
+    def _code(self, codes: dict, value) -> int:
+        if value not in codes:
+            codes[value] = len(codes)
+        return codes[value]
+
+    def _encode(self, codes: dict, values) -> np.ndarray:
+        """Codes for values, registering new ones; one dict lookup per row outside the lock."""
+        local: dict = {}
+        positions = np.fromiter((local.setdefault(value, len(local)) for value in values), np.int64, len(values))
+        with self._codes_lock:
+            remap = np.array([self._code(codes, value) for value in local], dtype=np.int16)
+        return remap[positions] if len(values) else np.empty(0, dtype=np.int16)
+
+    def _read_invoices(self, db: Session, since: Optional[datetime]) -> dict:
+        invoice = models.Invoice
+        query = select(
+            invoice.id, invoice.date, invoice.due_date, invoice.paid_at, invoice.tech_id, invoice.customer_id,
+            invoice.status, invoice.final_total, invoice.is_estimate, invoice.is_active, invoice.estimate_accepted,
+        ).order_by(invoice.id)
+        if since is not None:
+            query = query.where(invoice.updated_at >= since)
+        rows = db.execute(query).all()
+        if not rows:
+            return _empty_columns()
+        ids, days, due_days, paid_at, tech_ids, customer_ids, statuses, totals, estimates, active, accepted = zip(*rows)
+        return {
+            "id": np.array(ids, dtype=np.int64),
+            "day": _days(days),
+            "due_day": _days(due_days),
+            "paid_day": _days(paid_at),
+            "tech_id": _ids(tech_ids),
+            "customer_id": _ids(customer_ids),
+            "status": self._encode(self._status_codes, [status or "" for status in statuses]),
+            "final_total": np.array([total or 0.0 for total in totals], dtype=np.float64),
+            "is_estimate": np.array([bool(value) for value in estimates], dtype=np.bool_),
+            "is_active": np.array([value is not False for value in active], dtype=np.bool_),
+            "accepted": np.array([_accepted(value) for value in accepted], dtype=np.bool_),
+        }
+
+    def _read_referrals(self, db: Session) -> np.ndarray:
+        rows = db.execute(select(models.Customer.id, models.Customer.referral_source)).all()
+        by_customer = np.full(max((r.id for r in rows), default=0) + 1, -1, dtype=np.int16)
+        if rows:
+            ids, sources = zip(*rows)
+            by_customer[list(ids)] = self._encode(self._referral_codes, [(source or "").strip() for source in sources])
+        return by_customer
+
+    def _read_tech_names(self, db: Session) -> dict:
+        return {r.id: r.user_name or r.email for r in db.execute(select(models.User.id, models.User.user_name, models.User.email))}
+
+    def _publish(self, columns: dict, referral_by_customer: np.ndarray, tech_names: dict):
+        with self._codes_lock:
+            statuses, referrals = tuple(self._status_codes), tuple(self._referral_codes)
+        self._snapshot = Snapshot(columns, statuses, referrals, referral_by_customer, tech_names)
+
+    def _set_referrals(self, referral_by_customer: np.ndarray, referrals: dict) -> np.ndarray:
+        size = max(len(referral_by_customer), max(referrals) + 1)
+        referral_by_customer = np.concatenate([referral_by_customer, np.full(size - len(referral_by_customer), -1, dtype=np.int16)])
+        for customer_id, source in referrals.items():
+            if source is None:
+                referral_by_customer[customer_id] = -1
+            else:
+                referral_by_customer[customer_id] = self._encode(self._referral_codes, [source])[0]
+        return referral_by_customer
+
+    def reload(self, db: Session, if_unloaded: bool = False):
+        """Read every invoice into a new snapshot; reports keep reading the old one meanwhile.
+
+        With if_unloaded, waits out a reload in progress and only reads if that
+        one didn't load the snapshot, e.g. because it failed.
+        """
+        with self._reload_lock:
+            if if_unloaded and self._loaded.is_set():
+                return
+            with self._lock:
+                started, version = datetime.utcnow(), report_cache.version
+                self._during_reload = (set(), set(), {})
+            try:
+                columns = self._read_invoices(db, None)
+                referral_by_customer = self._read_referrals(db)
+                tech_names = self._read_tech_names(db)
+            except BaseException:
+                with self._lock:
+                    self._during_reload = None
+                raise
+            with self._lock:
+                deleted_invoices, deleted_customers, referrals = self._during_reload
+                self._during_reload = None
+                columns = _drop(columns, deleted_invoices, deleted_customers)
+                if referrals:
+                    referral_by_customer = self._set_referrals(referral_by_customer, referrals)
+                self._publish(columns, referral_by_customer, tech_names)
+                # Updates committed while reading are picked up by the next refresh
+                self._watermark, self._version = started, version
+                self._loaded_at = self._refreshed_at = time.monotonic()
+            self._loaded.set()
+
+    def refresh(self, db: Session):
+        """Merge invoices updated since the high-water mark into a new snapshot."""
+        with self._lock:
+            if self._watermark is None:
+                return
+            started, version = datetime.utcnow(), report_cache.version
+            batch = self._read_invoices(db, self._watermark - REFRESH_OVERLAP)
+            current = self._snapshot
+            columns = _merge(current.columns, batch)
+            referral_by_customer = current.referral_by_customer
+            if len(batch["id"]) and batch["customer_id"].max() >= len(referral_by_customer):
+                # Invoices for customers created since the last read
+                referral_by_customer = self._read_referrals(db)
+            self._publish(columns, referral_by_customer, self._read_tech_names(db))
+            self._watermark, self._version = started, version
+            self._refreshed_at = time.monotonic()
+
+    def reload_in_background(self):
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+
+        def run():
+            db = SessionLocal()
+            try:
+                self.reload(db)
+                print(f"📊 Analytics snapshot loaded: {len(self._snapshot):,} invoices")
+            except Exception as e:
+                print(f"⚠️ Analytics snapshot reload failed: {e}")
+            finally:
+                db.close()
+                self._reloading = False
+
+        threading.Thread(target=run, name="analytics-reload", daemon=True).start()
+
+    def warm_up(self):
+        """Start the first full load at startup so the first report doesn't wait for it."""
+        self.reload_in_background()
+
+    def snapshot(self, db: Session) -> Snapshot:
+        if not self._loaded.is_set():
+            # Blocks on the startup load while it runs; loads here if it failed, raising if this one does too
+            self.reload(db, if_unloaded=True)
+        now = time.monotonic()
+        if now - self._loaded_at > ANALYTICS_FULL_RELOAD:
+            self.reload_in_background()
+        if self._version != report_cache.version or now - self._refreshed_at > ANALYTICS_REFRESH_INTERVAL:
+            self.refresh(db)
+        return self._snapshot
+
+    def apply(self, deleted_invoices: set, deleted_customers: set, referrals: dict):
+        """Committed deletes and referral_source edits from this process."""
+        with self._lock:
+            if self._during_reload is not None:
+                self._during_reload[0].update(deleted_invoices)
+                self._during_reload[1].update(deleted_customers)
+                self._during_reload[2].update(referrals)
+            if not self._loaded.is_set():
+                return
+            current = self._snapshot
+            columns = _drop(current.columns, deleted_invoices, deleted_customers)
+            referral_by_customer = current.referral_by_customer
+            if referrals:
+                referral_by_customer = self._set_referrals(referral_by_customer, referrals)
+            self._publish(columns, referral_by_customer, current.tech_names)
+
+
+def _merge(columns: dict, batch: dict) -> dict:
+    """Upsert batch rows into copies of columns by invoice id (both sorted by id)."""
+    if not len(batch["id"]):
+        return columns
+    ids = columns["id"]
+    positions = np.searchsorted(ids, batch["id"])
+    found = positions < len(ids)
+    found[found] = ids[positions[found]] == batch["id"][found]
+    merged = {}
+    for name, values in columns.items():
+        values = values.copy()
+        values[positions[found]] = batch[name][found]
+        merged[name] = np.concatenate([values, batch[name][~found]])
+    if (~found).any() and not (np.diff(merged["id"]) > 0).all():
+        order = np.argsort(merged["id"], kind="stable")
+        merged = {name: values[order] for name, values in merged.items()}
+    return merged
+
+
+invoice_facts = InvoiceFacts()
+
+
+# --- Local deletes and referral edits, applied once they commit ---
+
+@event.listens_for(Session, "after_flush")
+def _collect_fact_changes(session, flush_context):
+    for obj in session.deleted:
+        if isinstance(obj, models.Invoice):
+            session.info.setdefault("analytics_deleted_invoices", set()).add(obj.id)
+        elif isinstance(obj, models.Customer):
+            # Customer.invoices cascades through the ORM, so their invoices are listed above too;
+            # dropping by customer as well covers invoices the snapshot has that the session never loaded
+            session.info.setdefault("analytics_deleted_customers", set()).add(obj.id)
+            session.info.setdefault("analytics_referrals", {})[obj.id] = None
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, models.Customer):
+            session.info.setdefault("analytics_referrals", {})[obj.id] = (obj.referral_source or "").strip()
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_fact_changes(session):
+    invoices = session.info.pop("analytics_deleted_invoices", set())
+    customers = session.info.pop("analytics_deleted_customers", set())
+    referrals = session.info.pop("analytics_referrals", {})
+    if invoices or customers or referrals:
+        invoice_facts.apply(invoices, customers, referrals)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_fact_changes(session):
+    for key in ("analytics_deleted_invoices", "analytics_deleted_customers", "analytics_referrals"):
+        session.info.pop(key, None)
+
+
+# --- Reports ---
+
+def _groups(keys: np.ndarray, weights: np.ndarray, size: int) -> tuple[np.ndarray, np.ndarray]:
+    return np.bincount(keys, minlength=size), np.bincount(keys, weights=weights, minlength=size)
+
+
+def _tech_rows(snapshot: Snapshot, tech_keys: np.ndarray) -> list:
+    # tech_keys are tech_id + 1, so invoices without a tech land in group 0
+    return [
+        {"tech_id": None if key == 0 else int(key - 1), "user_name": snapshot.tech_names.get(int(key - 1)) if key else None}
+        for key in tech_keys
+    ]
+
+
+def ar_aging(snapshot: Snapshot, as_of: date, tech_id: Optional[int] = None) -> list[dict]:
+    """Open invoice balances by days past due (invoice date when there is no due date)."""
+    mask = snapshot.billed() & (snapshot.status != snapshot.status_code("paid"))
+    if tech_id is not None:
+        mask &= snapshot.tech_id == tech_id
+    due_day, day = snapshot.due_day[mask], snapshot.day[mask]
+    due = np.where(due_day != NO_DAY, due_day, day)
+    dated = due != NO_DAY
+    bucket = np.digitize(to_day(as_of) - due[dated], [1, 31, 61, 91])
+    counts, amounts = _groups(bucket, snapshot.final_total[mask][dated], len(AGING_BUCKETS))
+    return [
+        {"bucket": name, "invoice_count": int(counts[i]), "amount": round(float(amounts[i]), 2)}
+        for i, name in enumerate(AGING_BUCKETS)
+    ]
+
+
+def monthly_revenue(snapshot: Snapshot, year: int, tech_id: Optional[int] = None) -> list[dict]:
+    """Billed and paid totals per tech per month of the invoice date."""
+    mask = snapshot.billed() & snapshot.between(date(year, 1, 1), date(year, 12, 31))
+    if tech_id is not None:
+        mask &= snapshot.tech_id == tech_id
+    months = snapshot.day[mask].astype("datetime64[D]").astype("datetime64[M]").astype(np.int64) % 12
+    techs = snapshot.tech_id[mask].astype(np.int64) + 1
+    size = (int(techs.max()) + 1 if len(techs) else 1) * 12
+    keys = techs * 12 + months
+    counts, totals = _groups(keys, snapshot.final_total[mask], size)
+    paid = snapshot.status[mask] == snapshot.status_code("paid")
+    paid_totals = np.bincount(keys, weights=snapshot.final_total[mask] * paid, minlength=size)
+
+    present = np.flatnonzero(counts)
+    return [
+        {
+            **tech,
+            "month": f"{year}-{int(key % 12) + 1:02d}",
+            "invoice_count": int(counts[key]),
+            "total_amount": round(float(totals[key]), 2),
+            "paid_amount": round(float(paid_totals[key]), 2),
+        }
+        for key, tech in zip(present, _tech_rows(snapshot, present // 12))
+    ]
+
+
+def average_ticket(snapshot: Snapshot, date_from: Optional[date] = None, date_to: Optional[date] = None) -> list[dict]:
+    """Average billed invoice amount per tech, plus an overall row (tech_id null, user_name "All")."""
+    mask = snapshot.billed() & snapshot.between(date_from, date_to)
+    techs = snapshot.tech_id[mask].astype(np.int64) + 1
+    totals = snapshot.final_total[mask]
+    counts, sums = _groups(techs, totals, int(techs.max()) + 1 if len(techs) else 1)
+    present = np.flatnonzero(counts)
+    rows = [
+        {**tech, "invoice_count": int(counts[key]), "average_amount": round(float(sums[key] / counts[key]), 2)}
+        for key, tech in zip(present, _tech_rows(snapshot, present))
+    ]
+    rows.append({
+        "tech_id": None,
+        "user_name": "All",
+        "invoice_count": int(len(totals)),
+        "average_amount": round(float(totals.mean()), 2) if len(totals) else 0.0,
+    })
+    return rows
+
+
+def estimate_conversion(snapshot: Snapshot, date_from: Optional[date] = None, date_to: Optional[date] = None) -> list[dict]:
+    """Share of estimates the customer accepted, per tech plus an overall row."""
+    mask = snapshot.is_estimate & snapshot.between(date_from, date_to)
+    techs = snapshot.tech_id[mask].astype(np.int64) + 1
+    accepted = snapshot.accepted[mask]
+    counts, accepted_counts = _groups(techs, accepted, int(techs.max()) + 1 if len(techs) else 1)
+
+    def row(tech, count, won):
+        return {**tech, "estimate_count": int(count), "accepted_count": int(won), "conversion_rate": round(float(won / count), 4) if count else None}
+
+    present = np.flatnonzero(counts)
+    rows = [row(tech, counts[key], accepted_counts[key]) for key, tech in zip(present, _tech_rows(snapshot, present))]
+    rows.append(row({"tech_id": None, "user_name": "All"}, len(accepted), accepted.sum()))
+    return rows
+
+
+def referral_sources(snapshot: Snapshot, date_from: Optional[date] = None, date_to: Optional[date] = None) -> list[dict]:
+    """Customers, invoices and revenue per customer referral_source, best earning first."""
+    mask = snapshot.billed() & snapshot.between(date_from, date_to) & (snapshot.customer_id != NO_ID)
+    by_customer = snapshot.referral_by_customer
+    customers = snapshot.customer_id[mask]
+    known = customers < len(by_customer)
+    codes = np.full(len(customers), -1, dtype=np.int64)
+    codes[known] = by_customer[customers[known]]
+    codes += 1  # unknown customers land in group 0
+    size = len(snapshot.referrals) + 1
+    paid = snapshot.status[mask] == snapshot.status_code("paid")
+    totals = snapshot.final_total[mask]
+    counts, billed = _groups(codes, totals, size)
+    paid_totals = np.bincount(codes, weights=totals * paid, minlength=size)
+    # Each customer once, in the group of their referral source
+    seen = np.zeros(max(len(by_customer), int(customers.max()) + 1 if len(customers) else 0), dtype=np.bool_)
+    seen[customers] = True
+    seen_ids = np.flatnonzero(seen)
+    seen_known = seen_ids < len(by_customer)
+    customer_codes = np.zeros(len(seen_ids), dtype=np.int64)
+    customer_codes[seen_known] = by_customer[seen_ids[seen_known]].astype(np.int64) + 1
+    customer_counts = np.bincount(customer_codes, minlength=size)
+
+    rows = []
+    for key in np.flatnonzero(counts):
+        source = snapshot.referrals[key - 1] if key else ""
+        rows.append({
+            "referral_source": source or None,
+            "customer_count": int(customer_counts[key]),
+            "invoice_count": int(counts[key]),
+            "billed_amount": round(float(billed[key]), 2),
+            "paid_amount": round(float(paid_totals[key]), 2),
+            "revenue_per_customer": round(float(paid_totals[key] / customer_counts[key]), 2),
+        })
+    rows.sort(key=lambda row: -row["paid_amount"])
+    return rows
@@ -1,12 +1,18 @@
 # app/utils/auth.py
 from jose import JWTError, jwt
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 import bcrypt
+import threading
+import time
 from fastapi import HTTPException, Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer
 from starlette.status import HTTP_401_UNAUTHORIZED
-from app.database import get_db
+from app.database import SessionLocal
 from app import models
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 import os
@@ -17,6 +23,10 @@ SECRET_KEY = os.getenv("JWT_SECRET_KEY", "super-secret-key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7
 
+# Verified tokens are trusted for this long before the user row is checked again
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", 60))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 1024))
+
 auth_scheme = HTTPBearer()
 
 def hash_password(password: str) -> str:
@@ -31,25 +41,116 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user, detached from any session so it can be cached."""
+    id: int
+    email: str
+    user_name: str | None
+    is_admin: bool
+
+
+# token -> (monotonic expiry, Principal), least recently used first
+_principals = OrderedDict()
+_principals_lock = threading.Lock()
+
+
+def _cached_principal(token: str) -> Principal | None:
+    with _principals_lock:
+        entry = _principals.get(token)
+        if entry is None:
+            return None
+        expires, principal = entry
+        if expires <= time.monotonic():
+            del _principals[token]
+            return None
+        _principals.move_to_end(token)
+        return principal
+
+
+def _load_principal(token: str) -> Principal:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Invalid token")
+
+    email = payload.get("sub")
+    if not email:
+        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
+
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.email == email).first()
+        if not user or not user.is_active:
+            raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Inactive or missing user")
+        principal = Principal(id=user.id, email=user.email, user_name=user.user_name, is_admin=bool(user.is_admin))
+    finally:
+        db.close()
+
+    # Never trust a cached token past its own expiry
+    ttl = min(PRINCIPAL_CACHE_TTL, payload["exp"] - time.time()) if payload.get("exp") else PRINCIPAL_CACHE_TTL
+    with _principals_lock:
+        _principals[token] = (time.monotonic() + ttl, principal)
+        _principals.move_to_end(token)
+        while len(_principals) > PRINCIPAL_CACHE_SIZE:
+            _principals.popitem(last=False)
+    return principal
+
+
+def resolve_principal(token: str) -> Principal:
+    """Verify a bearer token, hitting the database only on a cache miss."""
+    return _cached_principal(token) or _load_principal(token)
+
+
+async def resolve_principal_async(token: str) -> Principal:
+    principal = _cached_principal(token)
+    if principal is None:
+        principal = await run_in_threadpool(_load_principal, token)
+    return principal
+
+
+def invalidate_principal(user_id: int):
+    with _principals_lock:
+        for token in [t for t, (_, p) in _principals.items() if p.id == user_id]:
+            del _principals[token]
+
+
 async def verify_token(
     request: Request,
-    db: Session = Depends(get_db),
     credentials: HTTPBearer = Depends(auth_scheme)
 ):
     if request.method == "OPTIONS":
         return None
 
-    token = credentials.credentials
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email = payload.get("sub")
-        if not email:
-            raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
+    # The auth middleware usually resolved it already for this request
+    principal = getattr(request.state, "principal", None)
+    if principal is None:
+        principal = await resolve_principal_async(credentials.credentials)
+        request.state.principal = principal
+    return principal
 
-        user = db.query(models.User).filter(models.User.email == email).first()
-        if not user or not user.is_active:
-            raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Inactive or missing user")
 
-        return user
-    except JWTError:
-        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Invalid token")
+# Deactivated, edited or deleted users drop out of the cache once the change commits
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _collect_changed_user(mapper, connection, target):
+    session = inspect(target).session
+    if session is None:
+        return
+    state = inspect(target)
+    # after_update also fires for users that were only dirty through a backref
+    # (e.g. an invoice assigned to a tech); those keep their cached principal
+    if not state.deleted and not state.was_deleted and not session.is_modified(target, include_collections=False):
+        return
+    session.info.setdefault("principal_user_ids", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop("principal_user_ids", set()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session):
+    session.info.pop("principal_user_ids", None)
@@ -0,0 +1,314 @@
+# backend/app/utils/autocomplete.py
+"""Line item description autocomplete.
+
+line_item_descriptions keeps one row per distinct normalized description:
+how many line items use it, when it was last used, and its recent unit
+prices. Mapper events book every line item insert, edit and delete into it
+within the same transaction; Core inserts must call record_description_usage
+themselves. Each process serves lookups from an in-memory trigram index
+over those rows, ranked by use count weighted by recency. If the table ever
+drifts, rebuild it from line_items:
+
+    python -m app.utils.autocomplete
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, event, inspect, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+from app.utils.customer_search import inner_trigrams, trigrams
+
+# Unit prices kept per description for the median hint
+PRICE_SAMPLES = 25
+# A description's weight halves for every this many days since it was last used
+RECENCY_HALF_LIFE_DAYS = 90
+# Re-rank and reload the in-memory index this often so other processes' writes show up
+AUTOCOMPLETE_INDEX_TTL = int(os.getenv("AUTOCOMPLETE_INDEX_TTL", 300))
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def description_key(description: Optional[str]) -> str:
+    return " ".join((description or "").lower().split())
+
+
+@dataclass(frozen=True)
+class DescriptionHint:
+    description: str
+    use_count: int
+    last_used_at: Optional[datetime]
+    last_unit_price: Optional[float]
+    median_unit_price: Optional[float]
+
+
+def _hint(description, use_count, last_used_at, last_unit_price, recent_prices) -> DescriptionHint:
+    median = round(statistics.median(recent_prices), 2) if recent_prices else None
+    return DescriptionHint(description, use_count, last_used_at, last_unit_price, median)
+
+
+def _weight(hint: DescriptionHint, now: datetime) -> float:
+    if hint.last_used_at is None:
+        return float(hint.use_count)
+    age_days = max((now - hint.last_used_at).total_seconds(), 0) / 86400
+    return hint.use_count * 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+
+
+class DescriptionIndex:
+    """Trigram postings over line_item_descriptions for one process.
+
+    Keys are ordered best first when the index is built, and every posting
+    list keeps that order, so a lookup stops at the first `limit` verified
+    hits. Descriptions first seen after the build are appended at the end
+    and counts changed since then are served but not re-ranked until the
+    next rebuild.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hints: dict[str, DescriptionHint] = {}
+        self._order: list[str] = []
+        self._postings: dict[str, list[str]] = {}
+        self._built_at = 0.0
+
+    def _add(self, key: str):
+        self._order.append(key)
+        for gram in trigrams(key):
+            self._postings.setdefault(gram, []).append(key)
+
+    def rebuild(self, db: Session):
+        table = models.LineItemDescription.__table__
+        rows = db.execute(select(table).where(table.c.use_count > 0)).all()
+        now = datetime.utcnow()
+        hints = {
+            row.key: _hint(row.description, row.use_count, row.last_used_at, row.last_unit_price, row.recent_prices)
+            for row in rows
+        }
+        with self._lock:
+            self._hints, self._order, self._postings = hints, [], {}
+            for key in sorted(hints, key=lambda key: (-_weight(hints[key], now), key)):
+                self._add(key)
+            self._built_at = time.monotonic()
+
+    def ensure_fresh(self, db: Session):
+        if time.monotonic() - self._built_at > AUTOCOMPLETE_INDEX_TTL:
+            self.rebuild(db)
+
+    def apply(self, changes: dict):
+        """{key: DescriptionHint} from a committed session."""
+        with self._lock:
+            if not self._built_at:
+                return
+            for key, hint in changes.items():
+                if key not in self._hints:
+                    self._add(key)
+                self._hints[key] = hint
+
+    def search(self, q: str, limit: int) -> list[DescriptionHint]:
+        """The best `limit` descriptions containing q; one- and two-letter queries match word prefixes only."""
+        with self._lock:
+            inner = inner_trigrams(q)
+            words = _WORD.findall(q)
+            if inner:
+                # Every key containing q has all of its inner trigrams: walk the rarest one's list
+                candidates = min((self._postings.get(gram, []) for gram in inner), key=len)
+            elif words:
+                candidates = self._postings.get(f"  {words[0]}"[-3:], [])
+            else:
+                candidates = self._order
+
+            hits, seen = [], set()
+            for key in candidates:
+                hint = self._hints.get(key)
+                if key in seen or hint is None or hint.use_count <= 0:
+                    continue
+                position = key.find(q)
+                if position < 0 or (not inner and position and key[position - 1].isalnum()):
+                    continue
+                seen.add(key)
+                hits.append(hint)
+                if len(hits) == limit:
+                    break
+        return hits
+
+
+description_index = DescriptionIndex()
+
+
+def record_description_usage(session: Session, usages: list[tuple]):
+    """Book (description, count delta, unit price or None) tuples into line_item_descriptions.
+
+    A positive delta marks the description as used now; a price is recorded
+    as its latest price. One SELECT for the touched keys, one upsert for all.
+    """
+    changes = {}
+    for description, count, unit_price in usages:
+        key = description_key(description)
+        if not key:
+            continue
+        change = changes.setdefault(key, {"description": None, "count": 0, "prices": []})
+        change["count"] += count
+        if count > 0:
+            change["description"] = " ".join(description.split())
+        if unit_price is not None:
+            change["prices"].append(unit_price)
+    if not changes:
+        return
+
+    table = models.LineItemDescription.__table__
+    existing = {row.key: row for row in session.execute(select(table).where(table.c.key.in_(changes)))}
+    now = datetime.utcnow()
+    rows, hints = [], {}
+    for key, change in changes.items():
+        row = existing.get(key)
+        prices = ((list(row.recent_prices or []) if row else []) + change["prices"])[-PRICE_SAMPLES:]
+        values = {
+            "key": key,
+            "description": change["description"] or (row.description if row else key),
+            "use_count": change["count"],
+            "last_used_at": now if change["description"] else (row.last_used_at if row else None),
+            "last_unit_price": change["prices"][-1] if change["prices"] else (row.last_unit_price if row else None),
+            "recent_prices": prices,
+        }
+        rows.append(values)
+        use_count = (row.use_count if row else 0) + change["count"]
+        hints[key] = _hint(values["description"], use_count, values["last_used_at"], values["last_unit_price"], prices)
+
+    insert = sqlite_insert(table) if session.get_bind().dialect.name == "sqlite" else postgresql_insert(table)
+    session.execute(
+        insert.on_conflict_do_update(
+            index_elements=["key"],
+            set_={
+                # Counts are added in SQL so concurrent writers don't lose each other's usage
+                "use_count": table.c.use_count + insert.excluded.use_count,
+                "description": insert.excluded.description,
+                "last_used_at": insert.excluded.last_used_at,
+                "last_unit_price": insert.excluded.last_unit_price,
+                "recent_prices": insert.excluded.recent_prices,
+            },
+        ),
+        rows,
+    )
+    session.info.setdefault("description_index_changes", {}).update(hints)
+
+
+def _committed(state, field):
+    history = state.attrs[field].history
+    return history.deleted[0] if history.deleted else state.attrs[field].value
+
+
+@event.listens_for(models.LineItem, "after_insert")
+def _line_item_inserted(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("line_item_usage", []).append((target.description, 1, target.unit_price))
+
+
+@event.listens_for(models.LineItem, "after_update")
+def _line_item_updated(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is None:
+        return
+    state = inspect(target)
+    usage = session.info.setdefault("line_item_usage", [])
+    old = _committed(state, "description")
+    if description_key(old) != description_key(target.description):
+        usage.append((old, -1, None))
+        usage.append((target.description, 1, target.unit_price))
+    elif state.attrs.unit_price.history.has_changes():
+        usage.append((target.description, 0, target.unit_price))
+
+
+@event.listens_for(models.LineItem, "after_delete")
+def _line_item_deleted(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("line_item_usage", []).append((_committed(inspect(target), "description"), -1, None))
+
+
+@event.listens_for(Session, "after_flush")
+def _book_line_item_usage(session, flush_context):
+    usages = session.info.pop("line_item_usage", None)
+    if usages:
+        record_description_usage(session, usages)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_index_changes(session):
+    changes = session.info.pop("description_index_changes", None)
+    if changes:
+        description_index.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_index_changes(session):
+    session.info.pop("line_item_usage", None)
+    session.info.pop("description_index_changes", None)
+
+
+def suggest_descriptions(db: Session, q: str, limit: int = 10) -> list[DescriptionHint]:
+    q = description_key(q)
+    if not q:
+        return []
+    description_index.ensure_fresh(db)
+    return description_index.search(q, limit)
+
+
+def rebuild_description_stats(db: Session) -> int:
+    """Recreate line_item_descriptions from every line item; returns the number of descriptions."""
+    line_items, invoices = models.LineItem.__table__, models.Invoice.__table__
+    stats = {}
+    rows = db.execute(
+        select(line_items.c.description, line_items.c.unit_price, invoices.c.date)
+        .join(invoices, invoices.c.id == line_items.c.invoice_id)
+        .order_by(line_items.c.id)
+    )
+    for description, unit_price, used_on in rows:
+        key = description_key(description)
+        if not key:
+            continue
+        entry = stats.setdefault(key, {"key": key, "use_count": 0, "last_used_at": None, "recent_prices": []})
+        entry["description"] = " ".join(description.split())
+        entry["use_count"] += 1
+        if used_on is not None:
+            used_at = datetime(used_on.year, used_on.month, used_on.day)
+            entry["last_used_at"] = max(entry["last_used_at"] or used_at, used_at)
+        if unit_price is not None:
+            entry["last_unit_price"] = unit_price
+            entry["recent_prices"] = (entry["recent_prices"] + [unit_price])[-PRICE_SAMPLES:]
+
+    table = models.LineItemDescription.__table__
+    db.execute(delete(table))
+    if stats:
+        db.execute(table.insert(), [{"last_unit_price": None, **entry} for entry in stats.values()])
+    db.commit()
+    description_index.rebuild(db)
+    return len(stats)
+
+
+def main(argv=None) -> int:
+    argparse.ArgumentParser(description="Rebuild line item autocomplete stats from line_items").parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        count = rebuild_description_stats(db)
+    finally:
+        db.close()
+    print(f"✅ Rebuilt {count} line item description(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+# backend/app/utils/balances.py
+"""Customer open_balance / invoice_count, kept in step with invoice writes.
+
+Every ORM flush that creates, edits, archives or deletes invoices adjusts the
+affected customers in the same transaction. Core inserts bypass the ORM and
+must call apply_customer_deltas themselves. If the counters ever drift, rebuild
+them from the invoices table:
+
+    python -m app.utils.balances            # fix drifted customers
+    python -m app.utils.balances --dry-run  # report only
+"""
+import argparse
+import sys
+from collections import defaultdict
+
+from sqlalchemy import and_, bindparam, case, event, func, inspect, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app import models
+from app.database import SessionLocal
+from app.utils.statements import open_invoice_filter
+
+_FIELDS = ("customer_id", "status", "is_estimate", "is_active", "final_total")
+
+
+def invoice_balance(customer_id, status, is_estimate, is_active, final_total) -> tuple[float, int]:
+    """(open balance, invoice count) one invoice adds to its customer; mirrors open_invoice_filter()."""
+    if customer_id is None or is_estimate is not False or is_active is not True:
+        return 0.0, 0
+    is_open = status is not None and status != "paid"
+    return (final_total or 0.0) if is_open else 0.0, 1
+
+
+def apply_customer_deltas(session: Session, deltas: dict):
+    """Add {customer_id: [balance, count]} to the stored counters, one UPDATE per customer."""
+    customers = models.Customer.__table__
+    for customer_id, (balance, count) in deltas.items():
+        balance = round(balance, 2)
+        if not balance and not count:
+            continue
+        session.execute(
+            update(customers)
+            .where(customers.c.id == customer_id)
+            .values(
+                open_balance=customers.c.open_balance + balance,
+                invoice_count=customers.c.invoice_count + count,
+            )
+        )
+        # Keep a customer already in the session in step, so responses built before commit agree
+        customer = session.identity_map.get(inspect(models.Customer).identity_key_from_primary_key((customer_id,)))
+        if customer is not None and "open_balance" in customer.__dict__:
+            set_committed_value(customer, "open_balance", round((customer.open_balance or 0.0) + balance, 2))
+            set_committed_value(customer, "invoice_count", (customer.invoice_count or 0) + count)
+
+
+def values_before(state, fields=_FIELDS) -> tuple:
+    """An object's fields as last committed, read from attribute history inside a flush."""
+    values = []
+    for field in fields:
+        history = state.attrs[field].history
+        if history.deleted:
+            values.append(history.deleted[0])
+        elif history.added:
+            # Changed without the old value loaded; the reconcile command will square it up
+            values.append(history.added[0])
+        else:
+            values.append(state.attrs[field].value)
+    return tuple(values)
+
+
+def values_after(state, fields=_FIELDS) -> tuple:
+    return tuple(state.attrs[field].value for field in fields)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_invoice_balances(session, flush_context):
+    deltas = defaultdict(lambda: [0.0, 0])
+
+    def add(values, sign):
+        balance, count = invoice_balance(*values)
+        if count:
+            deltas[values[0]][0] += sign * balance
+            deltas[values[0]][1] += sign * count
+
+    for obj in session.new:
+        if isinstance(obj, models.Invoice):
+            add(values_after(inspect(obj)), 1)
+    for obj in session.dirty:
+        if isinstance(obj, models.Invoice) and session.is_modified(obj, include_collections=False):
+            state = inspect(obj)
+            add(values_before(state), -1)
+            add(values_after(state), 1)
+    for obj in session.deleted:
+        if isinstance(obj, models.Invoice):
+            add(values_before(inspect(obj)), -1)
+
+    if deltas:
+        apply_customer_deltas(session, deltas)
+
+
+def reconcile_customer_balances(db: Session, dry_run: bool = False) -> list[dict]:
+    """Recompute every customer's counters from the invoices table and fix the ones that drifted."""
+    counted = and_(models.Invoice.is_estimate == False, models.Invoice.is_active == True)
+    actual = {
+        row.customer_id: (round(row.balance or 0.0, 2), row.count or 0)
+        for row in db.query(
+            models.Invoice.customer_id,
+            func.sum(case((and_(*open_invoice_filter()), models.Invoice.final_total), else_=0)).label("balance"),
+            func.sum(case((counted, 1), else_=0)).label("count"),
+        ).group_by(models.Invoice.customer_id)
+    }
+
+    drifted = []
+    for customer in db.query(models.Customer.id, models.Customer.open_balance, models.Customer.invoice_count):
+        balance, count = actual.get(customer.id, (0.0, 0))
+        if round(customer.open_balance or 0.0, 2) != balance or (customer.invoice_count or 0) != count:
+            drifted.append({
+                "customer_id": customer.id,
+                "open_balance": customer.open_balance,
+                "invoice_count": customer.invoice_count,
+                "actual_open_balance": balance,
+                "actual_invoice_count": count,
+            })
+
+    if drifted and not dry_run:
+        customers = models.Customer.__table__
+        db.execute(
+            update(customers)
+            .where(customers.c.id == bindparam("row_id"))
+            .values(open_balance=bindparam("row_balance"), invoice_count=bindparam("row_count")),
+            [
+                {"row_id": row["customer_id"], "row_balance": row["actual_open_balance"], "row_count": row["actual_invoice_count"]}
+                for row in drifted
+            ],
+        )
+        db.commit()
+    return drifted
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild customer open balances and invoice counts")
+    parser.add_argument("--dry-run", action="store_true", help="report drifted customers without fixing them")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        drifted = reconcile_customer_balances(db, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    for row in drifted:
+        print(
+            f"{'🔎' if args.dry_run else '🔧'} customer {row['customer_id']}: "
+            f"open_balance {row['open_balance']} -> {row['actual_open_balance']}, "
+            f"invoice_count {row['invoice_count']} -> {row['actual_invoice_count']}"
+        )
+    print(f"✅ {len(drifted)} customer(s) {'would be ' if args.dry_run else ''}corrected")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+# backend/app/utils/customer_search.py
+"""Fuzzy customer search over a normalized customers.search_text column.
+
+search_text holds the lowercased name and email plus the phone as bare
+digits, kept current by mapper events. Postgres matches it through a
+pg_trgm GIN index (substring LIKE or word similarity, ranked by
+word_similarity). SQLite has no trigram index, so each process keeps an
+in-memory trigram index over the same column instead.
+"""
+import math
+import os
+import re
+import threading
+import time
+
+from sqlalchemy import event, func, literal, or_
+from sqlalchemy.orm import Session
+
+from app import models
+
+# Minimum share of the query's trigrams a fuzzy hit must contain (pg_trgm's word_similarity_threshold default)
+SIMILARITY_THRESHOLD = 0.6
+# Rebuild the in-memory index this often so writes from other processes show up
+CUSTOMER_SEARCH_INDEX_TTL = int(os.getenv("CUSTOMER_SEARCH_INDEX_TTL", 300))
+
+_PHONE_QUERY = re.compile(r"[\d\s()+.\-]+")
+_WORD = re.compile(r"[^\W_]+")
+
+
+def customer_search_text(first_name, last_name, email, phone) -> str:
+    words = " ".join(part.strip().lower() for part in (first_name, last_name, email) if part)
+    digits = re.sub(r"\D", "", phone or "")
+    return f"{words} {digits}".strip()
+
+
+def normalize_query(q: str) -> str:
+    """Phone-looking queries become bare digits; anything else is lowercased and whitespace-collapsed."""
+    q = q.strip().lower()
+    if _PHONE_QUERY.fullmatch(q) and sum(ch.isdigit() for ch in q) >= 3:
+        return re.sub(r"\D", "", q)
+    return " ".join(q.split())
+
+
+def trigrams(text: str) -> set[str]:
+    """pg_trgm-style trigrams: each alphanumeric word padded with two spaces in front and one behind."""
+    grams = set()
+    for word in _WORD.findall(text):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def inner_trigrams(q: str) -> set[str]:
+    # Unpadded trigrams inside each query word; every one of them is in any text containing q
+    grams = set()
+    for word in _WORD.findall(q):
+        grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+@event.listens_for(models.Customer, "before_insert")
+@event.listens_for(models.Customer, "before_update")
+def _set_search_text(mapper, connection, target):
+    target.search_text = customer_search_text(target.first_name, target.last_name, target.email, target.phone)
+
+
+def _probe(gram: str) -> str:
+    # A padded trigram as a substring of _canonical(): "  k" -> " k", " ko" -> " ko", "ky " stays
+    return " " + gram.lstrip(" ") if gram.startswith(" ") else gram
+
+
+def _canonical(text: str) -> str:
+    return " " + " ".join(_WORD.findall(text)) + " "
+
+
+class NgramIndex:
+    """Trigram postings over customers.search_text for one process.
+
+    Posting lists are append-only; an edited customer leaves its old id
+    behind in some lists, which is harmless because every candidate is
+    checked against its current text. Periodic rebuilds compact them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._texts: dict[int, str] = {}
+        self._canonical: dict[int, str] = {}
+        self._postings: dict[str, list[int]] = {}
+        self._built_at = 0.0
+
+    def _add(self, customer_id: int, text: str):
+        self._texts[customer_id] = text
+        self._canonical[customer_id] = _canonical(text)
+        for gram in trigrams(text):
+            self._postings.setdefault(gram, []).append(customer_id)
+
+    def rebuild(self, db: Session):
+        rows = db.query(models.Customer.id, models.Customer.search_text).order_by(models.Customer.id).all()
+        with self._lock:
+            self._texts, self._canonical, self._postings = {}, {}, {}
+            for customer_id, text in rows:
+                self._add(customer_id, text or "")
+            self._built_at = time.monotonic()
+
+    def ensure_fresh(self, db: Session):
+        if time.monotonic() - self._built_at > CUSTOMER_SEARCH_INDEX_TTL:
+            self.rebuild(db)
+
+    def apply(self, changes: dict):
+        """{customer_id: search_text, or None if deleted} from a committed session."""
+        with self._lock:
+            if not self._built_at:
+                return
+            for customer_id, text in changes.items():
+                if text is None:
+                    self._texts.pop(customer_id, None)
+                    self._canonical.pop(customer_id, None)
+                else:
+                    self._add(customer_id, text)
+
+    def search(self, q: str, wanted: int) -> list[int]:
+        """The first `wanted` customer ids for q, best first.
+
+        Word-prefix hits rank ahead of other substring hits (ties by id). Queries
+        of one or two characters only match word prefixes. Fuzzy hits, ranked by
+        trigram similarity, fill whatever the substring hits leave of the page.
+        """
+        with self._lock:
+            texts, postings = self._texts, self._postings
+            inner = inner_trigrams(q)
+            words = _WORD.findall(q)
+            if inner:
+                # Every text containing q has all of its inner trigrams: verify the rarest one's list
+                candidates = set(min((postings.get(gram, []) for gram in inner), key=len))
+            elif words:
+                candidates = set(postings.get(f"  {words[0]}"[-3:], []))
+            else:
+                candidates = texts.keys()
+
+            matches = []
+            for customer_id in candidates:
+                text = texts.get(customer_id)
+                position = text.find(q) if text is not None else -1
+                if position < 0 or (not inner and words and position and text[position - 1].isalnum()):
+                    continue
+                word_start = position == 0 or not text[position - 1].isalnum()
+                matches.append((0 if word_start else 1, 0.0, customer_id))
+            matches.sort()
+
+            query_grams = trigrams(q)
+            if len(matches) < wanted and inner and query_grams:
+                # A fuzzy hit needs `need` of the query's trigrams, so it must be in one of the
+                # len - need + 1 rarest posting lists
+                need = math.ceil(SIMILARITY_THRESHOLD * len(query_grams))
+                lists = sorted((postings.get(gram, []) for gram in query_grams), key=len)
+                probes = [_probe(gram) for gram in query_grams]
+                matched = {customer_id for _, _, customer_id in matches}
+                fuzzy = []
+                for customer_id in set().union(*lists[:len(query_grams) - need + 1]) - matched:
+                    canonical = self._canonical.get(customer_id)
+                    if canonical is None:
+                        continue
+                    hits = sum(probe in canonical for probe in probes)
+                    if hits >= need:
+                        fuzzy.append((2, -hits / len(probes), customer_id))
+                fuzzy.sort()
+                matches += fuzzy
+
+        return [customer_id for _, _, customer_id in matches[:wanted]]
+
+
+ngram_index = NgramIndex()
+
+
+@event.listens_for(models.Customer, "after_insert")
+@event.listens_for(models.Customer, "after_update")
+@event.listens_for(models.Customer, "after_delete")
+def _collect_search_change(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        deleted = target in session.deleted
+        session.info.setdefault("customer_search_changes", {})[target.id] = None if deleted else target.search_text
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_search_changes(session):
+    changes = session.info.pop("customer_search_changes", None)
+    if changes:
+        ngram_index.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_search_changes(session):
+    session.info.pop("customer_search_changes", None)
+
+
+def search_customers(db: Session, q: str, limit: int, offset: int = 0) -> list[models.Customer]:
+    """One page of customers matching q, best matches first."""
+    q = normalize_query(q)
+    if not q:
+        return []
+
+    search_text = models.Customer.search_text
+    if db.get_bind().dialect.name == "postgresql":
+        # Both predicates are served by the gin_trgm_ops index on search_text
+        return (
+            db.query(models.Customer)
+            .filter(or_(search_text.contains(q, autoescape=True), literal(q).op("<%")(search_text)))
+            .order_by(func.word_similarity(q, search_text).desc(), models.Customer.id)
+            .offset(offset)
+            .limit(limit)
+            .all()
+        )
+
+    ngram_index.ensure_fresh(db)
+    ids = ngram_index.search(q, offset + limit)[offset:]
+    if not ids:
+        return []
+    by_id = {c.id: c for c in db.query(models.Customer).filter(models.Customer.id.in_(ids))}
+    return [by_id[customer_id] for customer_id in ids if customer_id in by_id]
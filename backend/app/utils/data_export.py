@@ -0,0 +1,117 @@
+# backend/app/utils/data_export.py
+"""Flat invoice + customer + line item export, streamed as CSV or NDJSON.
+
+One row per line item (invoices without items get one row with the item
+columns empty), from a single joined query read through a server-side
+cursor EXPORT_BATCH_SIZE rows at a time. Each batch is formatted, optionally
+gzipped, and handed to the response before the next one is fetched, so
+memory stays flat whatever the row count.
+"""
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import date, datetime
+from typing import Iterator
+
+from sqlalchemy import Select, select
+
+from app import models
+from app.database import SessionLocal
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 2000))
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+_invoice, _customer, _item, _tech = models.Invoice, models.Customer, models.LineItem, models.User
+
+EXPORT_COLUMNS = (
+    _invoice.id.label("invoice_id"),
+    _invoice.number.label("invoice_number"),
+    _invoice.date.label("invoice_date"),
+    _invoice.due_date,
+    _invoice.status,
+    _invoice.is_estimate,
+    _invoice.is_active,
+    _invoice.payment_type,
+    _invoice.paid_at,
+    _invoice.total.label("subtotal"),
+    _invoice.discount,
+    _invoice.tax,
+    _invoice.final_total,
+    _customer.id.label("customer_id"),
+    _customer.first_name.label("customer_first_name"),
+    _customer.last_name.label("customer_last_name"),
+    _customer.email.label("customer_email"),
+    _customer.phone.label("customer_phone"),
+    _customer.referral_source,
+    _tech.id.label("tech_id"),
+    _tech.user_name.label("tech_name"),
+    _item.id.label("line_item_id"),
+    _item.description,
+    _item.quantity,
+    _item.unit_price,
+)
+EXPORT_HEADER = [column.key for column in EXPORT_COLUMNS]
+
+
+def export_query() -> Select:
+    """Every invoice row joined to its customer, tech and line items; filter with filter_invoices()."""
+    return (
+        select(*EXPORT_COLUMNS)
+        .select_from(_invoice)
+        .outerjoin(_customer, _customer.id == _invoice.customer_id)
+        .outerjoin(_tech, _tech.id == _invoice.tech_id)
+        .outerjoin(_item, _item.invoice_id == _invoice.id)
+        .order_by(_invoice.date, _invoice.id, _item.id)
+    )
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _csv_batches(batches) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADER)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_batches(batches) -> Iterator[str]:
+    dumps = json.JSONEncoder(default=_json_default, separators=(",", ":")).encode
+    for rows in batches:
+        yield "".join(dumps(dict(zip(EXPORT_HEADER, row))) + "\n" for row in rows)
+
+
+def stream_export(statement: Select, export_format: str, compress: bool = False) -> Iterator[bytes]:
+    """Yield the statement's rows as CSV or NDJSON bytes, gzipped if asked.
+
+    Runs after the request's session is closed, so it opens its own.
+    """
+    format_batches = _csv_batches if export_format == "csv" else _ndjson_batches
+    encoder = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for text in format_batches(result.partitions()):
+            data = text.encode("utf-8")
+            if encoder is not None:
+                data = encoder.compress(data)
+            if data:
+                yield data
+        if encoder is not None:
+            yield encoder.flush()
+    finally:
+        db.close()
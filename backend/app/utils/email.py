@@ -1,25 +1,18 @@
 import io
 import os
-import smtplib
+from datetime import datetime
 from email.message import EmailMessage
-from app.pdf import generate_invoice_pdf_from_html
+from sqlalchemy.orm import Session
 from app import models
-from schemas.invoices import InvoiceOut
 from dotenv import load_dotenv
-from app.database import SessionLocal
+from app.utils.outbox import SMTP_USER, SMTP_BACKUP, enqueue_email
 
     
 # Load environment variables
 load_dotenv()
 
-SMTP_HOST = os.getenv("SMTP_HOST")
-SMTP_PORT = int(os.getenv("SMTP_PORT", 465))  # Default to 465 for SSL
-SMTP_USER = os.getenv("SMTP_USER")
-SMTP_PASS = os.getenv("SMTP_PASS")
-SMTP_BACKUP = os.getenv("SMTP_BACKUP")
-
 BASE_PUBLIC_URL = os.getenv("PUBLIC_FRONTEND_URL", "https://192.168.1.187:3000")
-def send_invoice_email(to_email: str, subject: str, body: str, attachment: bytes, filename: str):
+def send_invoice_email(to_email: str, subject: str, body: str, attachment: bytes, filename: str, db: Session | None = None):
     msg = EmailMessage()
     msg["Subject"] = subject
     msg["From"] = SMTP_USER
@@ -35,15 +28,11 @@ def send_invoice_email(to_email: str, subject: str, body: str, attachment: bytes
         filename=filename
     )
 
-    try:
-        with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT) as smtp:
-            smtp.login(SMTP_USER, SMTP_PASS)
-            smtp.send_message(msg)
-            print(f"✅ Sent email to {to_email}, bcc {SMTP_BACKUP}")
-    except Exception as e:
-        print(f"❌ Email send failed: {e}")
-        raise
-def send_email(to: str, subject: str, body: str):
+    # Delivered by the outbox worker so an SMTP stall never blocks the request;
+    # with db, only once the caller's transaction commits
+    enqueue_email(msg, db=db)
+    print(f"📬 Queued email to {to_email}, bcc {SMTP_BACKUP}")
+def send_email(to: str, subject: str, body: str, db: Session | None = None):
     FROM_EMAIL = os.getenv("FROM_EMAIL", "billing@zuperhandy.com")
 
     msg = EmailMessage()
@@ -52,48 +41,108 @@ def send_email(to: str, subject: str, body: str):
     msg["Subject"] = subject
     msg.set_content(body)
 
-    try:
-        with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT) as smtp:
-            smtp.login(SMTP_USER, SMTP_PASS)
-            smtp.send_message(msg)
-            print(f"✅ Sent email to {to}, ")
-    except Exception as e:
-        print(f"❌ Email send failed: {e}")
-        raise
+    enqueue_email(msg, db=db)
+    print(f"📬 Queued email to {to}")
 
-def send_public_invoice_email(invoice: "models.Invoice"):
+def send_public_invoice_email(invoice: "models.Invoice", db: Session, pdf_bytes: bytes):
     doc_type = "Estimate" if invoice.is_estimate else "Invoice"
-    db = SessionLocal()
 
-    invoice_data = InvoiceOut.from_orm(invoice).dict()
-    
     public_token = db.query(models.PublicToken).filter(models.PublicToken.invoice_id == invoice.id).first()
     if not public_token:
         raise Exception("Public token not found for invoice")
 
     public_link = f"{BASE_PUBLIC_URL}/public/invoice/{public_token.token}"
 
+    send_invoice_email(
+        to_email=invoice.customer.email,
+        subject=f"{doc_type} #{invoice.number} - Signed Copy",
+        body=f"Thank you for signing your {doc_type.lower()}! Attached is your signed copy.\n\nView it anytime at {public_link}",
+        attachment=io.BytesIO(pdf_bytes),
+        filename=f"{doc_type.lower()}_{invoice.number}_signed.pdf",
+        db=db,
+    )
+
+def send_resend_email(invoice: "models.Invoice", pdf_bytes: bytes, db: Session | None = None):
+    doc_type = "Estimate" if invoice.is_estimate else "Invoice"
+
+    send_invoice_email(
+        to_email=invoice.customer.email,
+        subject=f"{doc_type} #{invoice.number}",
+        body=f"Here is your signed {doc_type.lower()} #{invoice.number} for your records.",
+        attachment=io.BytesIO(pdf_bytes),
+        filename=f"{doc_type}_{invoice.number}.pdf",
+        db=db,
+    )
+
+def send_review_request_email(invoice: "models.Invoice", public_url: str, pdf_bytes: bytes, db: Session | None = None):
     if invoice.is_estimate:
-        signature_base64 = invoice.estimate_signature_base64
-        signed_at = invoice.estimate_signed_at.strftime("%m/%d/%Y %H:%M") if invoice.estimate_signed_at else ""
+        signature = invoice.estimate_signature_base64
+        signed_at = invoice.estimate_signed_at.strftime("%m/%d/%Y %H:%M") if invoice.estimate_signed_at else None
         accepted = invoice.estimate_accepted
+        doc_type = "Estimate"
     else:
-        signature_base64 = invoice.signature_base64
-        signed_at = invoice.signed_at.strftime("%m/%d/%Y %H:%M") if invoice.signed_at else ""
+        signature = invoice.signature_base64
+        signed_at = invoice.signed_at.strftime("%m/%d/%Y %H:%M") if invoice.signed_at else None
         accepted = invoice.accepted
+        doc_type = "Invoice"
 
-    pdf_bytes = generate_invoice_pdf_from_html(
-        invoice_data,
-        signature_base64=signature_base64,
-        signed_at=signed_at,
-        accepted=accepted,
-        doc_type=doc_type,
-    )
+    if accepted and signature:
+        # ✅ Already signed and accepted
+        body = f"""
+{doc_type} #{invoice.number} has been signed and accepted on {signed_at} UTC.
+
+You can view or download your {doc_type.lower()} anytime at:
+{public_url}
+
+This is your copy for your records.
+"""
+        subject = f"{doc_type} #{invoice.number} - Signed Copy"
+        filename = f"{doc_type.lower()}_{invoice.number}_signed.pdf"
+    else:
+        # 🚨 Not signed yet - request signature
+        body = f"""
+You have a new {doc_type.lower()} #{invoice.number} ready for review.
+
+Please review, accept, and sign it here:
+{public_url}
+
+Thank you,
+ZuperHandy Team
+"""
+        subject = f"Action Required: {doc_type} #{invoice.number} - Please Accept and Sign"
+        filename = f"{doc_type.lower()}_{invoice.number}.pdf"
 
     send_invoice_email(
         to_email=invoice.customer.email,
-        subject=f"{doc_type} #{invoice.number} - Signed Copy",
-        body=f"Thank you for signing your {doc_type.lower()}! Attached is your signed copy.\n\nView it anytime at {public_link}",
+        subject=subject,
+        body=body,
         attachment=io.BytesIO(pdf_bytes),
-        filename=f"{doc_type.lower()}_{invoice.number}_signed.pdf",
-    )
\ No newline at end of file
+        filename=filename,
+        db=db,
+    )
+
+def send_statement_email(statement: dict, pdf_bytes: bytes, send_after: datetime | None = None, db: Session | None = None):
+    customer = statement["customer"]
+    statement_date = statement["statement_date"].strftime("%m/%d/%Y")
+
+    msg = EmailMessage()
+    msg["Subject"] = f"Statement of Account - {statement_date}"
+    msg["From"] = SMTP_USER
+    msg["To"] = customer["email"]
+    msg["Bcc"] = SMTP_BACKUP
+    msg.set_content(
+        f"Hi {customer['first_name']},\n\n"
+        f"Attached is your statement as of {statement_date}. "
+        f"You have {len(statement['invoices'])} open invoice(s) with a balance of ${statement['balance']:.2f}.\n\n"
+        "If you have already sent payment, thank you - please disregard this statement.\n\n"
+        "Thank you,\nZuperHandy Team"
+    )
+    msg.add_attachment(
+        pdf_bytes,
+        maintype="application",
+        subtype="pdf",
+        filename=f"statement_{statement['statement_date'].strftime('%Y%m%d')}.pdf",
+    )
+
+    # send_after spaces a statement run out so the SMTP server isn't flooded
+    enqueue_email(msg, db=db, send_after=send_after)
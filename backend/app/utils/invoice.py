@@ -1,14 +1,16 @@
 # backend/app/utils/invoice.py
+import sqlite3
 from datetime import date
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import HTTPException
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload, undefer_group
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from app import models
+from schemas.invoices import InvoiceOut
 
-def generate_invoice_number(db: Session) -> str:
-    today = date.today()
-    today_str = today.strftime("%Y%m%d")
-    prefix = f"INV-{today_str}-"
-
+def _highest_issued(db: Session, prefix: str) -> int:
+    # Numbers issued before the counter row existed (pre-counter data, or a counter row removed by hand)
     existing_numbers = db.query(models.Invoice.number).filter(
         models.Invoice.number.like(f"{prefix}%")
     ).all()
@@ -16,32 +18,175 @@ def generate_invoice_number(db: Session) -> str:
     existing_seqs = []
     for (number,) in existing_numbers:
         try:
-            seq = int(number.split("-")[-1])
-            existing_seqs.append(seq)
-        except:
+            existing_seqs.append(int(number.split("-")[-1]))
+        except ValueError:
             continue
+    return max(existing_seqs, default=0)
+
+def _insert_for(db: Session):
+    return sqlite_insert if db.get_bind().dialect.name == "sqlite" else postgresql_insert
+
+def _supports_upsert_returning(db: Session) -> bool:
+    dialect = db.get_bind().dialect
+    if dialect.name == "postgresql":
+        return True
+    # UPSERT ... RETURNING needs SQLite 3.35+
+    return dialect.name == "sqlite" and sqlite3.sqlite_version_info >= (3, 35, 0)
+
+def allocate_numbers(db: Session, kind: str, count: int = 1) -> list[str]:
+    """Reserve `count` consecutive numbers like {kind}-YYYYMMDD-001, normally in one statement.
+
+    The per-day counter row is bumped atomically and stays locked until the
+    caller's transaction ends, so concurrent creates never see the same
+    number, and a rolled-back create gives its numbers back.
+    """
+    prefix = f"{kind}-{date.today().strftime('%Y%m%d')}-"
+    counters = models.DocumentCounter.__table__
+    bump = update(counters).where(counters.c.prefix == prefix)
+
+    if _supports_upsert_returning(db):
+        last = db.execute(
+            _insert_for(db)(counters)
+            .values(prefix=prefix, last_value=count)
+            .on_conflict_do_update(index_elements=["prefix"], set_={"last_value": counters.c.last_value + count})
+            .returning(counters.c.last_value)
+        ).scalar_one()
+        if last == count:
+            # The row was just created: continue after numbers issued before it existed
+            issued = _highest_issued(db, prefix)
+            if issued:
+                last = db.execute(
+                    bump.values(last_value=counters.c.last_value + issued).returning(counters.c.last_value)
+                ).scalar_one()
+    else:
+        # Older SQLite: the UPDATE takes the database write lock, so the read-back is ours
+        if db.execute(bump.values(last_value=counters.c.last_value + count)).rowcount == 0:
+            db.execute(
+                _insert_for(db)(counters)
+                .values(prefix=prefix, last_value=_highest_issued(db, prefix))
+                .on_conflict_do_nothing(index_elements=["prefix"])
+            )
+            db.execute(bump.values(last_value=counters.c.last_value + count))
+        last = db.execute(select(counters.c.last_value).where(counters.c.prefix == prefix)).scalar_one()
 
-    next_seq = max(existing_seqs, default=0) + 1
-    invoice_number = f"{prefix}{str(next_seq).zfill(3)}"
-    return invoice_number
+    return [f"{prefix}{str(seq).zfill(3)}" for seq in range(last - count + 1, last + 1)]
+
+def generate_invoice_number(db: Session) -> str:
+    return allocate_numbers(db, "INV")[0]
 
 def generate_estimate_number(db: Session) -> str:
-    today = date.today()
-    today_str = today.strftime("%Y%m%d")
-    prefix = f"EST-{today_str}-"
+    return allocate_numbers(db, "EST")[0]
 
-    existing_numbers = db.query(models.Invoice.number).filter(
-        models.Invoice.number.like(f"{prefix}%")
-    ).all()
+def invoice_totals(items, discount: float | None, tax: float | None) -> tuple[float, float]:
+    """(subtotal, final_total) for a set of line items, as stored on the invoice."""
+    subtotal = sum(item.quantity * item.unit_price for item in items)
+    final_total = (subtotal - (discount or 0.0)) * (1 + (tax or 0.0) / 100)
+    return subtotal, round(final_total, 2)
 
-    existing_seqs = []
-    for (number,) in existing_numbers:
-        try:
-            seq = int(number.split("-")[-1])
-            existing_seqs.append(seq)
-        except:
+LINE_ITEM_FIELDS = ("description", "quantity", "unit_price")
+
+def apply_line_items(invoice: models.Invoice, items) -> dict:
+    """Bring invoice.items in line with items as a diff and return per-kind row counts.
+
+    Items carrying the id of one of the invoice's line items update that row in
+    place (or leave it alone if nothing changed); items without a known id are
+    inserted and rows missing from items are deleted through delete-orphan.
+    """
+    existing = {item.id: item for item in invoice.items}
+    counts = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+    merged = []
+    for item in items:
+        db_item = existing.pop(item.id, None) if item.id is not None else None
+        values = item.dict(include=set(LINE_ITEM_FIELDS))
+        if db_item is None:
+            merged.append(models.LineItem(**values))
+            counts["inserted"] += 1
             continue
+        changed = {field: value for field, value in values.items() if getattr(db_item, field) != value}
+        for field, value in changed.items():
+            setattr(db_item, field, value)
+        counts["updated" if changed else "unchanged"] += 1
+        merged.append(db_item)
+
+    counts["deleted"] = len(existing)
+    invoice.items = merged
+    return counts
+
+def link_invoice_refs(db: Session, invoice: models.Invoice, customer_id: int, tech_id: int | None):
+    """Point invoice.customer / invoice.tech at the given ids.
+
+    Assigning the objects rather than the ids keeps the in-memory graph right
+    for serializing before commit; rows already in the session cost no query.
+    """
+    customer = db.get(models.Customer, customer_id)
+    if not customer:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    invoice.customer = customer
+    tech = None
+    if tech_id is not None:
+        tech = db.get(models.User, tech_id)
+        if not tech:
+            raise HTTPException(status_code=404, detail="Tech not found")
+    invoice.tech = tech
+
+def serialize_invoice(invoice: models.Invoice, schema=InvoiceOut):
+    """Serialize an invoice loaded through invoice_read_query (or built in this session)."""
+    out = schema.from_orm(invoice)
+    if invoice.tech:
+        out.user_name = invoice.tech.user_name or invoice.tech.email
+    return out
+
+def invoice_pdf_args(invoice: models.Invoice) -> dict:
+    """Keyword arguments for generate_invoice_pdf_from_html / submit_invoice_pdf."""
+    if invoice.is_estimate:
+        signature_base64 = invoice.estimate_signature_base64 or ""
+        signed_at = invoice.estimate_signed_at.strftime("%m/%d/%Y %H:%M") if invoice.estimate_signed_at else ""
+        accepted = invoice.estimate_accepted
+    else:
+        signature_base64 = invoice.signature_base64 or ""
+        signed_at = invoice.signed_at.strftime("%m/%d/%Y %H:%M") if invoice.signed_at else ""
+        accepted = invoice.accepted
+
+    return {
+        "invoice_data": InvoiceOut.from_orm(invoice).dict(),
+        "signature_base64": signature_base64,
+        "signed_at": signed_at,
+        "accepted": accepted,
+        "doc_type": "Estimate" if invoice.is_estimate else "Invoice",
+    }
+
+def invoice_read_query(db: Session):
+    """Invoice query that loads everything InvoiceOut serializes up front.
+
+    customer and tech ride along in the same SELECT; items for the whole
+    result set come from one extra SELECT instead of one per invoice.
+    """
+    return db.query(models.Invoice).options(
+        joinedload(models.Invoice.customer),
+        joinedload(models.Invoice.tech),
+        selectinload(models.Invoice.items),
+        undefer_group("signatures"),
+    )
 
-    next_seq = max(existing_seqs, default=0) + 1
-    estimate_number = f"{prefix}{str(next_seq).zfill(3)}"
-    return estimate_number
+def invoice_summary_query(db: Session):
+    """Invoice query limited to the columns InvoiceSummary needs, for list pages."""
+    return db.query(models.Invoice).options(
+        load_only(
+            models.Invoice.id,
+            models.Invoice.number,
+            models.Invoice.date,
+            models.Invoice.due_date,
+            models.Invoice.status,
+            models.Invoice.total,
+            models.Invoice.final_total,
+            models.Invoice.paid_at,
+            models.Invoice.accepted,
+            models.Invoice.estimate_accepted,
+            models.Invoice.is_active,
+            models.Invoice.is_estimate,
+            models.Invoice.customer_id,
+            models.Invoice.tech_id,
+        ),
+        joinedload(models.Invoice.customer).load_only(models.Customer.first_name, models.Customer.last_name),
+        joinedload(models.Invoice.tech).load_only(models.User.user_name, models.User.email),
+    )
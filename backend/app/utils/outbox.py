@@ -0,0 +1,268 @@
+# backend/app/utils/outbox.py
+import os
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+from email import policy
+from email.message import EmailMessage
+from email.utils import getaddresses
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+
+load_dotenv()
+
+SMTP_HOST = os.getenv("SMTP_HOST")
+SMTP_PORT = int(os.getenv("SMTP_PORT", 465))  # Default to 465 for SSL
+SMTP_USER = os.getenv("SMTP_USER")
+SMTP_PASS = os.getenv("SMTP_PASS")
+SMTP_BACKUP = os.getenv("SMTP_BACKUP")
+# Set SMTP_SSL=false for a plain local debugging server (python -m aiosmtpd -n -l localhost:1025)
+SMTP_SSL = os.getenv("SMTP_SSL", "true").lower() != "false"
+
+OUTBOX_CONNECTIONS = int(os.getenv("OUTBOX_CONNECTIONS", 2))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 20))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", 5))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 6))
+OUTBOX_BACKOFF_SECONDS = int(os.getenv("OUTBOX_BACKOFF_SECONDS", 30))
+# Drop idle connections before the server does
+SMTP_IDLE_SECONDS = int(os.getenv("SMTP_IDLE_SECONDS", 60))
+# Per blocking SMTP operation; one message may wait on this a few times (connect, send, one reconnect)
+SMTP_TIMEOUT_SECONDS = int(os.getenv("SMTP_TIMEOUT_SECONDS", 30))
+# Rows whose send started this long ago and are still "sending" are assumed orphaned by a crash
+# and retried; kept well above the worst case for a single message so a slow send is never doubled
+OUTBOX_STALE_SECONDS = max(int(os.getenv("OUTBOX_STALE_SECONDS", 600)), 10 * SMTP_TIMEOUT_SECONDS)
+# How often the workers look for them, so rows orphaned shortly before a restart are retried too
+OUTBOX_SWEEP_SECONDS = int(os.getenv("OUTBOX_SWEEP_SECONDS", 60))
+
+
+def enqueue_email(msg: EmailMessage, db: Session | None = None, send_after: datetime | None = None) -> int:
+    """Store a message for background delivery and return its outbox id.
+
+    When a session is given the row joins the caller's transaction, so the
+    email only goes out if the surrounding write commits.
+    """
+    recipients = [
+        addr for _, addr in getaddresses(msg.get_all("To", []) + msg.get_all("Cc", []) + msg.get_all("Bcc", []))
+        if addr and addr != "None"
+    ]
+    if not recipients:
+        raise ValueError("Email has no recipients")
+
+    # Bcc must reach the server as an envelope recipient only, never as a header
+    del msg["Bcc"]
+
+    entry = models.EmailOutbox(
+        mail_from=msg["From"] or SMTP_USER,
+        recipients=",".join(recipients),
+        subject=msg["Subject"],
+        message=msg.as_bytes(policy=policy.SMTP),
+        status="queued",
+        next_attempt_at=send_after or datetime.utcnow(),
+    )
+
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        db.add(entry)
+        if own_session:
+            db.commit()
+        else:
+            db.flush()
+        entry_id = entry.id
+    finally:
+        if own_session:
+            db.close()
+
+    email_outbox_worker.wake()
+    return entry_id
+
+
+class _SmtpConnection:
+    """One authenticated SMTP session, reopened lazily when it drops or idles out."""
+
+    def __init__(self):
+        self._smtp = None
+        self._last_used = 0.0
+
+    def _open(self):
+        if SMTP_SSL:
+            smtp = smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT_SECONDS)
+        else:
+            smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT_SECONDS)
+        if SMTP_USER and SMTP_PASS:
+            smtp.login(SMTP_USER, SMTP_PASS)
+        return smtp
+
+    def get(self):
+        if self._smtp is not None and time.monotonic() - self._last_used > SMTP_IDLE_SECONDS:
+            self.close()
+        if self._smtp is None:
+            self._smtp = self._open()
+        return self._smtp
+
+    def send(self, entry: models.EmailOutbox):
+        try:
+            self.get().sendmail(entry.mail_from, entry.recipients.split(","), entry.message)
+        except smtplib.SMTPServerDisconnected:
+            # Server hung up between messages; reconnect once and retry
+            self.close()
+            self.get().sendmail(entry.mail_from, entry.recipients.split(","), entry.message)
+        self._last_used = time.monotonic()
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+
+class OutboxWorker:
+    """Background threads that drain email_outbox, one pooled SMTP connection each."""
+
+    def __init__(self, connections: int):
+        self.connections = connections
+        self._threads = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        # SKIP LOCKED keeps processes apart on Postgres; this covers threads on SQLite
+        self._claim_lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def start(self):
+        if self._threads or self.connections <= 0:
+            return
+        self._stop.clear()
+        self._next_sweep = 0.0
+        for i in range(self.connections):
+            thread = threading.Thread(target=self._run, name=f"email-outbox-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"📬 Email outbox worker started with {self.connections} SMTP connection(s)")
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout=10)
+        self._threads = []
+
+    def wake(self):
+        self._wake.set()
+
+    def _sweep_if_due(self):
+        # One thread sweeps per interval; the first loop of the first thread sweeps at startup
+        with self._sweep_lock:
+            if time.monotonic() < self._next_sweep:
+                return
+            self._next_sweep = time.monotonic() + OUTBOX_SWEEP_SECONDS
+        self._requeue_stale()
+
+    def _requeue_stale(self):
+        db = SessionLocal()
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=OUTBOX_STALE_SECONDS)
+            db.query(models.EmailOutbox).filter(
+                models.EmailOutbox.status == "sending",
+                models.EmailOutbox.next_attempt_at < cutoff,
+            ).update({"status": "queued"}, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            print(f"❌ Email outbox requeue failed: {e}")
+        finally:
+            db.close()
+
+    def _claim_batch(self, db: Session) -> list[models.EmailOutbox]:
+        with self._claim_lock:
+            return self._claim_batch_locked(db)
+
+    def _claim_batch_locked(self, db: Session) -> list[models.EmailOutbox]:
+        now = datetime.utcnow()
+        batch = (
+            db.query(models.EmailOutbox)
+            .filter(models.EmailOutbox.status == "queued", models.EmailOutbox.next_attempt_at <= now)
+            .order_by(models.EmailOutbox.next_attempt_at, models.EmailOutbox.id)
+            .limit(OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        for entry in batch:
+            entry.status = "sending"
+            entry.attempts += 1
+            # Doubles as the claim time for stale "sending" detection, restamped as each send starts
+            entry.next_attempt_at = now
+        db.commit()
+        return batch
+
+    def _run(self):
+        connection = _SmtpConnection()
+        while not self._stop.is_set():
+            self._sweep_if_due()
+            try:
+                sent_any = self._deliver_batch(connection)
+            except Exception as e:
+                print(f"❌ Email outbox batch failed: {e}")
+                connection.close()
+                sent_any = False
+
+            if not sent_any:
+                self._wake.wait(OUTBOX_POLL_SECONDS)
+                self._wake.clear()
+        connection.close()
+
+    def _deliver_batch(self, connection: _SmtpConnection) -> bool:
+        # Claimed rows stay loaded across the per-message commits
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            batch = self._claim_batch(db)
+            for entry in batch:
+                if not self._start_send(db, entry):
+                    print(f"⚠️ Email {entry.id} was requeued while waiting in its batch; skipping it")
+                    continue
+                try:
+                    connection.send(entry)
+                except Exception as e:
+                    connection.close()
+                    entry.last_error = str(e)
+                    if entry.attempts >= OUTBOX_MAX_ATTEMPTS:
+                        entry.status = "failed"
+                        print(f"❌ Email {entry.id} to {entry.recipients} failed permanently: {e}")
+                    else:
+                        entry.status = "queued"
+                        delay = OUTBOX_BACKOFF_SECONDS * 2 ** (entry.attempts - 1)
+                        entry.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+                        print(f"⏳ Email {entry.id} to {entry.recipients} failed, retrying in {delay}s: {e}")
+                else:
+                    entry.status = "sent"
+                    entry.sent_at = datetime.utcnow()
+                    entry.last_error = None
+                    print(f"✅ Sent email {entry.id} to {entry.recipients}")
+                # Record each outcome right away so a crash mid-batch can't resend delivered mail
+                db.commit()
+            return bool(batch)
+        finally:
+            db.close()
+
+    def _start_send(self, db: Session, entry: models.EmailOutbox) -> bool:
+        """Restamp the row as its send starts, so the stale window covers one message, not the batch.
+
+        False if the sweep requeued it (and maybe another worker claimed it) while earlier
+        messages in the batch were sending; then it isn't ours to send any more.
+        """
+        started = db.query(models.EmailOutbox).filter(
+            models.EmailOutbox.id == entry.id,
+            models.EmailOutbox.status == "sending",
+            models.EmailOutbox.attempts == entry.attempts,
+        ).update({"next_attempt_at": datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+        return bool(started)
+
+
+email_outbox_worker = OutboxWorker(OUTBOX_CONNECTIONS)
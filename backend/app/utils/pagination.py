@@ -0,0 +1,93 @@
+# backend/app/utils/pagination.py
+import base64
+import json
+from datetime import date, datetime
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+# Clients read the next page's cursor from this header, so list bodies stay plain arrays
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_by: str, sort_dir: str, value, row_id: int) -> str:
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    raw = json.dumps({"s": sort_by, "d": sort_dir, "v": value, "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_dir: str, column) -> tuple:
+    """Return (value, id) from a cursor, checking it belongs to this sort order."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if data["s"] != sort_by or data["d"] != sort_dir:
+            raise ValueError("cursor is for a different sort order")
+        value = data["v"]
+        if value is not None:
+            python_type = column.type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is date:
+                value = date.fromisoformat(value)
+        return value, int(data["id"])
+    except (ValueError, KeyError, TypeError, json.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_order(column, id_column, descending: bool) -> tuple:
+    # NULLs always sort last, on Postgres and SQLite alike
+    if descending:
+        return column.desc().nulls_last(), id_column.desc()
+    return column.asc().nulls_last(), id_column.asc()
+
+
+def _seek(query, column, id_column, descending: bool, after: tuple | None, limit: int) -> list:
+    """Up to `limit` rows after `after` in keyset_order.
+
+    Non-NULL and NULL sort keys are read as two plain range scans, so both
+    halves can walk an index on (column, id) instead of sorting the table.
+    """
+    value, row_id = after if after else (None, None)
+    rows = []
+
+    if after is None or value is not None:
+        head = query.filter(column.isnot(None))
+        if after is not None:
+            key, bound = tuple_(column, id_column), tuple_(value, row_id)
+            head = head.filter(key < bound if descending else key > bound)
+        order = (column.desc(), id_column.desc()) if descending else (column.asc(), id_column.asc())
+        rows = head.order_by(*order).limit(limit).all()
+
+    # A NOT NULL sort key (e.g. the id) has no NULL tail to read
+    if len(rows) < limit and getattr(column, "nullable", True):
+        tail = query.filter(column.is_(None))
+        if value is None and row_id is not None:
+            tail = tail.filter(id_column < row_id if descending else id_column > row_id)
+        tail = tail.order_by(id_column.desc() if descending else id_column.asc())
+        rows += tail.limit(limit - len(rows)).all()
+
+    return rows
+
+
+def paginate(query, column, id_column, sort_by: str, sort_dir: str, limit: int, offset: int = 0, cursor: str | None = None):
+    """Run one page of query in keyset order and return (rows, next_cursor).
+
+    With a cursor the page starts right after the cursor's row and offset is
+    ignored; without one, offset works as before. next_cursor is None on the last page.
+    """
+    descending = sort_dir != "asc"
+
+    # One extra row tells us whether there is a next page
+    if offset and not cursor:
+        rows = query.order_by(*keyset_order(column, id_column, descending)).offset(offset).limit(limit + 1).all()
+    else:
+        after = decode_cursor(cursor, sort_by, sort_dir, column) if cursor else None
+        rows = _seek(query, column, id_column, descending, after, limit + 1)
+
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(sort_by, sort_dir, getattr(last, column.key), getattr(last, id_column.key))
@@ -0,0 +1,145 @@
+# backend/app/utils/pdf_cache.py
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import models
+
+# Bump whenever the PDF layout changes so stale renders are never served
+TEMPLATE_VERSION = "2"
+
+PDF_CACHE_DIR = Path(os.getenv("PDF_CACHE_DIR", Path(tempfile.gettempdir()) / "zuperbill-pdf-cache"))
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+PDF_CACHE_ENABLED = os.getenv("PDF_CACHE_ENABLED", "true").lower() != "false"
+
+_lock = threading.Lock()
+
+
+def cache_key(invoice_data: dict, signature_base64: str, signed_at: str, accepted: bool, doc_type: str) -> str:
+    """Hash every input that can change the rendered PDF."""
+    payload = json.dumps(
+        {
+            "version": TEMPLATE_VERSION,
+            "invoice": invoice_data,
+            "signature": signature_base64 or "",
+            "signed_at": signed_at or "",
+            "accepted": bool(accepted),
+            "doc_type": doc_type,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _entry_path(invoice_id, key: str) -> Path:
+    return PDF_CACHE_DIR / f"{invoice_id}-{key}.pdf"
+
+
+def get(invoice_id, key: str) -> bytes | None:
+    if not PDF_CACHE_ENABLED:
+        return None
+    path = _entry_path(invoice_id, key)
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    # Touch the entry so eviction is least-recently-used rather than oldest-written
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return data
+
+
+def put(invoice_id, key: str, pdf_bytes: bytes) -> None:
+    if not PDF_CACHE_ENABLED:
+        return
+    try:
+        PDF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial PDF
+        fd, tmp_path = tempfile.mkstemp(dir=PDF_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf_bytes)
+        os.replace(tmp_path, _entry_path(invoice_id, key))
+        _evict()
+    except OSError as e:
+        print(f"⚠️ PDF cache write failed: {e}")
+
+
+def _evict() -> None:
+    with _lock:
+        entries = []
+        total = 0
+        for path in PDF_CACHE_DIR.glob("*.pdf"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        if total <= PDF_CACHE_MAX_BYTES:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= PDF_CACHE_MAX_BYTES:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                continue
+
+
+def invalidate(invoice_id) -> None:
+    """Drop every cached render for an invoice."""
+    if not PDF_CACHE_DIR.exists():
+        return
+    for path in PDF_CACHE_DIR.glob(f"{invoice_id}-*.pdf"):
+        try:
+            path.unlink()
+        except OSError:
+            continue
+
+
+def clear() -> None:
+    if not PDF_CACHE_DIR.exists():
+        return
+    for path in PDF_CACHE_DIR.glob("*.pdf"):
+        try:
+            path.unlink()
+        except OSError:
+            continue
+
+
+# --- Invalidation on invoice / line item writes ---
+# Keys already change with their inputs, so this only reclaims disk early and
+# guarantees a write is never followed by a stale render.
+
+@event.listens_for(Session, "before_flush")
+def _collect_written_invoices(session, flush_context, instances):
+    touched = session.info.setdefault("pdf_cache_invoice_ids", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, models.Invoice) and obj.id is not None:
+            touched.add(obj.id)
+        elif isinstance(obj, models.LineItem) and obj.invoice_id is not None:
+            touched.add(obj.invoice_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_written_invoices(session):
+    for invoice_id in session.info.pop("pdf_cache_invoice_ids", set()):
+        invalidate(invoice_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_invoices(session):
+    session.info.pop("pdf_cache_invoice_ids", None)
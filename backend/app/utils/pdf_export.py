@@ -0,0 +1,86 @@
+# backend/app/utils/pdf_export.py
+import io
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from app import models
+from app.database import SessionLocal
+from app.pdf import submit_invoice_pdf
+from app.utils.invoice import invoice_pdf_args, invoice_read_query
+from app.utils.render_pool import PDF_RENDER_TIMEOUT, pdf_render_pool
+
+
+class _ZipChunks(io.RawIOBase):
+    """Write-only sink that hands back whatever ZipFile wrote since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_invoice_pdf_zip(invoice_ids: list[int]):
+    """Yield a ZIP of invoice PDFs, adding each one as soon as its render finishes.
+
+    Only as many invoices as the render pool has workers are loaded or held in
+    memory at once. Runs after the request's session is closed, so it opens its own.
+    """
+    max_in_flight = max(pdf_render_pool.workers, 1)
+    sink = _ZipChunks()
+    db = SessionLocal()
+    remaining = iter(invoice_ids)
+    pending = {}
+
+    try:
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+            while True:
+                while len(pending) < max_in_flight:
+                    invoice_id = next(remaining, None)
+                    if invoice_id is None:
+                        break
+                    invoice = invoice_read_query(db).filter(models.Invoice.id == invoice_id).first()
+                    if not invoice:
+                        continue
+                    args = invoice_pdf_args(invoice)
+                    filename = f"{args['doc_type']}_{invoice.number}.pdf"
+                    db.expunge_all()
+                    pending[submit_invoice_pdf(**args, block=True)] = filename
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, timeout=PDF_RENDER_TIMEOUT, return_when=FIRST_COMPLETED)
+                if not done:
+                    # Nothing finished in time; record the stragglers and keep the archive valid
+                    for future, filename in pending.items():
+                        future.cancel()
+                        archive.writestr(f"{filename}.error.txt", "PDF render timed out")
+                    pending.clear()
+                    yield sink.drain()
+                    continue
+
+                for future in done:
+                    filename = pending.pop(future)
+                    try:
+                        archive.writestr(filename, future.result())
+                    except Exception as e:
+                        print(f"❌ PDF export failed for {filename}: {e}")
+                        archive.writestr(f"{filename}.error.txt", f"PDF render failed: {e}")
+                yield sink.drain()
+
+        # Central directory
+        yield sink.drain()
+    finally:
+        for future in pending:
+            future.cancel()
+        db.close()
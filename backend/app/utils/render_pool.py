@@ -0,0 +1,131 @@
+# backend/app/utils/render_pool.py
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException
+
+# 0 workers renders inline in the calling thread (scripts, debugging)
+PDF_POOL_WORKERS = int(os.getenv("PDF_POOL_WORKERS", 2))
+# Renders allowed in flight or waiting for a worker before we shed load
+PDF_POOL_MAX_QUEUE = int(os.getenv("PDF_POOL_MAX_QUEUE", 8))
+PDF_RENDER_TIMEOUT = float(os.getenv("PDF_RENDER_TIMEOUT", 30))
+# Recycle each worker after this many renders to cap WeasyPrint memory growth
+PDF_WORKER_MAX_RENDERS = int(os.getenv("PDF_WORKER_MAX_RENDERS", 50))
+PDF_RETRY_AFTER_SECONDS = int(os.getenv("PDF_RETRY_AFTER_SECONDS", 5))
+
+
+def _warm_worker():
+    # Import WeasyPrint and load fonts/CSS/images once per worker, not on the first real render
+    from app.pdf import warm_up_renderer
+
+    warm_up_renderer()
+
+
+def _noop():
+    return None
+
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="PDF renderer is busy, please retry shortly",
+        headers={"Retry-After": str(PDF_RETRY_AFTER_SECONDS)},
+    )
+
+
+class RenderPool:
+    """Bounded pool of warm WeasyPrint worker processes."""
+
+    def __init__(self, workers: int, max_queue: int, max_tasks_per_child: int):
+        self.workers = workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self._slots = threading.BoundedSemaphore(max(max_queue, 1))
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_worker,
+                    max_tasks_per_child=self.max_tasks_per_child or None,
+                )
+            return self._executor
+
+    def _reset(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, fn, *args, block: bool = False, **kwargs) -> Future:
+        """Queue fn(*args, **kwargs) on a worker.
+
+        Raises a 503 with Retry-After when the queue is full, unless block=True,
+        in which case the caller waits for a free slot instead.
+        """
+        if self.workers <= 0:
+            future = Future()
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        if not self._slots.acquire(blocking=block):
+            raise _busy()
+
+        try:
+            try:
+                future = self._get_executor().submit(fn, *args, **kwargs)
+            except BrokenProcessPool:
+                # A worker died (OOM, segfault); start a fresh pool and retry once
+                self._reset()
+                future = self._get_executor().submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+
+        # The slot is held until the worker is actually free, even past a timeout
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args, timeout: float = PDF_RENDER_TIMEOUT, **kwargs):
+        future = self.submit(fn, *args, **kwargs)
+        return self.result(future, timeout=timeout)
+
+    def result(self, future: Future, timeout: float = PDF_RENDER_TIMEOUT):
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise HTTPException(status_code=504, detail="PDF render timed out")
+        except BrokenProcessPool:
+            self._reset()
+            raise _busy()
+
+    def warm_up(self):
+        """Start every worker now so the first request doesn't pay for spawn + font loading."""
+        if self.workers <= 0:
+            return
+        executor = self._get_executor()
+        for _ in range(self.workers):
+            executor.submit(_noop)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+pdf_render_pool = RenderPool(
+    workers=PDF_POOL_WORKERS,
+    max_queue=PDF_POOL_MAX_QUEUE,
+    max_tasks_per_child=PDF_WORKER_MAX_RENDERS,
+)
@@ -0,0 +1,149 @@
+# backend/app/utils/report_cache.py
+"""In-memory cache for report results, invalidated by invoice writes.
+
+Every committed transaction that writes invoices, line items, customers
+(deleting one deletes their invoices) or users (tech names appear in
+reports) bumps a process-wide data version. Cached results
+are tagged with the version they were computed at, so a read between two
+writes is answered from memory and the first read after a write recomputes.
+Concurrent misses for the same report and parameters share one computation.
+Entries also expire after REPORT_CACHE_TTL seconds, which bounds staleness
+when several processes write to the same database.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import models
+
+REPORT_CACHE_TTL = int(os.getenv("REPORT_CACHE_TTL", 300))
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", 256))
+
+_TRACKED = (models.Invoice, models.LineItem, models.Customer, models.User)
+
+
+class _Flight:
+    """One in-progress computation that identical misses wait on."""
+
+    def __init__(self, version: int):
+        self.version = version
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ReportCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        # key -> (version, monotonic expiry, value), least recently used first
+        self._entries: OrderedDict = OrderedDict()
+        self._flights: dict = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def bump(self):
+        with self._lock:
+            self._version += 1
+
+    def get_or_compute(self, name: str, params: dict, compute: Callable[[], Any]) -> Any:
+        key = (name, json.dumps(params, sort_keys=True, default=str))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == self._version and entry[1] > time.monotonic():
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[2]
+            flight = self._flights.get(key)
+            leader = flight is None or flight.version != self._version
+            if leader:
+                self.misses += 1
+                flight = self._flights[key] = _Flight(self._version)
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                # A write that committed mid-computation may not be in the result: don't keep it
+                if flight.error is None and flight.version == self._version:
+                    self._entries[key] = (flight.version, time.monotonic() + REPORT_CACHE_TTL, flight.value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > REPORT_CACHE_SIZE:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+        return flight.value
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+                "entries": len(self._entries),
+                "data_version": self._version,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+report_cache = ReportCache()
+
+
+# --- Invalidation on invoice writes ---
+# The version moves on commit, not flush: a report computed between the two
+# would read the old rows and still be tagged with the new version.
+
+@event.listens_for(Session, "after_flush")
+def _collect_invoice_writes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, _TRACKED):
+            session.info["invoice_data_written"] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_statement_writes(orm_execute_state):
+    # Bulk INSERT/UPDATE/DELETE statements skip the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and issubclass(mapper.class_, _TRACKED):
+            orm_execute_state.session.info["invoice_data_written"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_data_version(session):
+    if session.info.pop("invoice_data_written", False):
+        report_cache.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invoice_writes(session):
+    session.info.pop("invoice_data_written", None)
@@ -0,0 +1,157 @@
+# backend/app/utils/rollups.py
+"""Per-tech daily invoice rollup (tech_daily_revenue), kept in step with invoice writes.
+
+Each row counts and sums the invoices of one (tech, day, status, estimate?)
+bucket, so reports read a few rows per tech and day instead of every invoice
+ever written. Every ORM flush that creates, edits or deletes invoices adjusts
+the affected buckets in the same transaction; Core inserts must call
+apply_rollup_deltas themselves. Invoices without a tech or a date are not
+rolled up. Reports should read from here rather than aggregating invoices.
+If the rollup ever drifts, rebuild it from the invoices table:
+
+    python -m app.utils.rollups            # rebuild drifted buckets
+    python -m app.utils.rollups --dry-run  # report only
+"""
+import argparse
+import sys
+from collections import defaultdict
+from typing import Optional
+
+from sqlalchemy import delete, event, func, inspect, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+from app.utils.balances import values_after, values_before
+
+_FIELDS = ("tech_id", "date", "status", "is_estimate", "final_total")
+
+
+def rollup_key(tech_id, day, status, is_estimate) -> Optional[tuple]:
+    """The (tech_id, day, status, is_estimate) bucket an invoice counts in, or None if it isn't rolled up."""
+    if tech_id is None or day is None:
+        return None
+    return tech_id, day, status or "", bool(is_estimate)
+
+
+def apply_rollup_deltas(session: Session, deltas: dict):
+    """Add {bucket: [final_total, count]} to tech_daily_revenue in one upsert."""
+    rows = [
+        {"tech_id": tech_id, "day": day, "status": status, "is_estimate": is_estimate, "final_total": round(total, 2), "invoice_count": count}
+        for (tech_id, day, status, is_estimate), (total, count) in deltas.items()
+        if count or round(total, 2)
+    ]
+    if not rows:
+        return
+    table = models.TechDailyRevenue.__table__
+    insert = sqlite_insert(table) if session.get_bind().dialect.name == "sqlite" else postgresql_insert(table)
+    session.execute(
+        insert.on_conflict_do_update(
+            index_elements=["tech_id", "day", "status", "is_estimate"],
+            set_={
+                "invoice_count": table.c.invoice_count + insert.excluded.invoice_count,
+                "final_total": table.c.final_total + insert.excluded.final_total,
+            },
+        ),
+        rows,
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _track_tech_rollup(session, flush_context):
+    deltas = defaultdict(lambda: [0.0, 0])
+
+    def add(values, sign):
+        key = rollup_key(*values[:4])
+        if key is not None:
+            deltas[key][0] += sign * (values[4] or 0.0)
+            deltas[key][1] += sign
+
+    for obj in session.new:
+        if isinstance(obj, models.Invoice):
+            add(values_after(inspect(obj), _FIELDS), 1)
+    for obj in session.dirty:
+        if isinstance(obj, models.Invoice) and session.is_modified(obj, include_collections=False):
+            state = inspect(obj)
+            add(values_before(state, _FIELDS), -1)
+            add(values_after(state, _FIELDS), 1)
+    for obj in session.deleted:
+        if isinstance(obj, models.Invoice):
+            add(values_before(inspect(obj), _FIELDS), -1)
+
+    if deltas:
+        apply_rollup_deltas(session, deltas)
+
+
+def reconcile_tech_rollup(db: Session, dry_run: bool = False) -> list[dict]:
+    """Recompute every bucket from the invoices table; rewrite the rollup if any drifted."""
+    invoices = models.Invoice
+    status = func.coalesce(invoices.status, "")
+    is_estimate = func.coalesce(invoices.is_estimate, False)
+    actual = {
+        (row.tech_id, row.day, row.status, bool(row.is_estimate)): (round(row.final_total or 0.0, 2), row.invoice_count)
+        for row in db.execute(
+            select(
+                invoices.tech_id,
+                invoices.date.label("day"),
+                status.label("status"),
+                is_estimate.label("is_estimate"),
+                func.count().label("invoice_count"),
+                func.sum(invoices.final_total).label("final_total"),
+            )
+            .where(invoices.tech_id.isnot(None), invoices.date.isnot(None))
+            .group_by(invoices.tech_id, invoices.date, status, is_estimate)
+        )
+    }
+
+    table = models.TechDailyRevenue.__table__
+    stored = {
+        (row.tech_id, row.day, row.status, row.is_estimate): (round(row.final_total or 0.0, 2), row.invoice_count)
+        for row in db.execute(select(table)) if row.invoice_count or round(row.final_total or 0.0, 2)
+    }
+
+    drifted = []
+    for key in sorted(actual.keys() | stored.keys()):
+        if actual.get(key) != stored.get(key):
+            (total, count), (actual_total, actual_count) = stored.get(key, (0.0, 0)), actual.get(key, (0.0, 0))
+            drifted.append({
+                "tech_id": key[0], "day": key[1], "status": key[2], "is_estimate": key[3],
+                "invoice_count": count, "final_total": total,
+                "actual_invoice_count": actual_count, "actual_final_total": actual_total,
+            })
+
+    if drifted and not dry_run:
+        db.execute(delete(table))
+        db.execute(table.insert(), [
+            {"tech_id": tech_id, "day": day, "status": status, "is_estimate": is_estimate, "final_total": total, "invoice_count": count}
+            for (tech_id, day, status, is_estimate), (total, count) in actual.items()
+        ])
+        db.commit()
+    return drifted
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild the per-tech daily invoice rollup")
+    parser.add_argument("--dry-run", action="store_true", help="report drifted buckets without fixing them")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        drifted = reconcile_tech_rollup(db, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    for row in drifted:
+        kind = "estimates" if row["is_estimate"] else "invoices"
+        print(
+            f"{'🔎' if args.dry_run else '🔧'} tech {row['tech_id']} {row['day']} {row['status'] or '(no status)'} {kind}: "
+            f"{row['invoice_count']} / {row['final_total']} -> {row['actual_invoice_count']} / {row['actual_final_total']}"
+        )
+    print(f"✅ {len(drifted)} bucket(s) {'would be ' if args.dry_run else ''}corrected")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+# backend/app/utils/statements.py
+import itertools
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.pdf import submit_statement_pdf
+from app.utils.email import send_statement_email
+from app.utils.render_pool import PDF_RENDER_TIMEOUT, pdf_render_pool
+
+
+def open_invoice_filter():
+    """Invoices that count toward a customer's open balance."""
+    return (
+        models.Invoice.status != "paid",
+        models.Invoice.is_estimate == False,
+        models.Invoice.is_active == True,
+    )
+
+
+def open_balance_statements(db: Session, customer_ids: list[int] | None = None) -> list[dict]:
+    """Every customer with an open balance and their open invoices, in one query."""
+    query = (
+        db.query(
+            models.Customer.id,
+            models.Customer.first_name,
+            models.Customer.last_name,
+            models.Customer.email,
+            models.Customer.phone,
+            models.Customer.street,
+            models.Customer.city,
+            models.Customer.state,
+            models.Customer.zipcode,
+            models.Invoice.number,
+            models.Invoice.date,
+            models.Invoice.due_date,
+            models.Invoice.status,
+            models.Invoice.final_total,
+        )
+        .join(models.Invoice, models.Invoice.customer_id == models.Customer.id)
+        .filter(*open_invoice_filter())
+        .order_by(models.Customer.id, models.Invoice.date, models.Invoice.id)
+    )
+    if customer_ids:
+        query = query.filter(models.Customer.id.in_(customer_ids))
+
+    statements = []
+    today = date.today()
+    for customer_id, rows in itertools.groupby(query.all(), key=lambda row: row.id):
+        rows = list(rows)
+        first = rows[0]
+        invoices = [
+            {
+                "number": row.number,
+                "date": row.date,
+                "due_date": row.due_date,
+                "status": row.status,
+                "final_total": row.final_total or 0,
+            }
+            for row in rows
+        ]
+        statements.append({
+            "statement_date": today,
+            "customer": {
+                "id": customer_id,
+                "first_name": first.first_name,
+                "last_name": first.last_name,
+                "email": first.email,
+                "phone": first.phone or "",
+                "street": first.street or "",
+                "city": first.city or "",
+                "state": first.state or "",
+                "zipcode": first.zipcode or "",
+            },
+            "invoices": invoices,
+            "balance": round(sum(invoice["final_total"] for invoice in invoices), 2),
+        })
+    return statements
+
+
+def run_statements(db: Session, dry_run: bool = False, messages_per_second: float = 1.0, customer_ids: list[int] | None = None, progress=None) -> dict:
+    """Render and email a statement to every customer with an open balance.
+
+    Statements render in parallel on the PDF pool; emails go through the outbox,
+    spaced messages_per_second apart, so delivery reuses its SMTP connections.
+    In dry-run mode statements are rendered but nothing is queued.
+    """
+    started = time.perf_counter()
+    statements = open_balance_statements(db, customer_ids)
+    queried = time.perf_counter()
+
+    summary = {
+        "dry_run": dry_run,
+        "customers": len(statements),
+        "invoices": sum(len(s["invoices"]) for s in statements),
+        "balance": round(sum(s["balance"] for s in statements), 2),
+        "rendered": 0,
+        "queued": 0,
+        "skipped_no_email": 0,
+        "failed": [],
+        "recipients": [],
+    }
+
+    interval = 1 / messages_per_second if messages_per_second > 0 else 0
+    send_at = datetime.utcnow()
+    max_in_flight = max(pdf_render_pool.workers, 1)
+    remaining = iter(statements)
+    pending = {}
+
+    while True:
+        while len(pending) < max_in_flight:
+            statement = next(remaining, None)
+            if statement is None:
+                break
+            if not statement["customer"]["email"]:
+                summary["skipped_no_email"] += 1
+                continue
+            pending[submit_statement_pdf(statement, block=True)] = statement
+
+        if not pending:
+            break
+
+        done, _ = wait(pending, timeout=PDF_RENDER_TIMEOUT, return_when=FIRST_COMPLETED)
+        if not done:
+            for future, statement in pending.items():
+                future.cancel()
+                summary["failed"].append({"customer_id": statement["customer"]["id"], "error": "PDF render timed out"})
+            pending.clear()
+            continue
+
+        for future in done:
+            statement = pending.pop(future)
+            customer = statement["customer"]
+            try:
+                pdf_bytes = future.result()
+            except Exception as e:
+                print(f"❌ Statement render failed for customer {customer['id']}: {e}")
+                summary["failed"].append({"customer_id": customer["id"], "error": str(e)})
+                continue
+
+            summary["rendered"] += 1
+            summary["recipients"].append(customer["email"])
+            if not dry_run:
+                send_statement_email(statement, pdf_bytes, send_after=send_at, db=db)
+                send_at += timedelta(seconds=interval)
+                summary["queued"] += 1
+
+        if progress:
+            progress(f"rendered {summary['rendered']} of {summary['customers']} statements")
+
+    finished = time.perf_counter()
+    summary["timings_ms"] = {
+        "query": round((queried - started) * 1000, 1),
+        "render": round((finished - queried) * 1000, 1),
+        "total": round((finished - started) * 1000, 1),
+    }
+    # How long the outbox will take to drain this run at the requested rate
+    summary["send_window_seconds"] = round(summary["queued"] * interval, 1)
+    return summary
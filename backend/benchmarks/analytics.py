@@ -0,0 +1,143 @@
+# backend/benchmarks/analytics.py
+"""Ad-hoc report latency over the in-memory invoice snapshot.
+
+Seeds 1M invoices (by default) across 50k customers and 20 techs into a
+throwaway SQLite database, loads the NumPy snapshot, then times every
+analytics report and an incremental refresh after a batch of invoice
+updates. Monthly revenue is cross-checked against the same GROUP BY in SQL.
+Exits non-zero if a report's median is over --target-ms or the check fails.
+
+    python -m benchmarks.analytics
+    python -m benchmarks.analytics --invoices 200000 --target-ms 5
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+parser = argparse.ArgumentParser(description="Benchmark the analytics snapshot reports")
+parser.add_argument("--invoices", type=int, default=1_000_000, help="synthetic invoices to seed")
+parser.add_argument("--customers", type=int, default=50_000, help="synthetic customers to seed")
+parser.add_argument("--techs", type=int, default=20, help="synthetic techs to seed")
+parser.add_argument("--updates", type=int, default=1_000, help="invoices to update before timing an incremental refresh")
+parser.add_argument("--repeat", type=int, default=20, help="timed runs per report (median is reported)")
+parser.add_argument("--target-ms", type=float, default=25.0, help="fail if a report's median is slower than this")
+args = parser.parse_args()
+
+_db_fd, _db_path = tempfile.mkstemp(suffix=".db")
+os.close(_db_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+from sqlalchemy import func, insert, update
+
+from app import models
+from app.database import Base, SessionLocal, engine
+from app.utils import analytics
+
+STATUSES = ["paid"] * 6 + ["unpaid"] * 3 + ["overdue"]
+REFERRALS = ["Google", "Yelp", "Nextdoor", "Facebook", "Repeat customer", "Flyer", None]
+
+
+def seed(invoices: int, customers: int, techs: int, batch: int = 50_000):
+    Base.metadata.create_all(engine)
+    rng = random.Random(7)
+    first_day = date.today() - timedelta(days=3 * 365)
+    stamped = datetime.utcnow() - timedelta(days=1)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"id": i + 1, "user_name": f"Tech {i + 1:02d}", "email": f"tech{i + 1}@example.com", "hashed_password": "x"}
+            for i in range(techs)
+        ])
+        conn.execute(insert(models.Customer), [
+            {"id": i + 1, "first_name": "C", "last_name": str(i), "email": f"c{i}@example.com", "referral_source": rng.choice(REFERRALS)}
+            for i in range(customers)
+        ])
+        for start in range(0, invoices, batch):
+            count = min(batch, invoices - start)
+            rows = []
+            for i in range(start, start + count):
+                day = first_day + timedelta(days=i * 3 * 365 // invoices)
+                status = rng.choice(STATUSES)
+                rows.append({
+                    "id": i + 1, "number": f"INV-{i + 1:08d}", "customer_id": rng.randint(1, customers), "tech_id": rng.randint(1, techs),
+                    "date": day, "due_date": day + timedelta(days=30), "status": status,
+                    "paid_at": datetime(day.year, day.month, day.day) + timedelta(days=rng.randint(0, 40)) if status == "paid" else None,
+                    "is_estimate": rng.random() < 0.1, "estimate_accepted": str(rng.random() < 0.4).lower(), "is_active": rng.random() > 0.02,
+                    "final_total": round(rng.uniform(50, 2000), 2), "updated_at": stamped,
+                })
+            conn.execute(insert(models.Invoice), rows)
+            print(f"  seeded {start + count:,} invoices", end="\r", flush=True)
+    print()
+
+
+def sql_monthly_revenue(db, year: int) -> dict:
+    month = func.strftime("%m", models.Invoice.date)
+    rows = (
+        db.query(models.Invoice.tech_id, month, func.count(), func.sum(models.Invoice.final_total))
+        .filter(models.Invoice.is_active == True, models.Invoice.is_estimate == False)
+        .filter(models.Invoice.date >= date(year, 1, 1), models.Invoice.date <= date(year, 12, 31))
+        .group_by(models.Invoice.tech_id, month)
+    )
+    return {(tech_id, f"{year}-{m}"): (count, round(total, 2)) for tech_id, m, count, total in rows}
+
+
+def main() -> int:
+    failures = 0
+    try:
+        seed(args.invoices, args.customers, args.techs)
+        db = SessionLocal()
+        start = time.perf_counter()
+        snapshot = analytics.invoice_facts.snapshot(db)
+        print(f"snapshot of {len(snapshot):,} invoices loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        year = date.today().year
+        reports = [
+            ("ar aging", lambda s: analytics.ar_aging(s, date.today())),
+            ("monthly revenue", lambda s: analytics.monthly_revenue(s, year)),
+            ("monthly revenue, 1 tech", lambda s: analytics.monthly_revenue(s, year, tech_id=3)),
+            ("average ticket", lambda s: analytics.average_ticket(s, date(year - 1, 1, 1), date.today())),
+            ("estimate conversion", lambda s: analytics.estimate_conversion(s)),
+            ("referral sources", lambda s: analytics.referral_sources(s)),
+        ]
+        print(f"{'report':26} {'rows':>5} {'median ms':>10}")
+        for name, report in reports:
+            timings, rows = [], []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                rows = report(analytics.invoice_facts.snapshot(db))
+                timings.append((time.perf_counter() - start) * 1000)
+            median = statistics.median(timings)
+            ok = median <= args.target_ms
+            failures += not ok
+            print(f"{'✅' if ok else '❌'} {name:24} {len(rows):5} {median:10.2f}")
+
+        # Incremental refresh: only the updated invoices are read back
+        ids = random.Random(3).sample(range(1, args.invoices + 1), min(args.updates, args.invoices))
+        db.execute(update(models.Invoice).where(models.Invoice.id.in_(ids)).values(status="paid", final_total=1.0))
+        db.commit()
+        start = time.perf_counter()
+        analytics.invoice_facts.refresh(db)
+        print(f"ℹ️  incremental refresh after {len(ids):,} updates: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        expected = sql_monthly_revenue(db, year)
+        actual = {
+            (row["tech_id"], row["month"]): (row["invoice_count"], row["total_amount"])
+            for row in analytics.monthly_revenue(analytics.invoice_facts.snapshot(db), year)
+        }
+        same = expected.keys() == actual.keys() and all(
+            expected[key][0] == actual[key][0] and abs(expected[key][1] - actual[key][1]) <= 0.01 for key in expected
+        )
+        failures += not same
+        print(f"{'✅' if same else '❌'} monthly revenue matches SQL after the refresh")
+        db.close()
+    finally:
+        os.remove(_db_path)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
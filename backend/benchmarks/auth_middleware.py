@@ -0,0 +1,122 @@
+# backend/benchmarks/auth_middleware.py
+"""Compare the pure ASGI auth middleware with the old BaseHTTPMiddleware gate.
+
+Both variants guard the same trivial authenticated endpoint and are driven
+in-process over ASGI, so the numbers isolate middleware overhead.
+
+    python -m benchmarks.auth_middleware
+    python -m benchmarks.auth_middleware --requests 20000 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Throwaway SQLite database holding the one benchmark user
+_db_fd, _db_path = tempfile.mkstemp(suffix=".db")
+os.close(_db_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from app import models
+from app.database import Base, SessionLocal, engine
+from app.middleware.auth import AuthMiddleware
+from app.utils.auth import create_access_token, resolve_principal_async, verify_token
+
+
+def _ping(principal=Depends(verify_token)):
+    return {"ok": True}
+
+
+def legacy_app() -> FastAPI:
+    """The previous @app.middleware("http") gate, fixed to actually verify the token."""
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def secure_routes(request: Request, call_next):
+        if request.method == "OPTIONS":
+            return await call_next(request)
+        if request.url.path.startswith("/public/") or request.url.path.startswith("/auth"):
+            return await call_next(request)
+
+        auth_header = request.headers.get("authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return JSONResponse(status_code=401, content={"detail": "Not authenticated"})
+
+        try:
+            request.state.principal = await resolve_principal_async(auth_header.split("Bearer ")[1])
+        except HTTPException as e:
+            return JSONResponse(status_code=e.status_code, content={"detail": e.detail})
+        return await call_next(request)
+
+    app.get("/ping")(_ping)
+    return app
+
+
+def asgi_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(AuthMiddleware)
+    app.get("/ping")(_ping)
+    return app
+
+
+async def _drive(app: FastAPI, token: str, requests: int, concurrency: int) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm the principal cache and FastAPI's dependency setup
+        response = await client.get("/ping", headers=headers)
+        response.raise_for_status()
+
+        remaining = iter(range(requests))
+
+        async def worker():
+            for _ in remaining:
+                await client.get("/ping", headers=headers)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - start)
+
+
+def _seed_user() -> str:
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    db.add(models.User(email="bench@example.com", user_name="Bench", hashed_password="x", is_active=True))
+    db.commit()
+    db.close()
+    return create_access_token({"sub": "bench@example.com"})
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the auth middleware")
+    parser.add_argument("--requests", type=int, default=5000, help="requests per variant and round")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent in-flight requests")
+    parser.add_argument("--rounds", type=int, default=3, help="rounds per variant (best is reported)")
+    args = parser.parse_args(argv)
+
+    try:
+        token = _seed_user()
+        variants = {"BaseHTTPMiddleware": legacy_app(), "pure ASGI": asgi_app()}
+        results = {}
+        for name, app in variants.items():
+            results[name] = max(
+                asyncio.run(_drive(app, token, args.requests, args.concurrency)) for _ in range(args.rounds)
+            )
+
+        for name, rps in results.items():
+            print(f"{name:20} {rps:10.0f} req/s")
+        before, after = results["BaseHTTPMiddleware"], results["pure ASGI"]
+        print(f"{'speedup':20} {after / before:10.2f}x")
+    finally:
+        os.remove(_db_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+# backend/benchmarks/autocomplete.py
+"""Line item autocomplete latency over a large synthetic line item history.
+
+Seeds 1M line items (by default) across 100k invoices into a throwaway SQLite
+database, builds line_item_descriptions from them, then times
+suggest_descriptions() for prefix, infix, short and missing queries, plus
+the cost of booking one saved invoice's items. Reports the median per query
+and exits non-zero if any lookup median is over --target-ms.
+
+    python -m benchmarks.autocomplete
+    python -m benchmarks.autocomplete --line-items 200000 --target-ms 0.5
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+parser = argparse.ArgumentParser(description="Benchmark line item description autocomplete")
+parser.add_argument("--line-items", type=int, default=1_000_000, help="synthetic line items to seed")
+parser.add_argument("--per-invoice", type=int, default=10, help="line items per synthetic invoice")
+parser.add_argument("--repeat", type=int, default=200, help="timed runs per query (median is reported)")
+parser.add_argument("--target-ms", type=float, default=1.0, help="fail if a lookup's median is slower than this")
+args = parser.parse_args()
+
+_db_fd, _db_path = tempfile.mkstemp(suffix=".db")
+os.close(_db_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+from sqlalchemy import insert
+
+from app import models
+from app.database import Base, SessionLocal, engine
+from app.utils.autocomplete import rebuild_description_stats, record_description_usage, suggest_descriptions
+
+ACTIONS = ["Replace", "Repair", "Install", "Patch", "Paint", "Clean", "Inspect", "Adjust", "Seal", "Remove"]
+THINGS = ["door hinge", "garbage disposal", "ceiling fan", "drywall", "gutter", "faucet", "toilet flapper",
+          "deck board", "fence post", "light switch", "GFCI outlet", "window screen", "smoke detector",
+          "cabinet door", "baseboard", "shower caulk", "water heater", "dryer vent", "storm door", "tile grout"]
+WHERE = ["", " - kitchen", " - master bath", " - garage", " - basement", " - front porch", " (2nd floor)", " - exterior"]
+
+QUERIES = [
+    ("prefix", "repl"),
+    ("word prefix", "ceil"),
+    ("infix", "disposal"),
+    ("multi-word", "repair deck"),
+    ("one letter", "g"),
+    ("two letters", "fa"),
+    ("rare", "storm door - gar"),
+    ("no match", "zzqx"),
+    ("common words, no match", "repair fan - kitchen #"),
+]
+
+
+def vocabulary(rng: random.Random) -> list[str]:
+    # A few thousand stock phrases plus a long tail of one-off wording, weighted Zipf-style
+    stock = [f"{action} {thing}{where}" for action in ACTIONS for thing in THINGS for where in WHERE]
+    tail = [f"{rng.choice(ACTIONS)} {rng.choice(THINGS)} #{i}" for i in range(20_000)]
+    return stock + tail
+
+
+def seed(line_items: int, per_invoice: int, batch: int = 50_000):
+    Base.metadata.create_all(engine)
+    rng = random.Random(7)
+    words = vocabulary(rng)
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    invoices = (line_items + per_invoice - 1) // per_invoice
+    start_day = date.today() - timedelta(days=3 * 365)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Invoice), [
+            {"id": i + 1, "number": f"INV-{i + 1:07d}", "date": start_day + timedelta(days=i * 3 * 365 // invoices), "is_estimate": False, "is_active": True}
+            for i in range(invoices)
+        ])
+        for start in range(0, line_items, batch):
+            count = min(batch, line_items - start)
+            descriptions = rng.choices(words, weights=weights, k=count)
+            conn.execute(insert(models.LineItem), [
+                {"id": start + i + 1, "invoice_id": (start + i) // per_invoice + 1, "description": description,
+                 "quantity": 1, "unit_price": round(rng.uniform(20, 400), 2)}
+                for i, description in enumerate(descriptions)
+            ])
+            print(f"  seeded {start + count:,} line items", end="\r", flush=True)
+    print()
+
+
+def main() -> int:
+    failures = 0
+    try:
+        seed(args.line_items, args.per_invoice)
+        db = SessionLocal()
+        start = time.perf_counter()
+        distinct = rebuild_description_stats(db)
+        print(f"{distinct:,} distinct descriptions, stats + index built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        print(f"{'query':24} {'q':20} {'hits':>5} {'median ms':>10}")
+        for name, q in QUERIES:
+            timings = []
+            hits = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                hits = suggest_descriptions(db, q, limit=10)
+                timings.append((time.perf_counter() - start) * 1000)
+            median = statistics.median(timings)
+            ok = median <= args.target_ms
+            failures += not ok
+            print(f"{'✅' if ok else '❌'} {name:22} {q:20} {len(hits):5} {median:10.3f}")
+
+        # Incremental upkeep: what saving one invoice's items adds to its transaction
+        items = [("Repair ceiling fan - garage", 1, 95.0), ("New one-off description", 1, 12.5), ("Clean gutter", 1, 80.0)]
+        timings = []
+        for _ in range(20):
+            start = time.perf_counter()
+            record_description_usage(db, items)
+            db.commit()
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"ℹ️  booking a 3-item invoice: {statistics.median(timings):.2f} ms median (incl. commit)")
+        hint = suggest_descriptions(db, "one-off description")[0]
+        print(f"ℹ️  {hint.description!r}: used {hint.use_count}x, last {hint.last_unit_price}, median {hint.median_unit_price}")
+        db.close()
+    finally:
+        os.remove(_db_path)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+# backend/benchmarks/customer_search.py
+"""Customer search latency over a large synthetic customer table.
+
+Seeds 100k customers (by default) into a throwaway SQLite database, or into
+--database-url, then times search_customers() for a mix of name fragments,
+typos, email and phone queries. Reports the median per query and exits
+non-zero if any median is over --target-ms.
+
+    python -m benchmarks.customer_search
+    python -m benchmarks.customer_search --customers 20000 --target-ms 5
+    python -m benchmarks.customer_search --database-url postgresql+psycopg2://...
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description="Benchmark fuzzy customer search")
+parser.add_argument("--database-url", help="database to seed and search (default: throwaway SQLite); its customers table is replaced")
+parser.add_argument("--customers", type=int, default=100_000, help="synthetic customers to seed")
+parser.add_argument("--repeat", type=int, default=20, help="timed runs per query (median is reported)")
+parser.add_argument("--target-ms", type=float, default=10.0, help="fail if a query's median is slower than this")
+args = parser.parse_args()
+
+_db_path = None
+if args.database_url:
+    os.environ["DATABASE_URL"] = args.database_url
+else:
+    _db_fd, _db_path = tempfile.mkstemp(suffix=".db")
+    os.close(_db_fd)
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+from sqlalchemy import delete, insert
+
+from app import models
+from app.database import Base, SessionLocal, engine
+from app.utils.customer_search import customer_search_text, ngram_index, search_customers
+
+FIRST = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+         "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Carlos", "Maria",
+         "Wei", "Aisha", "Dmitri", "Priya", "Kenji", "Fatima", "Lucas", "Chloe", "Mateo", "Ingrid"]
+LAST = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+        "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+        "Nakamura", "Okafor", "Kowalski", "Fitzgerald", "Van der Berg", "Delacroix", "Abernathy", "Quintero"]
+DOMAINS = ["gmail.com", "yahoo.com", "outlook.com", "icloud.com", "example.com"]
+
+QUERIES = [
+    ("last name", "fitzgerald"),
+    ("name fragment", "nakam"),
+    ("full name", "priya okafor"),
+    ("typo", "kowalsky"),
+    ("email", "dmitri.delacroix"),
+    ("phone, formatted", "(555) 014-27"),
+    ("phone, digits", "5550142"),
+    ("two letters", "ch"),
+]
+
+
+def seed(count: int, batch: int = 20_000):
+    Base.metadata.create_all(engine)
+    rng = random.Random(7)
+    with engine.begin() as conn:
+        conn.execute(delete(models.Customer))
+        for start in range(0, count, batch):
+            rows = []
+            for i in range(start, min(start + batch, count)):
+                first, last = rng.choice(FIRST), rng.choice(LAST)
+                email = f"{first}.{last.replace(' ', '')}{i}@{rng.choice(DOMAINS)}".lower()
+                phone = f"555-{rng.randint(0, 999):03d}-{rng.randint(0, 9999):04d}"
+                rows.append({
+                    "id": i + 1, "first_name": first, "last_name": last, "email": email, "phone": phone,
+                    "search_text": customer_search_text(first, last, email, phone),
+                })
+            conn.execute(insert(models.Customer), rows)
+            print(f"  seeded {min(start + batch, count):,} customers", end="\r", flush=True)
+    print()
+
+
+def main() -> int:
+    failures = 0
+    try:
+        seed(args.customers)
+        db = SessionLocal()
+        if engine.dialect.name == "sqlite":
+            start = time.perf_counter()
+            ngram_index.rebuild(db)
+            print(f"in-memory index built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        print(f"{'query':20} {'q':20} {'hits':>5} {'median ms':>10}")
+        for name, q in QUERIES:
+            timings = []
+            hits = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                hits = search_customers(db, q, limit=20)
+                timings.append((time.perf_counter() - start) * 1000)
+                db.expunge_all()
+            median = statistics.median(timings)
+            ok = median <= args.target_ms
+            failures += not ok
+            print(f"{'✅' if ok else '❌'} {name:18} {q:20} {len(hits):5} {median:10.2f}")
+        db.close()
+    finally:
+        if _db_path:
+            os.remove(_db_path)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+# backend/benchmarks/export.py
+"""Streaming invoice export: throughput and peak memory.
+
+Seeds 1M line items (by default, 4 per invoice) into a throwaway SQLite
+database, then drains the /invoices/export/{csv,ndjson} stream for every
+format, plain and gzipped, counting rows and tracing Python allocations.
+Exits non-zero if a run is missing rows or its peak traced memory is over
+--max-memory-mb, i.e. the export stopped streaming.
+
+    python -m benchmarks.export
+    python -m benchmarks.export --line-items 200000 --max-memory-mb 8
+"""
+import argparse
+import gzip
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+parser = argparse.ArgumentParser(description="Benchmark the streaming invoice export")
+parser.add_argument("--line-items", type=int, default=1_000_000, help="synthetic line items to seed")
+parser.add_argument("--items-per-invoice", type=int, default=4, help="line items per synthetic invoice")
+parser.add_argument("--max-memory-mb", type=float, default=16.0, help="fail if an export's peak traced memory is over this")
+args = parser.parse_args()
+
+_db_fd, _db_path = tempfile.mkstemp(suffix=".db")
+os.close(_db_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+from sqlalchemy import insert
+
+from app import models
+from app.database import Base, engine
+from app.utils.data_export import export_query, stream_export
+
+
+def seed(line_items: int, per_invoice: int, customers: int = 10_000, batch: int = 50_000):
+    Base.metadata.create_all(engine)
+    invoices = -(-line_items // per_invoice)
+    first_day = date.today() - timedelta(days=3 * 365)
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [{"id": 1, "user_name": "Tech", "email": "tech@example.com", "hashed_password": "x"}])
+        conn.execute(insert(models.Customer), [
+            {"id": i + 1, "first_name": "Customer", "last_name": str(i), "email": f"c{i}@example.com", "phone": "555-0100"}
+            for i in range(customers)
+        ])
+        for start in range(0, invoices, batch):
+            count = min(batch, invoices - start)
+            conn.execute(insert(models.Invoice), [
+                {
+                    "id": i + 1, "number": f"INV-{i + 1:08d}", "customer_id": i % customers + 1, "tech_id": 1,
+                    "date": first_day + timedelta(days=i * 3 * 365 // invoices), "status": "paid",
+                    "total": 100.0, "discount": 0.0, "tax": 0.0, "final_total": 100.0,
+                }
+                for i in range(start, start + count)
+            ])
+        for start in range(0, line_items, batch):
+            count = min(batch, line_items - start)
+            conn.execute(insert(models.LineItem), [
+                {"id": i + 1, "invoice_id": i // per_invoice + 1, "description": f"Service call, part {i % 500}", "quantity": 1, "unit_price": 25.0}
+                for i in range(start, start + count)
+            ])
+            print(f"  seeded {start + count:,} line items", end="\r", flush=True)
+    print()
+
+
+def drain(export_format: str, compress: bool) -> tuple[int, int]:
+    """Bytes streamed (compressed, when gzipped) and rows in them, header excluded."""
+    chunks = stream_export(export_query(), export_format, compress=compress)
+    if compress:
+        reader = _ChunkReader(chunks)
+        archive = gzip.GzipFile(fileobj=reader)
+        lines = sum(block.count(b"\n") for block in iter(lambda: archive.read(1 << 20), b""))
+        size = reader.compressed
+    else:
+        size = lines = 0
+        for chunk in chunks:
+            size += len(chunk)
+            lines += chunk.count(b"\n")
+    return size, lines - (export_format == "csv")
+
+
+class _ChunkReader:
+    """File-like view over a chunk iterator, so GzipFile can check the stream decompresses."""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._buffer = b""
+        self.compressed = 0
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self.compressed += len(chunk)
+            self._buffer += chunk
+        data, self._buffer = (self._buffer, b"") if size < 0 else (self._buffer[:size], self._buffer[size:])
+        return data
+
+
+def main() -> int:
+    failures = 0
+    try:
+        seed(args.line_items, args.items_per_invoice)
+        print(f"{'export':12} {'rows':>10} {'MB out':>8} {'seconds':>8} {'rows/s':>9} {'peak MB':>8}")
+        for export_format in ("csv", "ndjson"):
+            for compress in (False, True):
+                name = f"{export_format}{'.gz' if compress else ''}"
+                start = time.perf_counter()
+                size, rows = drain(export_format, compress)
+                elapsed = time.perf_counter() - start
+
+                # Second pass under tracemalloc, which slows it down too much to time
+                tracemalloc.start()
+                drain(export_format, compress)
+                peak = tracemalloc.get_traced_memory()[1] / 1e6
+                tracemalloc.stop()
+
+                ok = rows == args.line_items and peak <= args.max_memory_mb
+                failures += not ok
+                print(f"{'✅' if ok else '❌'} {name:10} {rows:10,} {size / 1e6:8.1f} {elapsed:8.1f} {rows / elapsed:9,.0f} {peak:8.1f}")
+    finally:
+        os.remove(_db_path)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# backend/benchmarks/invoice_list.py
+"""Compare a 100-row invoice list page as full InvoiceOut rows vs InvoiceSummary rows.
+
+Seeds a throwaway SQLite database with signed invoices (realistic signature
+data URIs) and reports payload size and median build+encode latency.
+
+    python -m benchmarks.invoice_list
+    python -m benchmarks.invoice_list --rows 100 --signature-kb 80 --repeat 20
+"""
+import argparse
+import base64
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+_db_fd, _db_path = tempfile.mkstemp(suffix=".db")
+os.close(_db_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import desc
+from sqlalchemy.orm import undefer_group
+
+from app import models
+from app.database import Base, SessionLocal, engine
+from app.utils.invoice import invoice_summary_query
+from schemas.invoices import InvoiceOut, InvoiceSummary
+
+
+def seed(rows: int, signature_kb: int):
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    tech = models.User(email="tech@example.com", user_name="Tech", hashed_password="x", is_active=True)
+    db.add(tech)
+    db.flush()
+    signature = "data:image/png;base64," + base64.b64encode(os.urandom(signature_kb * 768)).decode()
+    for i in range(rows):
+        customer = models.Customer(first_name="Pat", last_name=f"Customer {i}", email=f"c{i}@example.com", phone="555-0100")
+        db.add(customer)
+        db.flush()
+        invoice = models.Invoice(
+            customer_id=customer.id, number=f"INV-20250501-{i:03d}", date=date(2025, 5, 1), status="unpaid",
+            total=100.0, discount=0.0, tax=0.0, final_total=100.0, tech_id=tech.id,
+            signed_at=datetime(2025, 5, 1, 10, 30), accepted=True, signature_base64=signature,
+        )
+        invoice.items = [models.LineItem(description=f"task {j}", quantity=1, unit_price=25.0) for j in range(4)]
+        db.add(invoice)
+    db.commit()
+    db.close()
+
+
+def full_page(db, rows: int) -> bytes:
+    # The list endpoint as it was: every column, relationships loaded row by row
+    invoices = db.query(models.Invoice).options(undefer_group("signatures")).order_by(desc(models.Invoice.date)).limit(rows).all()
+    results = []
+    for inv in invoices:
+        inv_out = InvoiceOut.from_orm(inv)
+        if inv.tech:
+            inv_out.user_name = inv.tech.user_name or inv.tech.email
+        results.append(inv_out)
+    return json.dumps(jsonable_encoder(results)).encode()
+
+
+def summary_page(db, rows: int) -> bytes:
+    invoices = invoice_summary_query(db).order_by(desc(models.Invoice.date)).limit(rows).all()
+    results = []
+    for inv in invoices:
+        inv_out = InvoiceSummary.from_orm(inv)
+        if inv.customer:
+            inv_out.customer_name = f"{inv.customer.first_name} {inv.customer.last_name}"
+        if inv.tech:
+            inv_out.user_name = inv.tech.user_name or inv.tech.email
+        results.append(inv_out)
+    return json.dumps(jsonable_encoder(results)).encode()
+
+
+def measure(page, rows: int, repeat: int) -> dict:
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        db = SessionLocal()
+        start = time.perf_counter()
+        size = len(page(db, rows))
+        timings.append((time.perf_counter() - start) * 1000)
+        db.close()
+    return {"median_ms": round(statistics.median(timings), 2), "bytes": size}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the invoice list payload")
+    parser.add_argument("--rows", type=int, default=100, help="rows per page")
+    parser.add_argument("--signature-kb", type=int, default=60, help="approximate size of each signature data URI")
+    parser.add_argument("--repeat", type=int, default=10, help="pages built per variant (median is reported)")
+    args = parser.parse_args(argv)
+
+    try:
+        seed(args.rows, args.signature_kb)
+        before = measure(full_page, args.rows, args.repeat)
+        after = measure(summary_page, args.rows, args.repeat)
+        print(f"{'variant':16} {'median ms':>10} {'payload KB':>11}")
+        for name, r in (("InvoiceOut", before), ("InvoiceSummary", after)):
+            print(f"{name:16} {r['median_ms']:10.1f} {r['bytes'] / 1024:11.1f}")
+        print(f"{'reduction':16} {before['median_ms'] / after['median_ms']:9.1f}x {before['bytes'] / after['bytes']:10.1f}x")
+    finally:
+        os.remove(_db_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+# backend/benchmarks/pagination.py
+"""Page latency at increasing depth: OFFSET pagination vs keyset cursors.
+
+Seeds a throwaway SQLite database with synthetic invoices (1M by default),
+then times the invoice list query for one page at several depths in both
+modes. Keyset pages should cost the same at any depth; OFFSET pages grow
+with it.
+
+    python -m benchmarks.pagination
+    python -m benchmarks.pagination --rows 200000 --page-size 50
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+_db_fd, _db_path = tempfile.mkstemp(suffix=".db")
+os.close(_db_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+from sqlalchemy import Index, insert
+
+from app import models
+from app.database import Base, SessionLocal, engine
+from app.utils.invoice import invoice_summary_query
+from app.utils.pagination import encode_cursor, keyset_order, paginate
+
+DEPTH_FRACTIONS = [0, 0.001, 0.01, 0.1, 0.5, 0.99]
+
+
+def seed(rows: int, batch: int = 50_000):
+    Base.metadata.create_all(engine)
+    # Keyset pages seek on the sort key, so it needs an index like any real deployment would have
+    Index("bench_invoices_date_id", models.Invoice.date, models.Invoice.id).create(engine)
+
+    rng = random.Random(42)
+    start = date(2015, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Customer), [
+            {"id": i, "first_name": "Pat", "last_name": f"Customer {i}", "email": f"c{i}@example.com"} for i in range(1, 1001)
+        ])
+        conn.execute(insert(models.User), [{"id": 1, "email": "tech@example.com", "user_name": "Tech", "hashed_password": "x"}])
+        for offset in range(0, rows, batch):
+            conn.execute(insert(models.Invoice), [
+                {
+                    "customer_id": rng.randint(1, 1000),
+                    "tech_id": 1,
+                    "number": f"INV-{n:08d}",
+                    "date": start + timedelta(days=rng.randint(0, 3650)),
+                    "status": rng.choice(["paid", "unpaid"]),
+                    "total": 100.0,
+                    "final_total": 100.0,
+                    "is_active": True,
+                    "is_estimate": False,
+                }
+                for n in range(offset, min(offset + batch, rows))
+            ])
+            print(f"  seeded {min(offset + batch, rows):,} invoices", end="\r", flush=True)
+    print()
+
+
+def _time_page(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        db = SessionLocal()
+        start = time.perf_counter()
+        fn(db)
+        timings.append((time.perf_counter() - start) * 1000)
+        db.close()
+    return statistics.median(timings)
+
+
+def cursor_at(depth: int) -> str | None:
+    """Cursor a client would hold after paging through `depth` rows (date desc)."""
+    if depth == 0:
+        return None
+    db = SessionLocal()
+    row = (
+        db.query(models.Invoice.id, models.Invoice.date)
+        .order_by(*keyset_order(models.Invoice.date, models.Invoice.id, descending=True))
+        .offset(depth - 1)
+        .first()
+    )
+    db.close()
+    return encode_cursor("date", "desc", row.date, row.id)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark OFFSET vs keyset pagination")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="synthetic invoices to seed")
+    parser.add_argument("--page-size", type=int, default=100, help="rows per page")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per page (median is reported)")
+    args = parser.parse_args(argv)
+
+    try:
+        seed(args.rows)
+
+        def page(offset=0, cursor=None):
+            return lambda db: paginate(
+                invoice_summary_query(db), models.Invoice.date, models.Invoice.id,
+                "date", "desc", args.page_size, offset, cursor,
+            )
+
+        print(f"{'depth':>10} {'offset ms':>10} {'cursor ms':>10}")
+        for fraction in DEPTH_FRACTIONS:
+            depth = int(args.rows * fraction)
+            offset_ms = _time_page(page(offset=depth), args.repeat)
+            cursor_ms = _time_page(page(cursor=cursor_at(depth)), args.repeat)
+            print(f"{depth:10,} {offset_ms:10.2f} {cursor_ms:10.2f}")
+    finally:
+        os.remove(_db_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+# backend/benchmarks/pdf_render.py
+"""Benchmark invoice PDF rendering across sizes and variants.
+
+Each case runs in a fresh process so peak RSS is per case, not cumulative.
+
+    python -m benchmarks.pdf_render
+    python -m benchmarks.pdf_render --save-baseline benchmarks/pdf_baseline.json
+    python -m benchmarks.pdf_render --compare benchmarks/pdf_baseline.json --tolerance 0.15
+"""
+import argparse
+import base64
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+# app.pdf pulls in the models for cache invalidation; no database is touched here
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+ITEM_COUNTS = [1, 10, 100, 1000]
+METRICS = ["wall_ms", "html_ms", "layout_ms", "write_pdf_ms"]
+
+
+def _signature_data_uri() -> str:
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGBA", (600, 160), (255, 255, 255, 0))
+    draw = ImageDraw.Draw(image)
+    for x in range(0, 560, 8):
+        draw.line((20 + x, 80 + (x % 40) - 20, 28 + x, 80 - (x % 30) + 15), fill=(0, 0, 0, 255), width=3)
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode()
+
+
+def synthetic_invoice(items: int, paid: bool) -> dict:
+    now = datetime(2025, 5, 1, 10, 30)
+    line_items = [
+        {"id": i, "description": f"Labor and materials, task {i}", "quantity": 1 + i % 3, "unit_price": 25.0 + i % 50}
+        for i in range(items)
+    ]
+    subtotal = sum(item["quantity"] * item["unit_price"] for item in line_items)
+    return {
+        "id": None,
+        "number": "INV-20250501-001",
+        "date": now,
+        "due_date": now + timedelta(days=30),
+        "status": "paid" if paid else "unpaid",
+        "payment_type": "card",
+        "paid_at": now if paid else None,
+        "customer": {
+            "first_name": "Pat", "last_name": "Customer", "street": "1 Main St.", "city": "Skokie",
+            "state": "IL", "zipcode": "60076", "phone": "(847) 555-0100", "email": "pat@example.com",
+        },
+        "items": line_items,
+        "total": subtotal,
+        "discount": 10.0,
+        "tax": 10.25,
+        "final_total": round((subtotal - 10.0) * 1.1025, 2),
+        "notes": "Synthetic benchmark invoice.",
+        "testimonial": "Great work, would hire again.",
+    }
+
+
+def _run_case(case: dict) -> dict:
+    from app.pdf import build_invoice_html, layout_invoice_html, warm_up_renderer
+
+    # Measure steady-state renders, as a warm render worker would see them
+    warm_up_renderer()
+
+    invoice_data = synthetic_invoice(case["items"], case["paid"])
+    signature = _signature_data_uri() if case["signed"] else ""
+    samples = {metric: [] for metric in METRICS}
+    size = 0
+
+    for _ in range(case["repeat"]):
+        start = time.perf_counter()
+        html = build_invoice_html(invoice_data, signature, "05/01/2025 10:30" if case["signed"] else "", case["signed"], case["doc_type"])
+        built = time.perf_counter()
+        document = layout_invoice_html(html)
+        laid_out = time.perf_counter()
+        pdf_bytes = document.write_pdf()
+        written = time.perf_counter()
+
+        samples["html_ms"].append((built - start) * 1000)
+        samples["layout_ms"].append((laid_out - built) * 1000)
+        samples["write_pdf_ms"].append((written - laid_out) * 1000)
+        samples["wall_ms"].append((written - start) * 1000)
+        size = len(pdf_bytes)
+
+    result = {metric: round(statistics.median(values), 2) for metric, values in samples.items()}
+    result["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    result["pdf_bytes"] = size
+    return result
+
+
+def case_name(case: dict) -> str:
+    return (
+        f"{case['doc_type'].lower()}-{case['items']}items"
+        f"-{'signed' if case['signed'] else 'unsigned'}"
+        f"-{'paid' if case['paid'] else 'unpaid'}"
+    )
+
+
+def build_cases(item_counts, repeat):
+    for items, signed, paid, doc_type in itertools.product(item_counts, [False, True], [False, True], ["Invoice", "Estimate"]):
+        yield {"items": items, "signed": signed, "paid": paid, "doc_type": doc_type, "repeat": repeat}
+
+
+def run(item_counts, repeat) -> dict:
+    results = {}
+    ctx = multiprocessing.get_context("spawn")
+    for case in build_cases(item_counts, repeat):
+        with ctx.Pool(1, maxtasksperchild=1) as pool:
+            results[case_name(case)] = pool.apply(_run_case, (case,))
+    return results
+
+
+def print_results(results: dict, baseline: dict | None = None):
+    header = f"{'case':45} {'wall':>9} {'html':>8} {'layout':>9} {'write':>8} {'rss MB':>7} {'bytes':>9}"
+    if baseline:
+        header += f" {'Δ wall':>8}"
+    print(header)
+    for name, r in results.items():
+        line = (
+            f"{name:45} {r['wall_ms']:9.1f} {r['html_ms']:8.1f} {r['layout_ms']:9.1f}"
+            f" {r['write_pdf_ms']:8.1f} {r['peak_rss_mb']:7.1f} {r['pdf_bytes']:9d}"
+        )
+        if baseline and baseline.get(name, {}).get("wall_ms"):
+            before = baseline[name]["wall_ms"]
+            line += f" {(r['wall_ms'] - before) / before * 100:+7.1f}%"
+        print(line)
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    found = []
+    for name, r in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        for metric in ["wall_ms", "peak_rss_mb"]:
+            if r[metric] > before[metric] * (1 + tolerance):
+                found.append(f"{name}: {metric} {before[metric]} -> {r[metric]}")
+    return found
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark invoice PDF rendering")
+    parser.add_argument("--items", type=int, nargs="+", default=ITEM_COUNTS, help="line item counts to render")
+    parser.add_argument("--repeat", type=int, default=3, help="renders per case (median is reported)")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown before failing (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    results = run(args.items, args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if baseline:
+        found = regressions(results, baseline, args.tolerance)
+        if found:
+            print("\nRender regressions:")
+            for line in found:
+                print(f"  {line}")
+            return 1
+        print("\nNo render regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
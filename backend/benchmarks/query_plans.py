@@ -0,0 +1,115 @@
+# backend/benchmarks/query_plans.py
+"""Check that the hot invoice queries are planned on their indexes.
+
+Builds each query the way the routes do, runs EXPLAIN on it and fails if the
+expected index is missing from the plan. Uses a throwaway SQLite database
+unless --database-url is given (Postgres plans are taken with sequential
+scans disabled, so an empty dev database still shows which index would be used).
+
+    python -m benchmarks.query_plans
+    python -m benchmarks.query_plans --database-url postgresql+psycopg2://...
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+parser = argparse.ArgumentParser(description="EXPLAIN the hot invoice queries")
+parser.add_argument("--database-url", help="database to EXPLAIN against (default: throwaway SQLite)")
+args = parser.parse_args()
+
+_db_path = None
+if args.database_url:
+    os.environ["DATABASE_URL"] = args.database_url
+else:
+    _db_fd, _db_path = tempfile.mkstemp(suffix=".db")
+    os.close(_db_fd)
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+from datetime import date
+
+from sqlalchemy import func, text
+
+from app import models
+from app.database import Base, SessionLocal, engine
+from app.utils.pagination import keyset_order
+from app.utils.statements import open_invoice_filter
+
+
+def hot_queries(db):
+    """(name, query, index expected in its plan)"""
+    newest = keyset_order(models.Invoice.date, models.Invoice.id, descending=True)
+    return [
+        (
+            "list, newest first",
+            db.query(models.Invoice.id).filter(models.Invoice.date.isnot(None)).order_by(models.Invoice.date.desc(), models.Invoice.id.desc()).limit(20),
+            "ix_invoices_date_id",
+        ),
+        (
+            "list by customer",
+            db.query(models.Invoice.id).filter(models.Invoice.customer_id == 1).order_by(*newest).limit(20),
+            "ix_invoices_customer_id_date",
+        ),
+        (
+            "list by tech, date range",
+            db.query(models.Invoice.id).filter(models.Invoice.tech_id == 1, models.Invoice.date >= date(2025, 1, 1)),
+            "ix_invoices_tech_id_date",
+        ),
+        (
+            "list by status, date range",
+            db.query(models.Invoice.id).filter(models.Invoice.status == "unpaid", models.Invoice.date >= date(2025, 1, 1)),
+            "ix_invoices_status_date",
+        ),
+        (
+            "open balance per customer",
+            db.query(models.Invoice.customer_id, func.sum(models.Invoice.final_total))
+            .filter(models.Invoice.customer_id.in_([1, 2, 3]), *open_invoice_filter())
+            .group_by(models.Invoice.customer_id),
+            "ix_invoices_open_balance",
+        ),
+        (
+            "line items for invoices",
+            db.query(models.LineItem).filter(models.LineItem.invoice_id.in_([1, 2, 3])),
+            "ix_line_items_invoice_id",
+        ),
+        (
+            "public token for invoice",
+            db.query(models.PublicToken).filter(models.PublicToken.invoice_id == 1),
+            "ix_public_tokens_invoice_id",
+        ),
+    ]
+
+
+def explain(db, query) -> str:
+    sql = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    if engine.dialect.name == "sqlite":
+        rows = db.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        return "\n".join(row[-1] for row in rows)
+    db.execute(text("SET LOCAL enable_seqscan = off"))
+    return "\n".join(row[0] for row in db.execute(text(f"EXPLAIN {sql}")).all())
+
+
+def main() -> int:
+    if _db_path:
+        Base.metadata.create_all(engine)
+
+    db = SessionLocal()
+    failures = 0
+    try:
+        for name, query, index in hot_queries(db):
+            plan = explain(db, query)
+            ok = index in plan
+            failures += not ok
+            print(f"{'✅' if ok else '❌'} {name}: expected {index}")
+            if not ok:
+                print("    " + plan.replace("\n", "\n    "))
+    finally:
+        db.rollback()
+        db.close()
+        if _db_path:
+            os.remove(_db_path)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
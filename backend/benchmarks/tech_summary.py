@@ -0,0 +1,158 @@
+# backend/benchmarks/tech_summary.py
+"""Tech summary report: invoice scan vs the tech_daily_revenue rollup.
+
+Seeds 1M invoices (by default) over three years and 20 techs into a
+throwaway SQLite database, or into --database-url, builds the rollup, then
+times the old report query (every invoice joined to users) against the
+current /reports/tech-summary query, which reads the rollup, and a repeat
+read served from the report cache. Exits non-zero if the two queries
+disagree or the rollup path is slower than --target-ms.
+
+    python -m benchmarks.tech_summary
+    python -m benchmarks.tech_summary --invoices 200000
+    python -m benchmarks.tech_summary --database-url postgresql+psycopg2://...
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+parser = argparse.ArgumentParser(description="Benchmark the tech summary report")
+parser.add_argument("--database-url", help="database to seed (default: throwaway SQLite); its invoices, users and rollup are replaced")
+parser.add_argument("--invoices", type=int, default=1_000_000, help="synthetic invoices to seed")
+parser.add_argument("--techs", type=int, default=20, help="synthetic techs to seed")
+parser.add_argument("--repeat", type=int, default=5, help="timed runs per path (median is reported)")
+parser.add_argument("--target-ms", type=float, default=100.0, help="fail if the rollup report's median is slower than this")
+args = parser.parse_args()
+
+_db_path = None
+if args.database_url:
+    os.environ["DATABASE_URL"] = args.database_url
+else:
+    _db_fd, _db_path = tempfile.mkstemp(suffix=".db")
+    os.close(_db_fd)
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+
+from sqlalchemy import case, delete, func, insert
+
+from app import models
+from app.database import Base, SessionLocal, engine
+from app.routes.reports import _tech_summary, tech_summary
+from app.utils.rollups import reconcile_tech_rollup
+
+STATUSES = ["paid"] * 6 + ["unpaid"] * 3 + ["overdue"]
+
+
+def seed(invoices: int, techs: int, batch: int = 50_000):
+    Base.metadata.create_all(engine)
+    rng = random.Random(7)
+    first_day = date.today() - timedelta(days=3 * 365)
+    with engine.begin() as conn:
+        conn.execute(delete(models.TechDailyRevenue))
+        conn.execute(delete(models.Invoice))
+        conn.execute(delete(models.User))
+        conn.execute(insert(models.User), [
+            {"id": i + 1, "user_name": f"Tech {i + 1:02d}", "email": f"tech{i + 1}@example.com", "hashed_password": "x"}
+            for i in range(techs)
+        ])
+        for start in range(0, invoices, batch):
+            count = min(batch, invoices - start)
+            conn.execute(insert(models.Invoice), [
+                {
+                    "id": i + 1, "number": f"INV-{i + 1:08d}", "tech_id": rng.randint(1, techs),
+                    "date": first_day + timedelta(days=i * 3 * 365 // invoices), "status": rng.choice(STATUSES),
+                    "is_estimate": rng.random() < 0.1, "is_active": True, "final_total": round(rng.uniform(50, 2000), 2),
+                }
+                for i in range(start, start + count)
+            ])
+            print(f"  seeded {start + count:,} invoices", end="\r", flush=True)
+    print()
+
+
+def invoice_scan_summary(db):
+    """The report as it was before the rollup: every invoice, six CASE aggregates."""
+    ytd_start = date(datetime.now().year, 1, 1)
+    invoice = models.Invoice
+    in_ytd = invoice.date >= ytd_start
+
+    def ytd_sum(*conditions):
+        condition = in_ytd if not conditions else in_ytd & conditions[0]
+        return func.coalesce(func.sum(case((condition, invoice.final_total))), 0)
+
+    rows = (
+        db.query(
+            models.User.id.label("tech_id"),
+            func.count(case((in_ytd, 1))).label("ytd_count"),
+            ytd_sum().label("ytd_total"),
+            ytd_sum(invoice.status == "paid").label("ytd_paid"),
+            ytd_sum(invoice.status == "unpaid").label("ytd_unpaid"),
+            ytd_sum(invoice.status == "overdue").label("ytd_overdue"),
+            func.count(invoice.id).label("all_count"),
+            func.coalesce(func.sum(invoice.final_total), 0).label("all_total"),
+        )
+        .outerjoin(invoice, models.User.id == invoice.tech_id)
+        .group_by(models.User.id)
+        .order_by(models.User.user_name)
+        .all()
+    )
+    return [
+        (row.tech_id, row.ytd_count, round(row.ytd_total, 2), round(row.ytd_paid, 2), round(row.ytd_unpaid, 2),
+         round(row.ytd_overdue, 2), row.all_count, round(row.all_total, 2))
+        for row in rows
+    ]
+
+
+def rollup_summary(db):
+    return [
+        (row["tech_id"], row["ytd"]["invoice_count"], row["ytd"]["total_amount"], row["ytd"]["paid_amount"],
+         row["ytd"]["unpaid_amount"], row["ytd"]["overdue_amount"], row["all_time"]["invoice_count"], row["all_time"]["total_amount"])
+        for row in _tech_summary(db, date(datetime.now().year, 1, 1))
+    ]
+
+
+def timed(fn, db):
+    timings, result = [], None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = fn(db)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def main() -> int:
+    failures = 0
+    try:
+        seed(args.invoices, args.techs)
+        db = SessionLocal()
+        start = time.perf_counter()
+        reconcile_tech_rollup(db)
+        rows = db.query(func.count()).select_from(models.TechDailyRevenue).scalar()
+        print(f"rollup rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms: {rows:,} rows for {args.invoices:,} invoices")
+
+        scan_ms, scan = timed(invoice_scan_summary, db)
+        rollup_ms, rollup = timed(rollup_summary, db)
+        print(f"ℹ️  invoice scan   {scan_ms:10.1f} ms")
+        ok = rollup_ms <= args.target_ms
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} rollup         {rollup_ms:10.1f} ms ({scan_ms / rollup_ms:.0f}x faster)")
+        tech_summary(db)
+        cached_ms, _ = timed(tech_summary, db)
+        print(f"ℹ️  cached         {cached_ms:10.3f} ms")
+
+        # Sums are added up in a different order, so allow a cent of float drift
+        same = len(scan) == len(rollup) and all(abs(x - y) <= 0.01 for a, b in zip(scan, rollup) for x, y in zip(a, b))
+        failures += not same
+        print(f"{'✅' if same else '❌'} both paths report the same totals")
+        db.close()
+    finally:
+        if _db_path:
+            os.remove(_db_path)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
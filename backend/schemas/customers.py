@@ -21,5 +21,6 @@ class CustomerUpdate(CustomerBase):
 class CustomerOut(CustomerBase):
     id: int
     total_unpaid: float = 0.0
+    invoice_count: int = 0
     class Config:
         from_attributes = True
\ No newline at end of file
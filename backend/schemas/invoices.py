@@ -1,6 +1,6 @@
 # backend/schemas/invoices.py
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, List, Optional
 from datetime import datetime
 from .customers import CustomerOut
 
@@ -10,6 +10,8 @@ class LineItemBase(BaseModel):
     unit_price: float
 
 class LineItemCreate(BaseModel):
+    # Set when editing an existing item so PUT /invoices/{id} updates it in place
+    id: Optional[int] = None
     description: str
     quantity: int
     unit_price: float
@@ -81,6 +83,57 @@ class InvoiceOut(InvoiceBase):
     class Config:
         from_attributes = True
 
+class LineItemChanges(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+
+class InvoiceReplaceOut(InvoiceOut):
+    # Line item rows written by PUT /invoices/{id}
+    item_changes: Optional[LineItemChanges] = None
+
+class InvoiceSummary(BaseModel):
+    # List rows only: no line items, customer details or signature blobs
+    id: int
+    number: str
+    date: Optional[datetime]
+    due_date: Optional[datetime] = None
+    status: Optional[str] = None
+    total: Optional[float] = 0.0
+    final_total: Optional[float] = 0.0
+    paid_at: Optional[datetime] = None
+    accepted: Optional[bool] = None
+    estimate_accepted: Optional[bool] = None
+    is_active: bool
+    is_estimate: bool
+    customer_id: int
+    customer_name: Optional[str] = None
+    tech_id: Optional[int] = None
+    user_name: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class InvoiceSignatureOut(BaseModel):
+    id: int
+    signed_at: Optional[datetime] = None
+    accepted: Optional[bool] = None
+    signature_base64: Optional[str] = None
+    estimate_accepted: Optional[bool] = None
+    estimate_signed_at: Optional[datetime] = None
+    estimate_signature_base64: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class BulkInvoiceResult(BaseModel):
+    index: int  # position in the request list
+    ok: bool
+    id: Optional[int] = None
+    number: Optional[str] = None
+    errors: Optional[List[Any]] = None
+
 class InvoiceAcknowledgment(BaseModel):
     signed_at: Optional[datetime] = None
     accepted: Optional[bool] = None
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import Any, Optional
+from datetime import datetime
+
+class JobOut(BaseModel):
+    id: str
+    kind: str
+    status: str
+    progress: Optional[str] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class LineItemSuggestion(BaseModel):
+    description: str
+    use_count: int
+    last_used_at: Optional[datetime] = None
+    last_unit_price: Optional[float] = None
+    median_unit_price: Optional[float] = None  # over the most recent uses
+
+    class Config:
+        from_attributes = True
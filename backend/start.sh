@@ -14,14 +14,18 @@ echo "✅ Postgres is ready."
 
 export RUN_MAIN=true
 
-echo "🧹 Resetting migrations..."
-rm -f alembic/versions/*.py
+echo "🧹 Resetting generated migration..."
+# Only the autogenerated schema is throwaway; committed migrations stay
+rm -f alembic/versions/*_clean_schema.py
+
+echo "🚀 Applying committed migrations..."
+alembic upgrade heads
 
 echo "📦 Generating fresh migration..."
-alembic revision --autogenerate -m "clean schema"
+alembic revision --autogenerate -m "clean schema" --head base
 
 echo "🚀 Applying migrations..."
-alembic upgrade head
+alembic upgrade heads
 
 echo "🔥 Starting server..."
 exec uvicorn app.main:app \
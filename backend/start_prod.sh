@@ -11,7 +11,8 @@ export RUN_MAIN=true
 echo "✅ Postgres is ready."
 
 echo "📦 Applying migrations..."
-alembic upgrade head
+# "heads": committed migrations are their own branch next to the local schema revision
+alembic upgrade heads
 
 echo "🔥 Starting server..."
 exec uvicorn app.main:app \
@@ -21,9 +22,10 @@ exec uvicorn app.main:app \
 # NOTE:  First Time run we need to create the DB with alembic
 # docker compose -f docker-compose.prod.yml exec backend bash
 
-# rm alembic/versions/*.py
-# alembic revision --autogenerate -m "clean schema"
-# alembic upgrade head
+# rm alembic/versions/*_clean_schema.py
+# alembic upgrade heads
+# alembic revision --autogenerate -m "clean schema" --head base
+# alembic upgrade heads
 
 # export PSQL_URL=$(echo "$DATABASE_URL" | sed 's/+psycopg2//')
 # psql "$PSQL_URL"
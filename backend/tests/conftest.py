@@ -0,0 +1,167 @@
+# backend/tests/conftest.py
+"""Shared fixtures: a throwaway SQLite database, an authenticated client and
+helpers to create customers and invoices through the API.
+
+    cd backend && pip install -r requirements-dev.txt && python -m pytest
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+_db_fd, _db_path = tempfile.mkstemp(suffix=".db")
+os.close(_db_fd)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"
+# No background threads: tests drive everything through the request cycle
+os.environ.setdefault("PDF_POOL_WORKERS", "0")
+os.environ.setdefault("JOB_WORKERS", "0")
+os.environ.setdefault("OUTBOX_CONNECTIONS", "0")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine.interfaces import ExecuteStyle
+
+from app import models
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.utils.auth import create_access_token
+from app.utils.autocomplete import description_key
+from app.utils.balances import reconcile_customer_balances
+from app.utils.report_cache import report_cache
+from app.utils.rollups import reconcile_tech_rollup
+
+
+def pytest_sessionfinish(session, exitstatus):
+    engine.dispose()
+    os.remove(_db_path)
+
+
+@pytest.fixture(autouse=True)
+def fresh_database():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    report_cache.clear()
+    db = SessionLocal()
+    db.add(models.User(id=1, email="tech@example.com", user_name="Tech", hashed_password="x"))
+    db.commit()
+    db.close()
+    yield
+
+
+@pytest.fixture
+def count_statements():
+    """Context manager collecting every SQL statement sent while it's open.
+
+    Every execution counts, so N lazy loads are N statements. The one exception
+    is an ORM bulk INSERT ... RETURNING, which SQLite can't batch and so sends
+    as one INSERT per row from a single executemany; those count once, as the
+    one statement Postgres sends for it.
+    """
+    @contextmanager
+    def count():
+        statements = []
+        last_context = [None]
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if context is last_context[0] and context.execute_style is ExecuteStyle.INSERTMANYVALUES:
+                return
+            last_context[0] = context
+            statements.append(" ".join(statement.split()))
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+    return count
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="session")
+def client():
+    Base.metadata.create_all(engine)
+    with TestClient(app) as test_client:
+        test_client.headers["Authorization"] = f"Bearer {create_access_token({'sub': 'tech@example.com'})}"
+        yield test_client
+
+
+@pytest.fixture
+def create_customer(client):
+    counter = iter(range(1, 1_000_000))
+
+    def create(**fields):
+        n = next(counter)
+        body = {"first_name": "Test", "last_name": f"Customer {n}", "email": f"customer{n}@example.com", **fields}
+        response = client.post("/customers/", json=body)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return create
+
+
+@pytest.fixture
+def create_invoice(client):
+    def create(customer_id: int, items=(("Service call", 1, 100.0),), **fields):
+        body = {
+            "customer_id": customer_id,
+            "tech_id": 1,
+            "items": [{"description": d, "quantity": q, "unit_price": p} for d, q, p in items],
+            **fields,
+        }
+        response = client.post("/invoices/", json=body)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return create
+
+
+@pytest.fixture
+def update_invoice(client):
+    """PATCH (or PUT) an invoice with every field carried over from its last response, plus changes."""
+    def update(invoice: dict, method: str = "patch", **changes):
+        body = {
+            "customer_id": invoice["customer_id"],
+            "due_date": invoice["due_date"] or f"{invoice['date'][:10]}T00:00:00",
+            "status": invoice["status"],
+            "notes": invoice["notes"],
+            "payment_type": invoice["payment_type"],
+            "discount": invoice["discount"],
+            "tax": invoice["tax"],
+            "tech_id": invoice["tech_id"],
+            "is_active": invoice["is_active"],
+            "is_estimate": invoice["is_estimate"],
+            "items": [
+                {"id": item["id"], "description": item["description"], "quantity": item["quantity"], "unit_price": item["unit_price"]}
+                for item in invoice["items"]
+            ],
+            **changes,
+        }
+        response = client.request(method.upper(), f"/invoices/{invoice['id']}", json=body)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return update
+
+
+@pytest.fixture
+def assert_counters_consistent(db):
+    """Check the counters invoice writes maintain against a rebuild from the invoices."""
+    def check():
+        db.expire_all()
+        assert reconcile_customer_balances(db, dry_run=True) == []
+        assert reconcile_tech_rollup(db, dry_run=True) == []
+        expected = {}
+        for (description,) in db.query(models.LineItem.description):
+            key = description_key(description)
+            expected[key] = expected.get(key, 0) + 1
+        stored = {row.key: row.use_count for row in db.query(models.LineItemDescription) if row.use_count}
+        assert stored == expected
+
+    return check
@@ -0,0 +1,241 @@
+# backend/tests/test_analytics.py
+"""Every /reports endpoint served from the snapshot against the same report in SQL,
+after a full load and again after creates, edits and deletes refresh it incrementally."""
+import threading
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import case, distinct, func, select
+
+from app import models
+from app.utils import analytics
+from app.utils.analytics import AGING_BUCKETS, invoice_facts
+
+TODAY = date.today()
+YEAR = TODAY.year
+RANGE = {"date_from": date(YEAR, 1, 1), "date_to": TODAY}
+
+_invoice, _customer, _user = models.Invoice, models.Customer, models.User
+_billed = (func.coalesce(_invoice.is_active, True) == True) & (func.coalesce(_invoice.is_estimate, False) == False)  # noqa: E712
+_paid_total = case((_invoice.status == "paid", _invoice.final_total), else_=0.0)
+_tech_name = func.coalesce(_user.user_name, _user.email)
+
+
+def _in_range(date_from=None, date_to=None):
+    condition = _invoice.date.is_not(None)
+    if date_from is not None:
+        condition &= func.date(_invoice.date) >= date_from.isoformat()
+    if date_to is not None:
+        condition &= func.date(_invoice.date) <= date_to.isoformat()
+    return condition
+
+
+def _per_tech(db, columns, condition):
+    return db.execute(
+        select(_invoice.tech_id, _tech_name, *columns)
+        .outerjoin(_user, _user.id == _invoice.tech_id)
+        .where(condition)
+        .group_by(_invoice.tech_id, _tech_name)
+        .order_by(func.coalesce(_invoice.tech_id, -1))
+    ).all()
+
+
+def sql_ar_aging(db, as_of, tech_id=None):
+    due = func.julianday(func.date(func.coalesce(_invoice.due_date, _invoice.date)))
+    age = func.julianday(as_of.isoformat()) - due
+    bucket = case((age < 1, 0), (age <= 30, 1), (age <= 60, 2), (age <= 90, 3), else_=4)
+    condition = _billed & (func.coalesce(_invoice.status, "") != "paid") & due.is_not(None)
+    if tech_id is not None:
+        condition &= _invoice.tech_id == tech_id
+    rows = {b: (n, t) for b, n, t in db.execute(
+        select(bucket, func.count(), func.sum(_invoice.final_total)).where(condition).group_by(bucket)
+    )}
+    return [
+        {"bucket": name, "invoice_count": rows.get(i, (0, 0))[0], "amount": round(rows.get(i, (0, 0.0))[1] or 0.0, 2)}
+        for i, name in enumerate(AGING_BUCKETS)
+    ]
+
+
+def sql_monthly_revenue(db, year, tech_id=None):
+    month = func.strftime("%m", _invoice.date)
+    condition = _billed & _in_range(date(year, 1, 1), date(year, 12, 31))
+    if tech_id is not None:
+        condition &= _invoice.tech_id == tech_id
+    rows = db.execute(
+        select(_invoice.tech_id, _tech_name, month, func.count(), func.sum(_invoice.final_total), func.sum(_paid_total))
+        .outerjoin(_user, _user.id == _invoice.tech_id)
+        .where(condition)
+        .group_by(_invoice.tech_id, _tech_name, month)
+        .order_by(func.coalesce(_invoice.tech_id, -1), month)
+    ).all()
+    return [
+        {"tech_id": t, "user_name": name, "month": f"{year}-{m}", "invoice_count": n,
+         "total_amount": round(total, 2), "paid_amount": round(paid, 2)}
+        for t, name, m, n, total, paid in rows
+    ]
+
+
+def sql_average_ticket(db, date_from=None, date_to=None):
+    condition = _billed & _in_range(date_from, date_to)
+    rows = [
+        {"tech_id": t, "user_name": name, "invoice_count": n, "average_amount": round(total / n, 2)}
+        for t, name, n, total in _per_tech(db, (func.count(), func.sum(_invoice.final_total)), condition)
+    ]
+    n, total = db.execute(select(func.count(), func.sum(_invoice.final_total)).where(condition)).one()
+    rows.append({"tech_id": None, "user_name": "All", "invoice_count": n, "average_amount": round(total / n, 2) if n else 0.0})
+    return rows
+
+
+def sql_estimate_conversion(db, date_from=None, date_to=None):
+    won = func.sum(case((func.lower(_invoice.estimate_accepted).in_(("true", "t", "1", "yes")), 1), else_=0))
+    condition = (_invoice.is_estimate == True) & _in_range(date_from, date_to)  # noqa: E712
+
+    def row(tech_id, name, count, accepted):
+        return {"tech_id": tech_id, "user_name": name, "estimate_count": count, "accepted_count": accepted,
+                "conversion_rate": round(accepted / count, 4) if count else None}
+
+    rows = [row(*r) for r in _per_tech(db, (func.count(), won), condition)]
+    count, accepted = db.execute(select(func.count(), won).where(condition)).one()
+    rows.append(row(None, "All", count, accepted or 0))
+    return rows
+
+
+def sql_referral_sources(db, date_from=None, date_to=None):
+    source = func.trim(func.coalesce(_customer.referral_source, ""))
+    rows = db.execute(
+        select(source, func.count(distinct(_invoice.customer_id)), func.count(), func.sum(_invoice.final_total), func.sum(_paid_total))
+        .join(_customer, _customer.id == _invoice.customer_id)
+        .where(_billed & _in_range(date_from, date_to))
+        .group_by(source)
+    ).all()
+    return [
+        {"referral_source": s or None, "customer_count": customers, "invoice_count": n, "billed_amount": round(billed, 2),
+         "paid_amount": round(paid, 2), "revenue_per_customer": round(paid / customers, 2)}
+        for s, customers, n, billed, paid in rows
+    ]
+
+
+REPORTS = [
+    ("/reports/ar-aging", {}, lambda db: sql_ar_aging(db, TODAY)),
+    ("/reports/ar-aging", {"tech_id": 2}, lambda db: sql_ar_aging(db, TODAY, 2)),
+    ("/reports/monthly-revenue", {}, lambda db: sql_monthly_revenue(db, YEAR)),
+    ("/reports/monthly-revenue", {"year": YEAR - 1, "tech_id": 1}, lambda db: sql_monthly_revenue(db, YEAR - 1, 1)),
+    ("/reports/average-ticket", {}, lambda db: sql_average_ticket(db)),
+    ("/reports/average-ticket", RANGE, lambda db: sql_average_ticket(db, **RANGE)),
+    ("/reports/estimate-conversion", {}, lambda db: sql_estimate_conversion(db)),
+    ("/reports/estimate-conversion", RANGE, lambda db: sql_estimate_conversion(db, **RANGE)),
+    ("/reports/referral-sources", {}, lambda db: sql_referral_sources(db)),
+    ("/reports/referral-sources", RANGE, lambda db: sql_referral_sources(db, **RANGE)),
+]
+
+
+def assert_reports_match_sql(client, db):
+    db.expire_all()
+    for path, params, expected in REPORTS:
+        response = client.get(path, params=params)
+        assert response.status_code == 200, response.text
+        rows = response.json()
+        if path == "/reports/referral-sources":
+            # Best earning first; ties in any order
+            paid = [row["paid_amount"] for row in rows]
+            assert paid == sorted(paid, reverse=True)
+            rows = sorted(rows, key=lambda row: row["referral_source"] or "")
+            assert rows == sorted(expected(db), key=lambda row: row["referral_source"] or ""), (path, params)
+        else:
+            assert rows == expected(db), (path, params)
+
+
+@pytest.fixture
+def history(db, create_customer, create_invoice):
+    """Two techs and three referral sources over this year and last, with estimates and paid invoices."""
+    db.add(models.User(id=2, user_name="Second Tech", email="second@example.com", hashed_password="x"))
+    db.commit()
+    customers = [create_customer(referral_source=source)["id"] for source in ("Google", " Yelp ", "", "Google")]
+    invoices = []
+    for i in range(16):
+        invoice = create_invoice(
+            customers[i % 4],
+            items=[("Labor", 1 + i % 3, 40.0 + 15 * i)],
+            tech_id=1 + i % 2 if i % 7 else None,
+            is_estimate=i % 5 == 0,
+            status="paid" if i % 3 == 0 else "unpaid",
+        )
+        invoices.append(invoice["id"])
+
+    # Spread them over the last ~14 months; due dates from well past due to not yet due
+    for i, invoice_id in enumerate(invoices):
+        row = db.get(models.Invoice, invoice_id)
+        row.date = datetime.combine(TODAY, datetime.min.time()) - timedelta(days=29 * i)
+        row.due_date = None if i % 4 == 0 else row.date + timedelta(days=14 + 10 * (i % 3))
+        if row.is_estimate and i % 2 == 0:
+            row.estimate_accepted = "true"
+    db.commit()
+    return customers, invoices
+
+
+@pytest.fixture
+def loaded_snapshot(db):
+    """Start every test from a snapshot of this test's database."""
+    invoice_facts.reload(db)
+    return invoice_facts
+
+
+def test_full_snapshot_matches_sql(client, db, history, loaded_snapshot):
+    assert_reports_match_sql(client, db)
+
+
+def test_incremental_refresh_matches_sql_after_writes(client, db, history, loaded_snapshot, create_customer, create_invoice, update_invoice):
+    customers, invoices = history
+    loaded_at = invoice_facts._loaded_at
+
+    # Create: a new customer with a new referral source, and an estimate that gets accepted
+    newcomer = create_customer(referral_source="Nextdoor")["id"]
+    create_invoice(newcomer, items=[("Water heater", 1, 900.0)], tech_id=2)
+    estimate = create_invoice(customers[1], items=[("Repipe", 1, 2500.0)], is_estimate=True)
+    assert_reports_match_sql(client, db)
+
+    response = client.post(f"/invoices/{estimate['id']}/acknowledge", json={"estimate_accepted": True})
+    assert response.status_code == 200, response.text
+    assert_reports_match_sql(client, db)
+
+    # Edit: amounts, status, tech, customer and due date; a referral source change
+    edited = client.get(f"/invoices/{invoices[1]}").json()
+    update_invoice(edited, method="put", customer_id=newcomer, tech_id=None, status="paid",
+                   due_date=(TODAY - timedelta(days=45)).isoformat() + "T00:00:00",
+                   items=[{"description": "Labor", "quantity": 3, "unit_price": 120.0}])
+    update_invoice(client.get(f"/invoices/{invoices[2]}").json(), is_active=False)
+    response = client.put(f"/customers/{customers[0]}", json={**client.get(f"/customers/{customers[0]}").json(), "referral_source": "Yelp"})
+    assert response.status_code == 200, response.text
+    assert_reports_match_sql(client, db)
+
+    # Delete: one invoice, then a customer with everything they were billed
+    assert client.delete(f"/invoices/{invoices[3]}").status_code == 204
+    assert client.delete(f"/customers/{customers[3]}").status_code == 200
+    assert_reports_match_sql(client, db)
+
+    assert invoice_facts._loaded_at == loaded_at  # all of it through incremental refreshes
+
+
+def test_report_waiting_on_a_failed_startup_load_loads_the_snapshot_itself(client, db, history, monkeypatch):
+    broken = analytics.InvoiceFacts()
+    read_invoices, release = broken._read_invoices, threading.Event()
+
+    def fail_once(db, since):
+        # Fails only after a report has started waiting on this load
+        monkeypatch.setattr(broken, "_read_invoices", read_invoices)
+        release.wait(5)
+        raise RuntimeError("database not ready")
+
+    monkeypatch.setattr(broken, "_read_invoices", fail_once)
+    monkeypatch.setattr(analytics, "invoice_facts", broken)
+    broken.warm_up()
+
+    threading.Timer(0.2, release.set).start()
+    report = threading.Thread(target=assert_reports_match_sql, args=(client, db), daemon=True)
+    report.start()
+    report.join(10)
+    try:
+        assert not report.is_alive(), "report still waiting on the failed load"
+        assert broken._loaded.is_set()
+    finally:
+        broken._loaded.set()  # so a stuck report thread can't hang the run
@@ -0,0 +1,70 @@
+# backend/tests/test_autocomplete.py
+import pytest
+
+from app.utils import autocomplete
+from app.utils.autocomplete import description_index
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(db):
+    """The in-process index is rebuilt for this test's database, then kept current by commits."""
+    description_index.rebuild(db)
+
+
+def suggestions(client, q):
+    response = client.get("/line-items/suggestions", params={"q": q})
+    assert response.status_code == 200, response.text
+    return {row["description"]: row for row in response.json()}, [row["description"] for row in response.json()]
+
+
+def descriptions(client, q):
+    response = client.get("/line-items/descriptions", params={"q": q})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_counts_follow_line_item_inserts_edits_and_deletes(client, create_customer, create_invoice, update_invoice, assert_counters_consistent):
+    customer_id = create_customer()["id"]
+    first = create_invoice(customer_id, items=[("Drain cleaning", 1, 150.0), ("Trip fee", 1, 40.0)])
+    second = create_invoice(customer_id, items=[("drain  CLEANING", 1, 170.0), ("Water heater flush", 1, 90.0)])
+
+    hints, _ = suggestions(client, "drain")
+    # One entry per normalized description, shown as most recently written
+    assert list(hints) == ["drain CLEANING"]
+    assert hints["drain CLEANING"]["use_count"] == 2
+    assert hints["drain CLEANING"]["last_unit_price"] == 170.0
+    assert hints["drain CLEANING"]["median_unit_price"] == 160.0
+    assert_counters_consistent()
+
+    # Edit: rename one use, reprice another
+    drain, trip = first["items"]
+    update_invoice(first, method="put", items=[{**drain, "description": "Drain camera inspection"}, {**trip, "unit_price": 55.0}])
+    hints, _ = suggestions(client, "drain")
+    assert {description: hint["use_count"] for description, hint in hints.items()} == {"drain CLEANING": 1, "Drain camera inspection": 1}
+    assert suggestions(client, "trip")[0]["Trip fee"]["last_unit_price"] == 55.0
+    assert_counters_consistent()
+
+    # Delete: the last use of a description drops it from the suggestions
+    assert client.delete(f"/invoices/{second['id']}").status_code == 204
+    assert descriptions(client, "drain") == ["Drain camera inspection"]
+    assert descriptions(client, "heater") == []
+    assert_counters_consistent()
+
+
+def test_suggestions_rank_by_use_after_a_rebuild(client, monkeypatch, create_customer, create_invoice):
+    monkeypatch.setattr(autocomplete, "AUTOCOMPLETE_INDEX_TTL", 0)  # rebuild, and so re-rank, on every lookup
+    customer_id = create_customer()["id"]
+    for description, uses in (("Faucet install", 1), ("Faucet repair", 3), ("Garbage disposal repair", 2)):
+        for _ in range(uses):
+            create_invoice(customer_id, items=[(description, 1, 100.0)])
+
+    assert descriptions(client, "repair") == ["Faucet repair", "Garbage disposal repair"]
+    assert descriptions(client, "faucet") == ["Faucet repair", "Faucet install"]
+    _, order = suggestions(client, "fa")
+    assert order == ["Faucet repair", "Faucet install"]  # two letters: word prefixes only, not "Garbage"
+
+
+def test_new_descriptions_are_suggested_before_the_next_rebuild(client, create_customer, create_invoice):
+    create_invoice(create_customer()["id"], items=[("Sump pump replacement", 1, 600.0)])
+    hints, _ = suggestions(client, "sump")
+    assert hints["Sump pump replacement"]["use_count"] == 1
@@ -0,0 +1,41 @@
+# backend/tests/test_balances.py
+from app import models
+
+
+def test_write_sequence_keeps_counters_consistent(client, db, create_customer, create_invoice, update_invoice, assert_counters_consistent):
+    first, second = create_customer(), create_customer()
+    invoice = create_invoice(first["id"], items=[("Labor", 1, 100.0), ("Parts", 2, 10.0)])
+    estimate = create_invoice(first["id"], is_estimate=True, items=[("Water heater", 1, 900.0)])
+    assert_counters_consistent()
+
+    # Move it to another customer with different items, then mark it paid
+    invoice = update_invoice(invoice, method="put", customer_id=second["id"], items=[{"description": "labor", "quantity": 2, "unit_price": 90.0}])
+    assert_counters_consistent()
+    invoice = update_invoice(invoice, status="paid")
+    assert_counters_consistent()
+
+    response = client.post(f"/invoices/{estimate['id']}/acknowledge", json={"accepted": True})
+    assert response.status_code == 200, response.text
+    response = client.post(f"/invoices/{estimate['id']}/clone", params={"is_estimate": False})
+    assert response.status_code == 200, response.text
+    assert_counters_consistent()
+
+    response = client.delete(f"/invoices/{invoice['id']}")
+    assert response.status_code == 204, response.text
+    assert_counters_consistent()
+
+    first_row = db.get(models.Customer, first["id"])
+    assert first_row.invoice_count == 1  # the clone; the archived estimate doesn't count
+    assert first_row.open_balance == 900.0
+
+
+def test_customer_list_reads_the_maintained_balance(client, create_customer, create_invoice, update_invoice):
+    customer = create_customer()
+    create_invoice(customer["id"], items=[("Labor", 1, 100.0)])
+    paid = create_invoice(customer["id"], items=[("Parts", 1, 40.0)])
+    update_invoice(paid, status="paid")
+
+    response = client.get("/customers/")
+    assert response.status_code == 200, response.text
+    row = next(row for row in response.json() if row["id"] == customer["id"])
+    assert row["total_unpaid"] == 100.0
@@ -0,0 +1,38 @@
+# backend/tests/test_bulk_invoices.py
+import pytest
+
+from app import models
+
+
+def test_bulk_create_fails_only_the_bad_entries(client, db, create_customer, assert_counters_consistent):
+    customer = create_customer()
+    item = {"description": "Labor", "quantity": 1, "unit_price": 100.0}
+
+    response = client.post("/invoices/bulk", json=[
+        {"customer_id": customer["id"], "tech_id": 1, "items": [item]},
+        {"customer_id": customer["id"], "items": "not a list"},
+        {"customer_id": 999, "items": [item]},
+        {"customer_id": customer["id"], "tech_id": 1, "status": "paid", "items": [item, {**item, "description": "Parts"}]},
+    ])
+
+    assert response.status_code == 200, response.text
+    results = response.json()
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert [result["ok"] for result in results] == [True, False, False, True]
+    assert results[1]["errors"][0]["loc"] == ["items"]
+    assert results[2]["errors"] == ["Customer not found"]
+    assert results[0]["number"] != results[3]["number"]
+
+    created = db.query(models.Invoice).order_by(models.Invoice.id).all()
+    assert [invoice.id for invoice in created] == [results[0]["id"], results[3]["id"]]
+    assert [len(invoice.items) for invoice in created] == [1, 2]
+    assert db.get(models.Customer, customer["id"]).open_balance == 100.0
+    assert_counters_consistent()
+
+
+@pytest.mark.parametrize("payloads", [[], [{"items": []}]])
+def test_bulk_create_with_nothing_valid_writes_nothing(client, db, payloads):
+    response = client.post("/invoices/bulk", json=payloads)
+    assert response.status_code == 200, response.text
+    assert all(not result["ok"] for result in response.json())
+    assert db.query(models.Invoice).count() == 0
@@ -0,0 +1,63 @@
+# backend/tests/test_customer_search.py
+import pytest
+
+from app.utils.customer_search import ngram_index
+
+
+@pytest.fixture(autouse=True)
+def customers(db, create_customer):
+    """The in-process index is rebuilt for this test's database, then kept current by commits."""
+    ngram_index.rebuild(db)
+    return {
+        "kowalski": create_customer(first_name="Anna", last_name="Kowalski", email="anna.k@example.com", phone="(555) 010-4477"),
+        "kowalczyk": create_customer(first_name="Piotr", last_name="Kowalczyk", email="pk@example.net", phone="555.010.9921"),
+        "rivera": create_customer(first_name="Maria", last_name="Rivera", email="maria@rivera-plumbing.com", phone="+1 555 222 3131"),
+        "ivers": create_customer(first_name="Sam", last_name="Ivers", email="sam@example.org", phone=None),
+    }
+
+
+def search(client, q, **params):
+    response = client.get("/customers/", params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return [row["last_name"] for row in response.json()]
+
+
+def test_substring_matches_rank_word_starts_first(client):
+    assert search(client, "kowal") == ["Kowalski", "Kowalczyk"]
+    assert search(client, "PLUMB") == ["Rivera"]
+    # "ivers" starts a word for Ivers and sits inside "rivera" for Rivera
+    assert search(client, "iver") == ["Ivers", "Rivera"]
+
+
+def test_short_queries_only_match_word_prefixes(client):
+    assert search(client, "iv") == ["Ivers"]
+
+
+@pytest.mark.parametrize("q", ["555-010-4477", "(555) 010 4477", "5550104477", "010-4477"])
+def test_phone_queries_match_digits_in_any_format(client, q):
+    assert search(client, q) == ["Kowalski"]
+
+
+def test_phone_prefix_matches_every_customer_with_it(client):
+    assert search(client, "555 010") == ["Kowalski", "Kowalczyk"]
+
+
+def test_misspellings_match_fuzzily_after_substring_hits(client):
+    assert search(client, "kowalsky") == ["Kowalski"]
+    assert search(client, "rivero") == ["Rivera"]
+    assert search(client, "zzzzz") == []
+
+
+def test_results_page_by_offset(client):
+    assert search(client, "kowal", limit=1) == ["Kowalski"]
+    assert search(client, "kowal", limit=1, offset=1) == ["Kowalczyk"]
+
+
+def test_customer_edit_is_visible_to_the_next_search(client, customers):
+    customer = customers["ivers"]
+    response = client.put(f"/customers/{customer['id']}", json={**customer, "last_name": "Nakamura", "phone": "555-867-5309"})
+    assert response.status_code == 200, response.text
+
+    assert search(client, "nakamura") == ["Nakamura"]
+    assert search(client, "867-5309") == ["Nakamura"]
+    assert search(client, "ivers") == []
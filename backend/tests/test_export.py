@@ -0,0 +1,79 @@
+# backend/tests/test_export.py
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from app import models
+from app.utils.data_export import EXPORT_HEADER
+
+
+def export(client, export_format="csv", **params) -> list[dict]:
+    response = client.get(f"/invoices/export/{export_format}", params=params)
+    assert response.status_code == 200, response.text
+    body = gzip.decompress(response.content) if params.get("gzip") else response.content
+    text = body.decode("utf-8")
+    if export_format == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        assert reader.fieldnames == EXPORT_HEADER
+        return list(reader)
+    return [json.loads(line) for line in text.splitlines()]
+
+
+@pytest.fixture
+def invoices(db, create_customer, create_invoice, update_invoice):
+    first, second = create_customer(), create_customer()
+    labor = create_invoice(first["id"], items=[("Labor", 2, 80.0), ("Parts", 1, 35.5)])
+    paid = update_invoice(create_invoice(second["id"], items=[("Trip fee", 1, 40.0)]), status="paid")
+    estimate = create_invoice(second["id"], is_estimate=True, tech_id=None, items=[("Repipe", 1, 2500.0), ("Permit", 1, 150.0), ("Drywall", 3, 60.0)])
+    empty = create_invoice(first["id"], items=[("Placeholder", 1, 1.0)])
+    db.query(models.LineItem).filter(models.LineItem.invoice_id == empty["id"]).delete()
+    db.commit()
+    return {"labor": labor, "paid": paid, "estimate": estimate, "empty": empty}
+
+
+@pytest.mark.parametrize("export_format", ["csv", "ndjson"])
+def test_one_row_per_line_item_and_one_for_an_invoice_without_items(client, invoices, export_format):
+    rows = export(client, export_format)
+
+    per_invoice = {}
+    for row in rows:
+        per_invoice.setdefault(int(row["invoice_id"]), []).append(row)
+    assert {name: len(per_invoice[invoice["id"]]) for name, invoice in invoices.items()} == {"labor": 2, "paid": 1, "estimate": 3, "empty": 1}
+
+    (empty,) = per_invoice[invoices["empty"]["id"]]
+    assert empty["invoice_number"] == invoices["empty"]["number"]
+    assert all(empty[column] in ("", None) for column in ("line_item_id", "description", "quantity", "unit_price"))
+
+    labor = per_invoice[invoices["labor"]["id"]]
+    assert [row["description"] for row in labor] == ["Labor", "Parts"]
+    assert [float(row["unit_price"]) for row in labor] == [80.0, 35.5]
+    assert float(labor[0]["final_total"]) == invoices["labor"]["final_total"]
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"status": "paid"},
+    {"status": "unpaid"},
+    {"customer_id": 2},
+    {"tech_id": 1},
+    {"period": "ytd"},
+    {"date_from": "2000-01-01", "date_to": "2000-12-31"},
+])
+def test_filters_select_the_same_invoices_as_the_list(client, invoices, filters):
+    response = client.get("/invoices/", params={**filters, "limit": 100})
+    assert response.status_code == 200, response.text
+    listed = {row["id"] for row in response.json()}
+
+    assert {int(row["invoice_id"]) for row in export(client, **filters)} == listed
+
+
+@pytest.mark.parametrize("export_format", ["csv", "ndjson"])
+def test_gzip_decompresses_to_the_same_rows(client, invoices, export_format):
+    response = client.get(f"/invoices/export/{export_format}", params={"gzip": True})
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"].endswith(f'.{export_format}.gz"')
+
+    assert export(client, export_format, gzip=True) == export(client, export_format)
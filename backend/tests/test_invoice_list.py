@@ -0,0 +1,47 @@
+# backend/tests/test_invoice_list.py
+import pytest
+
+from app.utils.pagination import NEXT_CURSOR_HEADER
+
+
+@pytest.mark.parametrize("sort_by", ["otp_code", "signature_base64", "estimate_signature_base64", "notes", "nope"])
+def test_sort_by_outside_the_allow_list_is_rejected(client, sort_by):
+    response = client.get("/invoices/", params={"sort_by": sort_by})
+    assert response.status_code == 400
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_cursor_pages_cover_every_invoice_once(client, create_customer, create_invoice):
+    customer = create_customer()
+    ids = {create_invoice(customer["id"], items=[("Labor", 1, 10.0 * (i % 3 + 1))])["id"] for i in range(7)}
+
+    seen, params = [], {"sort_by": "final_total", "sort_dir": "asc", "limit": 3}
+    while True:
+        response = client.get("/invoices/", params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        seen += [row["id"] for row in page]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+        assert len(cursor) < 200
+        params["cursor"] = cursor
+
+    assert sorted(seen) == sorted(ids)
+
+
+def test_full_rows_by_default_and_summary_rows_on_request(client, create_customer, create_invoice):
+    invoice = create_invoice(create_customer()["id"], items=[("Labor", 1, 100.0), ("Parts", 2, 10.0)])
+
+    (full,) = client.get("/invoices/").json()
+    assert full == client.get(f"/invoices/{invoice['id']}").json()
+    assert full["items"] and full["user_name"]
+
+    response = client.get("/invoices/", params={"view": "summary"})
+    assert response.status_code == 200, response.text
+    (summary,) = response.json()
+    assert "items" not in summary and "customer" not in summary and "signature_base64" not in summary
+    assert summary["customer_name"] == f"{full['customer']['first_name']} {full['customer']['last_name']}"
+    assert (summary["id"], summary["final_total"], summary["user_name"]) == (full["id"], 120.0, full["user_name"])
+
+    assert client.get("/invoices/", params={"view": "compact"}).status_code == 422
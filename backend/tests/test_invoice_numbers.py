@@ -0,0 +1,52 @@
+# backend/tests/test_invoice_numbers.py
+from concurrent.futures import ThreadPoolExecutor
+
+from app import models
+from app.database import SessionLocal
+from app.utils.invoice import allocate_numbers
+
+THREADS = 16
+
+
+def test_threaded_allocations_never_share_a_number():
+    def allocate(count):
+        db = SessionLocal()
+        try:
+            numbers = allocate_numbers(db, "INV", count)
+            db.commit()
+            return numbers
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        batches = list(pool.map(allocate, [1, 3] * 100))
+
+    numbers = [number for batch in batches for number in batch]
+    assert len(numbers) == len(set(numbers)) == 400
+    # Each multi-number reservation is a consecutive run
+    for batch in batches:
+        sequence = [int(number.rsplit("-", 1)[1]) for number in batch]
+        assert sequence == list(range(sequence[0], sequence[0] + len(batch)))
+
+
+def test_parallel_creates_get_distinct_numbers_without_retrying(client, db, create_customer):
+    customer_id = create_customer()["id"]
+
+    def create(i):
+        return client.post("/invoices/", json={
+            "customer_id": customer_id,
+            "is_estimate": i % 5 == 0,
+            "items": [{"description": "Labor", "quantity": 1, "unit_price": 100.0}],
+        })
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        responses = list(pool.map(create, range(200)))
+
+    assert [response.status_code for response in responses] == [200] * 200, [r.text for r in responses if r.status_code != 200][:3]
+    numbers = [response.json()["number"] for response in responses]
+    assert len(set(numbers)) == 200
+    # No create rolled back and tried again: every counter value went to exactly one document
+    issued = {row.prefix: row.last_value for row in db.query(models.DocumentCounter)}
+    assert sorted(issued.values()) == [40, 160]
+    for prefix, last in issued.items():
+        assert sorted(n for n in numbers if n.startswith(prefix)) == [f"{prefix}{seq:03d}" for seq in range(1, last + 1)]
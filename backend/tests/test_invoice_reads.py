@@ -0,0 +1,66 @@
+# backend/tests/test_invoice_reads.py
+"""Invoice reads load their customer, tech and items up front, so the number
+of statements doesn't grow with the rows on a page or the items on an invoice."""
+import pytest
+
+from app import jobs
+from app.jobs import JobContext
+from app.utils.tokens import get_or_create_public_token
+
+ITEMS = [("Labor", 1, 100.0), ("Parts", 2, 10.0), ("Trip fee", 1, 25.0)]
+
+
+@pytest.fixture
+def invoices(db, create_customer, create_invoice):
+    """Five invoices across three customers, each with three items."""
+    customers = [create_customer()["id"] for _ in range(3)]
+    return [create_invoice(customers[i % 3], items=ITEMS) for i in range(5)]
+
+
+@pytest.mark.parametrize("view, per_page", [
+    ("full", 2),     # invoices joined to customer and tech, one SELECT ... IN for the items
+    ("summary", 1),  # list columns joined to customer and tech names
+])
+def test_list_page_costs_the_same_for_one_row_or_many(client, count_statements, invoices, view, per_page):
+    client.get("/invoices/").raise_for_status()  # warm the principal cache
+    pages = {}
+    for limit in (1, len(invoices) - 1):
+        with count_statements() as statements:
+            response = client.get("/invoices/", params={"limit": limit, "view": view})
+        assert response.status_code == 200, response.text
+        assert len(response.json()) == limit
+        pages[limit] = statements
+
+    assert len(pages[len(invoices) - 1]) == len(pages[1]) == per_page, pages
+
+
+@pytest.mark.parametrize("path", ["/invoices/{id}", "/public/invoice/{token}"])
+def test_invoice_detail_is_one_query_and_its_items(client, db, count_statements, invoices, path):
+    invoice = invoices[0]
+    token = get_or_create_public_token(invoice["id"], db, expires_in_hours=None)
+    db.commit()
+    client.get("/invoices/", params={"limit": 1}).raise_for_status()
+
+    with count_statements() as statements:
+        response = client.get(path.format(id=invoice["id"], token=token))
+    assert response.status_code == 200, response.text
+    assert len(response.json()["items"]) == len(ITEMS)
+    assert response.json()["customer"]["id"] == invoice["customer_id"]
+    # Invoice joined to customer and tech, one SELECT ... IN for the items, plus the token on the public view
+    assert len(statements) == 2 + path.startswith("/public"), statements
+
+
+def test_resend_loads_the_invoice_once(client, db, monkeypatch, count_statements, invoices):
+    monkeypatch.setattr(jobs, "generate_invoice_pdf_from_html", lambda **kwargs: b"%PDF-1.4")
+    monkeypatch.setattr(jobs, "send_resend_email", lambda invoice, pdf_bytes, db=None: [item.description for item in invoice.items])
+    invoice_id = invoices[0]["id"]
+
+    with count_statements() as statements:
+        response = client.post(f"/invoices/{invoice_id}/resend")
+    assert response.status_code == 202, response.text
+    assert len(statements) <= 3, statements  # the invoice, the job INSERT, job_accepted reloading it
+
+    with count_statements() as statements:
+        jobs.run_invoice_resend(JobContext("not-a-job"), db, {"invoice_id": invoice_id})
+    # The read and its items, plus JobContext.progress in its own session
+    assert len([s for s in statements if not s.startswith("UPDATE jobs")]) == 2, statements
@@ -0,0 +1,40 @@
+# backend/tests/test_invoice_refs.py
+from app import models
+
+
+def test_unknown_tech_is_rejected_on_create(client, db, create_customer):
+    customer = create_customer()
+    body = {"customer_id": customer["id"], "tech_id": 999, "items": [{"description": "Labor", "quantity": 1, "unit_price": 10.0}]}
+    response = client.post("/invoices/", json=body)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Tech not found"
+    assert db.query(models.Invoice).count() == 0
+
+
+def test_unknown_tech_is_rejected_on_update(client, db, create_customer, create_invoice):
+    invoice = create_invoice(create_customer()["id"])
+    body = {
+        "customer_id": invoice["customer_id"], "tech_id": 999, "due_date": "2030-01-01T00:00:00", "status": "unpaid",
+        "notes": None, "payment_type": None, "discount": 0.0, "tax": 0.0, "is_active": True,
+        "items": [{"description": "Labor", "quantity": 1, "unit_price": 10.0}],
+    }
+    for method in ("PATCH", "PUT"):
+        response = client.request(method, f"/invoices/{invoice['id']}", json=body)
+        assert response.status_code == 404, method
+    assert db.get(models.Invoice, invoice["id"]).tech_id == 1
+
+
+def test_unknown_references_fail_only_their_bulk_entry(client, db, create_customer):
+    customer = create_customer()
+    item = {"description": "Labor", "quantity": 1, "unit_price": 10.0}
+    response = client.post("/invoices/bulk", json=[
+        {"customer_id": customer["id"], "tech_id": 1, "items": [item]},
+        {"customer_id": customer["id"], "tech_id": 999, "items": [item]},
+        {"customer_id": 999, "items": [item]},
+    ])
+    assert response.status_code == 200, response.text
+    results = response.json()
+    assert [r["ok"] for r in results] == [True, False, False]
+    assert results[1]["errors"] == ["Tech not found"]
+    assert results[2]["errors"] == ["Customer not found"]
+    assert db.query(models.Invoice).count() == 1
@@ -0,0 +1,125 @@
+# backend/tests/test_jobs.py
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import jobs, models
+from app.jobs import JOB_HANDLERS, JobContext, enqueue_job, job_worker
+from app.utils.email import send_email
+
+
+@pytest.fixture
+def flaky_email_job(monkeypatch):
+    """A job kind that queues an email and then fails while should_fail is set."""
+    state = {"should_fail": True}
+
+    def handler(job, db, payload):
+        send_email("customer@example.com", "Your invoice", "Attached.", db=db)
+        if state["should_fail"]:
+            raise RuntimeError("render failed after queueing")
+        return {}
+
+    monkeypatch.setitem(JOB_HANDLERS, "test_flaky_email", handler)
+    return state
+
+
+def test_failed_job_does_not_leave_its_email_queued(db, monkeypatch, flaky_email_job):
+    monkeypatch.setattr(jobs, "JOB_BACKOFF_SECONDS", 0)
+    job = enqueue_job(db, "test_flaky_email", {})
+    db.commit()
+
+    job_worker._execute(*job_worker._claim())
+    db.expire_all()
+    assert db.get(models.Job, job.id).status == "queued"  # retried later
+    assert db.query(models.EmailOutbox).count() == 0
+
+    flaky_email_job["should_fail"] = False
+    job_worker._execute(*job_worker._claim())
+    db.expire_all()
+    assert db.get(models.Job, job.id).status == "succeeded"
+    assert db.query(models.EmailOutbox).count() == 1
+
+
+def test_resend_email_joins_the_job_transaction(db, monkeypatch, create_customer, create_invoice):
+    invoice = create_invoice(create_customer()["id"])
+    monkeypatch.setattr(jobs, "generate_invoice_pdf_from_html", lambda **kwargs: b"%PDF-1.4")
+
+    jobs.run_invoice_resend(JobContext("not-a-job"), db, {"invoice_id": invoice["id"]})
+    db.rollback()
+    assert db.query(models.EmailOutbox).count() == 0
+
+
+@pytest.fixture
+def long_job(monkeypatch):
+    """A job kind that runs until released, heartbeating every 50 ms."""
+    monkeypatch.setattr(jobs, "JOB_HEARTBEAT_SECONDS", 0.05)
+    started, release = threading.Event(), threading.Event()
+
+    def handler(job, db, payload):
+        started.set()
+        release.wait(5)
+        return {}
+
+    monkeypatch.setitem(JOB_HANDLERS, "test_long", handler)
+    return started, release
+
+
+def _age_job(db, job_id, seconds):
+    then = datetime.utcnow() - timedelta(seconds=seconds)
+    db.query(models.Job).filter(models.Job.id == job_id).update({"started_at": then, "heartbeat_at": then})
+    db.commit()
+
+
+def test_sweep_leaves_long_running_jobs_with_a_heartbeat(db, monkeypatch, long_job):
+    monkeypatch.setattr(jobs, "JOB_STALE_SECONDS", 1)
+    started, release = long_job
+    job = enqueue_job(db, "test_long", {})
+    db.commit()
+    worker = threading.Thread(target=job_worker._execute, args=job_worker._claim())
+    worker.start()
+    started.wait(5)
+
+    _age_job(db, job.id, 3600)  # started an hour ago
+    time.sleep(0.2)             # but still heartbeating
+    job_worker._requeue_stale()
+    release.set()
+    worker.join(5)
+
+    db.expire_all()
+    assert db.get(models.Job, job.id).status == "succeeded"
+    assert db.get(models.Job, job.id).attempts == 1
+
+
+def test_sweep_requeues_jobs_whose_worker_is_gone(db, monkeypatch):
+    monkeypatch.setitem(JOB_HANDLERS, "test_orphan", lambda job, db, payload: {})
+    job = enqueue_job(db, "test_orphan", {})
+    db.commit()
+    job_worker._claim()
+
+    _age_job(db, job.id, jobs.JOB_STALE_SECONDS + 60)
+    job_worker._requeue_stale()
+
+    db.expire_all()
+    assert db.get(models.Job, job.id).status == "queued"
+
+
+def test_finish_keeps_the_sweeps_failure(db, monkeypatch, long_job):
+    started, release = long_job
+    monkeypatch.setattr(jobs, "JOB_HEARTBEAT_SECONDS", 3600)
+    monkeypatch.setattr(jobs, "JOB_NO_RETRY", {"test_long"})
+    job = enqueue_job(db, "test_long", {})
+    db.commit()
+    worker = threading.Thread(target=job_worker._execute, args=job_worker._claim())
+    worker.start()
+    started.wait(5)
+
+    _age_job(db, job.id, jobs.JOB_STALE_SECONDS + 60)
+    job_worker._requeue_stale()
+    release.set()
+    worker.join(5)
+
+    db.expire_all()
+    swept = db.get(models.Job, job.id)
+    assert (swept.status, swept.error) == ("failed", "Interrupted by a restart")
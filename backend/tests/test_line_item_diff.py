@@ -0,0 +1,38 @@
+# backend/tests/test_line_item_diff.py
+from app import models
+
+
+def test_put_diffs_line_items_by_id(db, create_customer, create_invoice, update_invoice, assert_counters_consistent):
+    invoice = create_invoice(create_customer()["id"], items=[("Labor", 1, 100.0), ("Parts", 2, 10.0), ("Trip fee", 1, 25.0)])
+    labor, parts, trip = invoice["items"]
+
+    replaced = update_invoice(invoice, method="put", items=[
+        labor,
+        {**parts, "unit_price": 12.5},
+        {"description": "Disposal", "quantity": 1, "unit_price": 15.0},
+    ])
+
+    assert replaced["item_changes"] == {"inserted": 1, "updated": 1, "deleted": 1, "unchanged": 1}
+    by_description = {item["description"]: item for item in replaced["items"]}
+    assert by_description["Labor"]["id"] == labor["id"]
+    assert by_description["Parts"]["id"] == parts["id"] and by_description["Parts"]["unit_price"] == 12.5
+    assert "Trip fee" not in by_description
+    assert replaced["total"] == replaced["final_total"] == 140.0
+
+    db.expire_all()
+    stored = {item.description: (item.id, item.quantity, item.unit_price) for item in db.query(models.LineItem)}
+    assert stored == {
+        "Labor": (labor["id"], 1, 100.0),
+        "Parts": (parts["id"], 2, 12.5),
+        "Disposal": (by_description["Disposal"]["id"], 1, 15.0),
+    }
+    assert_counters_consistent()
+
+
+def test_put_with_unchanged_items_touches_no_item_rows(create_customer, create_invoice, update_invoice):
+    invoice = create_invoice(create_customer()["id"], items=[("Labor", 1, 100.0), ("Parts", 2, 10.0)])
+
+    replaced = update_invoice(invoice, method="put", notes="Gate code 1234")
+
+    assert replaced["item_changes"] == {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 2}
+    assert [item["id"] for item in replaced["items"]] == [item["id"] for item in invoice["items"]]
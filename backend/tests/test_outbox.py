@@ -0,0 +1,81 @@
+# backend/tests/test_outbox.py
+from datetime import datetime, timedelta
+
+from app import models
+from app.utils import outbox
+from app.utils.email import send_email
+from app.utils.outbox import email_outbox_worker
+
+
+class FakeConnection:
+    """Stands in for the SMTP connection; runs on_send before each message goes out."""
+
+    def __init__(self, on_send=lambda entry: None):
+        self.on_send = on_send
+        self.sent = []
+
+    def send(self, entry):
+        self.on_send(entry)
+        self.sent.append(entry.id)
+
+    def close(self):
+        pass
+
+
+def _queue(db, count):
+    for i in range(count):
+        send_email(f"customer{i}@example.com", "Your invoice", "Attached.", db=db)
+    db.commit()
+    return [entry_id for (entry_id,) in db.query(models.EmailOutbox.id).order_by(models.EmailOutbox.id)]
+
+
+def _age(db, entry_id, seconds):
+    db.query(models.EmailOutbox).filter(models.EmailOutbox.id == entry_id).update(
+        {"next_attempt_at": datetime.utcnow() - timedelta(seconds=seconds)}
+    )
+    db.commit()
+
+
+def test_each_send_restamps_its_row(db):
+    first, second = _queue(db, 2)
+
+    def slow_first_send(entry):
+        # The batch was claimed long ago, as if the first message took the whole stale window
+        if entry.id == first:
+            _age(db, second, outbox.OUTBOX_STALE_SECONDS + 60)
+        else:
+            # The second send only just started, so a sweep mid-send leaves it alone
+            email_outbox_worker._requeue_stale()
+            db.expire_all()
+            assert db.get(models.EmailOutbox, second).status == "sending"
+
+    connection = FakeConnection(slow_first_send)
+    email_outbox_worker._deliver_batch(connection)
+
+    assert connection.sent == [first, second]
+    db.expire_all()
+    assert [row.status for row in db.query(models.EmailOutbox).order_by(models.EmailOutbox.id)] == ["sent", "sent"]
+
+
+def test_rows_requeued_while_waiting_in_the_batch_are_not_sent_twice(db):
+    first, second = _queue(db, 2)
+    other_worker = FakeConnection()
+
+    def stall(entry):
+        # While the first send hangs, the sweep hands the second row to another worker
+        if entry.id == first:
+            _age(db, second, outbox.OUTBOX_STALE_SECONDS + 60)
+            email_outbox_worker._requeue_stale()
+            email_outbox_worker._deliver_batch(other_worker)
+
+    connection = FakeConnection(stall)
+    email_outbox_worker._deliver_batch(connection)
+
+    assert connection.sent == [first]
+    assert other_worker.sent == [second]
+    db.expire_all()
+    assert db.get(models.EmailOutbox, second).attempts == 2
+
+
+def test_stale_window_outlasts_one_slow_message():
+    assert outbox.OUTBOX_STALE_SECONDS >= 10 * outbox.SMTP_TIMEOUT_SECONDS
@@ -0,0 +1,22 @@
+# backend/tests/test_public_invoice.py
+from fastapi.testclient import TestClient
+
+from app import models
+from app.main import app
+from app.utils.tokens import get_or_create_public_token
+
+
+def test_public_acknowledge_queues_the_signed_copy_without_exposing_the_job(db, create_customer, create_invoice):
+    invoice = create_invoice(create_customer()["id"])
+    token = get_or_create_public_token(invoice["id"], db)
+    db.commit()
+
+    public_client = TestClient(app)  # no bearer token: the customer's view
+    response = public_client.post(f"/public/invoice/{token}/acknowledge", json={"accepted": True, "signature_base64": "data:image/png;base64,AAAA"})
+
+    assert response.status_code == 202, response.text
+    assert response.json() == {"message": "Acknowledged; signed copy will be emailed shortly"}
+    job = db.query(models.Job).one()
+    assert (job.kind, job.payload) == ("invoice_signed_copy", {"invoice_id": invoice["id"]})
+    db.expire_all()
+    assert db.get(models.Invoice, invoice["id"]).accepted is True
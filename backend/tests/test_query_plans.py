@@ -0,0 +1,100 @@
+# backend/tests/test_query_plans.py
+"""The hot invoice and customer queries are planned on their indexes (SQLite;
+`python -m benchmarks.query_plans --database-url ...` checks Postgres)."""
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event, func, insert
+
+from app import models
+from app.database import engine
+from app.utils.statements import open_invoice_filter
+from app.utils.tokens import get_or_create_public_token
+
+
+@contextmanager
+def captured_selects():
+    """SELECTs sent while open, with their parameters, for EXPLAIN QUERY PLAN."""
+    selects = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            selects.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield selects
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def query_plans(selects) -> str:
+    with engine.connect() as conn:
+        return "\n".join(
+            row[-1]
+            for statement, parameters in selects
+            for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        )
+
+
+@pytest.fixture(autouse=True)
+def analyzed(db):
+    """A few thousand invoices, mostly paid, with planner statistics: without them
+    SQLite breaks ties between candidate indexes by creation order."""
+    customers, techs, per_customer = 100, 5, 30
+    db.execute(insert(models.User), [{"id": i, "user_name": f"Tech {i}", "email": f"tech{i}@example.com", "hashed_password": "x"} for i in range(2, techs + 1)])
+    db.execute(insert(models.Customer), [{"id": i, "first_name": "Customer", "last_name": str(i), "email": f"c{i}@example.com"} for i in range(1, customers + 1)])
+    first_day = date(2024, 1, 1)
+    db.execute(insert(models.Invoice), [
+        {
+            "id": i, "number": f"INV-{i:06d}", "customer_id": i % customers + 1, "tech_id": i % techs + 1,
+            "date": first_day + timedelta(days=i % 700), "status": "unpaid" if i % 10 == 0 else "paid",
+            "is_estimate": i % 25 == 0, "is_active": True, "total": 100.0, "final_total": 100.0,
+        }
+        for i in range(1, customers * per_customer + 1)
+    ])
+    db.execute(insert(models.LineItem), [
+        {"invoice_id": i, "description": "Labor", "quantity": 1, "unit_price": 100.0} for i in range(1, customers * per_customer + 1)
+    ])
+    db.commit()
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    engine.dispose()  # connections read the statistics when they open
+
+
+@pytest.mark.parametrize("params, index", [
+    ({}, "ix_invoices_date_id"),
+    ({"customer_id": 1}, "ix_invoices_customer_id_date"),
+    ({"tech_id": 1, "date_from": "2025-01-01"}, "ix_invoices_tech_id_date"),
+    ({"status": "unpaid", "date_from": "2025-01-01"}, "ix_invoices_status_date"),
+])
+def test_invoice_list_uses_its_index(client, params, index):
+    with captured_selects() as selects:
+        response = client.get("/invoices/", params=params)
+    assert response.status_code == 200, response.text
+    assert index in query_plans(selects)
+
+
+def test_invoice_detail_loads_items_by_index(client):
+    with captured_selects() as selects:
+        response = client.get("/invoices/1")
+    assert response.status_code == 200, response.text
+    assert "ix_line_items_invoice_id" in query_plans(selects)
+
+
+def test_public_token_lookup_uses_its_index(db):
+    with captured_selects() as selects:
+        get_or_create_public_token(1, db)
+    assert "ix_public_tokens_invoice_id" in query_plans(selects)
+
+
+def test_open_balances_read_the_partial_index(db):
+    # Literal values, as psycopg2 sends them: SQLite only matches a partial index against constants
+    query = (
+        db.query(models.Invoice.customer_id, func.sum(models.Invoice.final_total))
+        .filter(models.Invoice.customer_id.in_([1, 2, 3]), *open_invoice_filter())
+        .group_by(models.Invoice.customer_id)
+    )
+    statement = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    assert "ix_invoices_open_balance" in query_plans([(statement, ())])
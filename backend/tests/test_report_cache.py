@@ -0,0 +1,31 @@
+# backend/tests/test_report_cache.py
+from app.utils.report_cache import report_cache
+
+
+def total_billed(client) -> float:
+    response = client.get("/reports/tech-summary")
+    assert response.status_code == 200, response.text
+    return sum(row["all_time"]["total_amount"] for row in response.json())
+
+
+def test_invoice_write_invalidates_cached_report(client, create_customer, create_invoice):
+    customer = create_customer()
+    create_invoice(customer["id"])
+    assert total_billed(client) == 100.0
+    hits = report_cache.stats()["hits"]
+    assert total_billed(client) == 100.0
+    assert report_cache.stats()["hits"] == hits + 1
+
+    create_invoice(customer["id"], items=[("Labor", 1, 50.0)])
+    assert total_billed(client) == 150.0
+
+
+def test_customer_delete_invalidates_cached_report(client, create_customer, create_invoice):
+    kept, deleted = create_customer(), create_customer()
+    create_invoice(kept["id"])
+    create_invoice(deleted["id"], items=[("Labor", 1, 50.0)])
+    assert total_billed(client) == 150.0
+
+    response = client.delete(f"/customers/{deleted['id']}")
+    assert response.status_code == 200, response.text
+    assert total_billed(client) == 100.0
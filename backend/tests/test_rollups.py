@@ -0,0 +1,29 @@
+# backend/tests/test_rollups.py
+from app import models
+from app.utils.rollups import reconcile_tech_rollup
+
+
+def test_invoice_writes_keep_rollup_in_step(client, db, create_customer, create_invoice, update_invoice):
+    customer = create_customer()
+    invoice = create_invoice(customer["id"], items=[("Labor", 2, 50.0)])
+    estimate = create_invoice(customer["id"], is_estimate=True)
+    update_invoice(invoice, status="paid")
+    client.delete(f"/invoices/{estimate['id']}")
+
+    assert reconcile_tech_rollup(db, dry_run=True) == []
+
+
+def test_deleting_customer_removes_their_invoices_from_rollup(client, db, create_customer, create_invoice):
+    kept, deleted = create_customer(), create_customer()
+    create_invoice(kept["id"])
+    create_invoice(deleted["id"], items=[("Labor", 3, 40.0)])
+    create_invoice(deleted["id"], status="paid")
+
+    response = client.delete(f"/customers/{deleted['id']}")
+    assert response.status_code == 200, response.text
+
+    assert db.query(models.Invoice).filter(models.Invoice.customer_id == deleted["id"]).count() == 0
+    assert reconcile_tech_rollup(db, dry_run=True) == []
+    totals = db.query(models.TechDailyRevenue.invoice_count, models.TechDailyRevenue.final_total).all()
+    assert sum(count for count, _ in totals) == 1
+    assert round(sum(total for _, total in totals), 2) == 100.0
@@ -0,0 +1,56 @@
+# backend/tests/test_write_budgets.py
+"""Each invoice write endpoint is one transaction with a fixed statement budget,
+so a stray commit/refresh or a lazy load during serialization fails here
+instead of showing up as production latency."""
+
+# Statements per request, principal lookup excluded (warmed by an earlier request)
+BUDGETS = {
+    "POST /invoices/": 9,                  # customer, tech, counter upsert, invoice INSERT, items INSERT, balance, description stats x2, tech rollup
+    "PATCH /invoices/{id}": 6,             # invoice, items, invoice UPDATE, item UPDATE, balance, tech rollup (quantity only: no description stats)
+    "PUT /invoices/{id}": 10,              # invoice, items, invoice UPDATE, item UPDATE/INSERT/DELETE, balance, description stats x2, tech rollup
+    "POST /invoices/{id}/acknowledge": 5,  # invoice, items, invoice UPDATE, balance, tech rollup
+    "POST /invoices/{id}/clone": 11,       # invoice, items, counter, archive UPDATE, invoice/items/token INSERT, balance, description stats x2, tech rollup
+}
+
+
+def test_write_endpoints_stay_within_statement_budgets(client, count_statements, create_customer):
+    customer_id = create_customer()["id"]
+    items = [{"description": f"task {i}", "quantity": 1, "unit_price": 25.0} for i in range(3)]
+    payload = {"customer_id": customer_id, "tech_id": 1, "due_date": "2025-06-01T00:00:00", "status": "unpaid", "is_active": True, "payment_type": None, "discount": 0.0, "tax": 0.0}
+    measured = {}
+
+    def call(name, method, path, **kwargs):
+        with count_statements() as statements:
+            response = client.request(method, path, **kwargs)
+        assert response.status_code == 200, response.text
+        measured[name] = statements
+        return response.json()
+
+    # Warm the principal cache and seed today's number counter, so only the
+    # endpoint's steady-state statements are counted
+    client.post("/invoices/", json={"customer_id": customer_id, "items": items}).raise_for_status()
+
+    created = call("POST /invoices/", "POST", "/invoices/", json={"customer_id": customer_id, "tech_id": 1, "items": items})
+    invoice_id, kept = created["id"], created["items"]
+    call("PATCH /invoices/{id}", "PATCH", f"/invoices/{invoice_id}", json={**payload, "notes": "patched", "items": [kept[0], kept[1], {**kept[2], "quantity": 2}]})
+    call("PUT /invoices/{id}", "PUT", f"/invoices/{invoice_id}", json={**payload, "items": [kept[0], {**kept[1], "unit_price": 30.0}, {"description": "new", "quantity": 1, "unit_price": 5.0}]})
+    call("POST /invoices/{id}/acknowledge", "POST", f"/invoices/{invoice_id}/acknowledge", json={"accepted": True, "status": "paid"})
+    call("POST /invoices/{id}/clone", "POST", f"/invoices/{invoice_id}/clone")
+
+    over = {name: statements for name, statements in measured.items() if len(statements) > BUDGETS[name]}
+    assert not over, "\n".join(
+        f"{name}: {len(statements)} statements (budget {BUDGETS[name]})\n  " + "\n  ".join(s[:160] for s in statements)
+        for name, statements in over.items()
+    )
+
+
+def test_patch_recomputes_totals(create_customer, create_invoice, update_invoice, assert_counters_consistent):
+    invoice = create_invoice(create_customer()["id"], items=[("Labor", 1, 100.0), ("Parts", 2, 10.0)])
+    labor, parts = invoice["items"]
+
+    patched = update_invoice(invoice, items=[labor, {**parts, "quantity": 5}], discount=20.0)
+
+    assert [item["id"] for item in patched["items"]] == [labor["id"], parts["id"]]
+    assert patched["total"] == 150.0
+    assert patched["final_total"] == 130.0
+    assert_counters_consistent()
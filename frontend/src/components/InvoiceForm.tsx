@@ -35,7 +35,7 @@ export default function InvoiceForm({ customerId }: { customerId: string }) {
         if (!query.trim()) return setAllDescriptions([]);
         try {
             const res = await api.get("/line-items/descriptions", {
-                params: { q: encodeURIComponent(query) },
+                params: { q: query },
             });
             const data = res.data;
             if (Array.isArray(data)) setAllDescriptions(data);
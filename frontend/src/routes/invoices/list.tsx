@@ -37,6 +37,7 @@ export default function InvoiceList({ customerId }: { customerId?: number }) {
                 offset: offset.toString(),
                 sort_by: sortBy,
                 sort_dir: sortDir,
+                view: "summary",
             };
             if (techId) params.tech_id = techId;
             if (status && status !== "all") params.status = status;